@@ -5,6 +5,7 @@ Full-scale testing script for the Causal Rationale Extraction System
 import sys
 import os
 import time
+from contextlib import nullcontext
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
@@ -19,6 +20,8 @@ from src.data_processing.pipeline import DataProcessingPipeline
 from src.system import System
 from src.evaluation.dataset_generator import DatasetGenerator
 from src.evaluation.evaluator import Evaluator
+from src.evaluation.query_simulator import QuerySimulator
+from src.evaluation.replay import ReplayHarness
 import pandas as pd
 
 
@@ -36,13 +39,52 @@ def print_step(step_num, total, description):
 
 def main():
     """Run full-scale testing"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Full-scale system test")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument(
+        "--record",
+        type=str,
+        metavar="CASSETTE",
+        help="Record LLM calls, vector searches and rerank scores to a cassette file"
+    )
+    cassette.add_argument(
+        "--replay",
+        type=str,
+        metavar="CASSETTE",
+        help="Serve LLM calls, vector searches and rerank scores from a cassette (offline, deterministic)"
+    )
+    parser.add_argument(
+        "--timings-output",
+        type=str,
+        default="data/benchmarks/stage_timings.json",
+        help="Where to write per-stage latencies when recording or replaying"
+    )
+    args = parser.parse_args()
+    
     start_time = time.time()
     
     print_section("Full-Scale Testing - Causal Rationale Extraction System")
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     
+    harness = None
+    if args.record:
+        harness = ReplayHarness(args.record, mode='record')
+        print(f"Recording external calls to: {args.record}\n")
+    elif args.replay:
+        harness = ReplayHarness(args.replay, mode='replay')
+        print(f"Replaying external calls from: {args.replay}\n")
+    
+    def timed(stage):
+        """Time a step when recording or replaying"""
+        return harness.stage(stage) if harness else nullcontext()
+    
     # Check for API key
-    if not os.getenv("GEMINI_API_KEY") and not os.getenv("OPENAI_API_KEY") and not os.getenv("ANTHROPIC_API_KEY"):
+    if args.replay:
+        print("✓ Replaying recorded LLM responses (no API key needed)\n")
+        api_available = True
+    elif not os.getenv("GEMINI_API_KEY") and not os.getenv("OPENAI_API_KEY") and not os.getenv("ANTHROPIC_API_KEY"):
         print("⚠️  Warning: No API key found!")
         print("Please set GEMINI_API_KEY, OPENAI_API_KEY, or ANTHROPIC_API_KEY")
         print("Continuing with data processing only...\n")
@@ -53,35 +95,38 @@ def main():
     
     # Step 1: Process and index data
     print_step(1, 5, "Processing and indexing transcript data")
-    try:
-        pipeline = DataProcessingPipeline(
-            vector_db_path=os.getenv("VECTOR_DB_PATH", "./data/processed/vector_db"),
-            embedding_model="all-MiniLM-L6-v2",
-            span_window_size=5
-        )
-        
-        # Process dummy data
-        # Note: output_directory=None to avoid generating 10k JSON files
-        # Only the vector database is needed for testing
-        processed = pipeline.process_batch(
-            input_directory="data/raw",
-            output_directory=None,  # Don't save individual files to save disk space
-            file_pattern="dummy_transcripts.json",
-            index_to_vector_db=True
-        )
-        
-        print(f"✓ Processed {len(processed)} transcripts")
-        print(f"✓ Indexed dialogue spans to vector database")
-        
-        # Get statistics
-        total_spans = sum(len(t.get('spans', [])) for t in processed)
-        total_events = sum(len(t.get('events', [])) for t in processed)
-        print(f"✓ Total dialogue spans: {total_spans}")
-        print(f"✓ Total events: {total_events}")
+    if args.replay:
+        print("✓ Skipped: searches and index lookups are served from the cassette")
+    else:
+        try:
+            pipeline = DataProcessingPipeline(
+                vector_db_path=os.getenv("VECTOR_DB_PATH", "./data/processed/vector_db"),
+                embedding_model="all-MiniLM-L6-v2",
+                span_window_size=5
+            )
+            
+            # Process dummy data
+            # Note: output_directory=None to avoid generating 10k JSON files
+            # Only the vector database is needed for testing
+            processed = pipeline.process_batch(
+                input_directory="data/raw",
+                output_directory=None,  # Don't save individual files to save disk space
+                file_pattern="dummy_transcripts.json",
+                index_to_vector_db=True
+            )
+            
+            print(f"✓ Processed {len(processed)} transcripts")
+            print(f"✓ Indexed dialogue spans to vector database")
+            
+            # Get statistics
+            total_spans = sum(len(t.get('spans', [])) for t in processed)
+            total_events = sum(len(t.get('events', [])) for t in processed)
+            print(f"✓ Total dialogue spans: {total_spans}")
+            print(f"✓ Total events: {total_events}")
         
-    except Exception as e:
-        print(f"❌ Error processing data: {e}")
-        return
+        except Exception as e:
+            print(f"❌ Error processing data: {e}")
+            return
     
     # Step 2: Initialize system
     print_step(2, 5, "Initializing system")
@@ -97,11 +142,17 @@ def main():
         else:
             llm_model = os.getenv("DEFAULT_LLM_MODEL", "gpt-4")
         
+        # Replayed clients must exist before the system asks for an API key
+        if harness:
+            harness.install_llm(llm_provider, llm_model)
+        
         system = System(
             vector_db_path=os.getenv("VECTOR_DB_PATH", "./data/processed/vector_db"),
             llm_provider=llm_provider,
             llm_model=llm_model
         )
+        if harness:
+            harness.install(system)
         print("✓ System initialized successfully")
     except Exception as e:
         print(f"❌ Error initializing system: {e}")
@@ -120,10 +171,11 @@ def main():
         for i, query in enumerate(test_queries, 1):
             try:
                 print(f"  Testing query {i}: {query[:50]}...")
-                result = system.process_query(
-                    query=query,
-                    conversation_id=f"test_{i}"
-                )
+                with timed('query'):
+                    result = system.process_query(
+                        query=query,
+                        conversation_id=f"test_{i}"
+                    )
                 
                 response = result.get('response', 'No response')
                 evidence_count = result.get('metadata', {}).get('evidence_count', 0)
@@ -137,7 +189,7 @@ def main():
                 
                 print(f"    ✓ Response length: {len(response)} chars")
                 print(f"    ✓ Evidence count: {evidence_count}")
-                
+            
             except Exception as e:
                 print(f"    ❌ Error: {e}")
                 results.append({
@@ -159,23 +211,25 @@ def main():
             query1 = "Why are escalations happening on calls?"
             print(f"  Initial query: {query1}")
             
-            result1 = system.process_query(
-                query=query1,
-                conversation_id=conv_id
-            )
+            with timed('query'):
+                result1 = system.process_query(
+                    query=query1,
+                    conversation_id=conv_id
+                )
             print(f"    ✓ Initial response generated")
             
             # Follow-up query
             query2 = "What patterns lead to these escalations?"
             print(f"  Follow-up query: {query2}")
             
-            result2 = system.process_followup(
-                query=query2,
-                conversation_id=conv_id
-            )
+            with timed('followup'):
+                result2 = system.process_followup(
+                    query=query2,
+                    conversation_id=conv_id
+                )
             print(f"    ✓ Follow-up response generated")
             print(f"    ✓ Context used: {result2.get('context_used', False)}")
-            
+        
         except Exception as e:
             print(f"  ❌ Error testing follow-ups: {e}")
     
@@ -183,15 +237,19 @@ def main():
     if api_available:
         print_step(5, 5, "Generating query dataset")
         try:
-            generator = DatasetGenerator(system=system)
+            generator = DatasetGenerator(
+                system=system,
+                query_simulator=QuerySimulator(provider=llm_provider, model=llm_model)
+            )
             
             print("  Generating queries for event types: escalation, refund, churn")
-            dataset = generator.generate_dataset(
-                event_types=['escalation', 'refund', 'churn'],
-                num_queries_per_type=10,  # 10 per type = 30 initial + follow-ups
-                include_followups=True,
-                output_path="data/queries/dataset.csv"
-            )
+            with timed('dataset_generation'):
+                dataset = generator.generate_dataset(
+                    event_types=['escalation', 'refund', 'churn'],
+                    num_queries_per_type=10,  # 10 per type = 30 initial + follow-ups
+                    include_followups=True,
+                    output_path="data/queries/dataset.csv"
+                )
             
             print(f"  ✓ Generated dataset with {len(dataset)} queries")
             print(f"  ✓ Saved to: data/queries/dataset.csv")
@@ -206,7 +264,7 @@ def main():
             for event_type in ['escalation', 'refund', 'churn']:
                 count = len(dataset[dataset['Event_Type'] == event_type])
                 print(f"  ✓ {event_type.capitalize()} queries: {count}")
-            
+        
         except Exception as e:
             print(f"  ❌ Error generating dataset: {e}")
             import traceback
@@ -216,6 +274,17 @@ def main():
     elapsed_time = time.time() - start_time
     print_section("Testing Complete")
     print(f"Total time: {elapsed_time:.2f} seconds ({elapsed_time/60:.2f} minutes)")
+    
+    # Per-stage latency baseline
+    if harness:
+        print(f"\nStage latencies ({harness.mode}):")
+        for stage, stats in harness.get_timings().items():
+            print(
+                f"  {stage:<20} calls={stats['calls']:<5} "
+                f"mean={stats['mean_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms"
+            )
+        harness.save_timings(args.timings_output)
+        print(f"Stage timings saved to: {args.timings_output}")
     print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     print("\nNext steps:")
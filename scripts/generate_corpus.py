@@ -0,0 +1,469 @@
+"""
+Generate large synthetic transcript corpora as sharded JSONL or Parquet files
+"""
+
+import sys
+import os
+import gzip
+import io
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+# Reuse the dummy data dialogue templates
+sys.path.insert(0, str(Path(__file__).parent))
+
+from generate_dummy_data import (
+    AGENT_GREETINGS,
+    CUSTOMER_ISSUES,
+    AGENT_RESPONSES,
+    CUSTOMER_FRUSTRATED,
+    ESCALATION_TRIGGERS,
+    REFUND_TRIGGERS,
+    CHURN_TRIGGERS
+)
+
+EVENT_TRIGGERS = {
+    'escalation': ESCALATION_TRIGGERS,
+    'refund': REFUND_TRIGGERS,
+    'churn': CHURN_TRIGGERS
+}
+
+CUSTOMER_FILLERS = ['I see', 'Okay', 'That makes sense', 'I understand', 'Can you explain more?', 'What about...']
+AGENT_FILLERS = ['Let me check that for you', 'I understand', 'I can help with that', 'Let me verify', 'One moment please']
+
+# Customer service vocabulary for filler sentences, most common first
+DOMAIN_WORDS = [
+    'order', 'account', 'payment', 'delivery', 'shipping', 'package', 'invoice', 'charge',
+    'subscription', 'plan', 'card', 'refund', 'return', 'replacement', 'warranty', 'product',
+    'service', 'support', 'ticket', 'number', 'address', 'email', 'password', 'login',
+    'tracking', 'store', 'price', 'discount', 'coupon', 'fee', 'bill', 'statement',
+    'device', 'app', 'website', 'update', 'error', 'issue', 'problem', 'delay',
+    'today', 'yesterday', 'week', 'month', 'again', 'still', 'already', 'never',
+    'check', 'confirm', 'send', 'receive', 'change', 'cancel', 'upgrade', 'reset',
+    'broken', 'missing', 'wrong', 'late', 'damaged', 'expensive', 'slow', 'different'
+]
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'tas', 'vo', 'ne', 'dra', 'sil', 'po', 'qua', 'ber', 'ton', 'ex', 'ul', 'fi']
+
+SUPPORTED_FORMATS = ['jsonl', 'parquet']
+
+
+def max_vocabulary_size() -> int:
+    """Largest vocabulary build_vocabulary can produce (domain words plus distinct 2-4 syllable words)"""
+    pseudo_words = {
+        ''.join(syllables)
+        for length in range(2, 5)
+        for syllables in itertools.product(SYLLABLES, repeat=length)
+    }
+    return len(DOMAIN_WORDS) + len(pseudo_words - set(DOMAIN_WORDS))
+
+
+def build_vocabulary(vocab_size: int, seed: int) -> List[str]:
+    """
+    Domain words followed by deterministic pseudo-words up to vocab_size.
+    
+    Pseudo-words stand in for the long tail of product names, order codes
+    and misspellings that real transcripts contain.
+    
+    Raises:
+        ValueError: If vocab_size exceeds max_vocabulary_size()
+    """
+    max_size = max_vocabulary_size()
+    if vocab_size > max_size:
+        raise ValueError(f"Vocabulary size {vocab_size} exceeds the {max_size} distinct words available")
+    
+    vocabulary = DOMAIN_WORDS[:vocab_size]
+    seen = set(vocabulary)
+    rng = random.Random(f"{seed}-vocabulary")
+    
+    while len(vocabulary) < vocab_size:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            vocabulary.append(word)
+    
+    return vocabulary
+
+
+def zipf_cum_weights(size: int, exponent: float) -> List[float]:
+    """Cumulative Zipf weights (rank^-exponent) for random.choices"""
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, size + 1):
+        total += rank ** -exponent
+        cum_weights.append(total)
+    return cum_weights
+
+
+class TranscriptFactory:
+    """
+    Seeded transcript generator.
+    
+    Args:
+        config: Generation settings (see parse_args)
+        rng: Random generator of the shard being written
+    """
+    
+    def __init__(self, config: Dict[str, Any], rng: random.Random):
+        self.config = config
+        self.rng = rng
+        self.vocabulary = build_vocabulary(config['vocab_size'], config['seed'])
+        self.cum_weights = zipf_cum_weights(len(self.vocabulary), config['zipf_exponent'])
+        self.event_types = list(config['event_mix'])
+        self.event_cum_weights = []
+        total = 0.0
+        for event_type in self.event_types:
+            total += config['event_mix'][event_type]
+            self.event_cum_weights.append(total)
+    
+    def filler(self) -> str:
+        """Zipf-distributed filler words appended to a turn"""
+        mean = self.config['filler_words']
+        if mean <= 0:
+            return ""
+        
+        count = max(0, round(self.rng.gauss(mean, mean / 3)))
+        if count == 0:
+            return ""
+        return " " + " ".join(self.rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=count))
+    
+    def generate(self, transcript_id: str) -> Dict[str, Any]:
+        """Generate one transcript with turns and events"""
+        rng = self.rng
+        config = self.config
+        turns = []
+        timestamp = 0.0
+        
+        def add_turn(speaker: str, text: str, min_gap: float, max_gap: float):
+            nonlocal timestamp
+            turns.append({
+                "turn_id": len(turns) + 1,
+                "speaker": speaker,
+                "text": text,
+                "timestamp": round(timestamp, 2)
+            })
+            timestamp += rng.uniform(min_gap, max_gap)
+        
+        # Opening: greeting, issue, acknowledgement
+        add_turn("agent", rng.choice(AGENT_GREETINGS), 1.0, 3.0)
+        add_turn("customer", rng.choice(CUSTOMER_ISSUES) + self.filler(), 2.0, 5.0)
+        add_turn("agent", rng.choice(AGENT_RESPONSES), 1.5, 4.0)
+        
+        num_turns = rng.randint(config['min_turns'], config['max_turns'])
+        
+        # Events trigger on a customer turn after the opening
+        event_type = None
+        event_index = None
+        customer_turns = list(range(0, num_turns, 2))
+        if customer_turns and rng.random() < config['event_rate']:
+            event_type = rng.choices(self.event_types, cum_weights=self.event_cum_weights)[0]
+            event_index = rng.choice(customer_turns)
+        
+        for i in range(num_turns):
+            if i % 2 == 0:
+                speaker = "customer"
+                if i == event_index:
+                    text = rng.choice(EVENT_TRIGGERS[event_type])
+                    event_turn = len(turns) + 1
+                elif event_type is not None and rng.random() < config['frustration_rate']:
+                    text = rng.choice(CUSTOMER_FRUSTRATED)
+                else:
+                    text = f"Customer response {i+1}: {rng.choice(CUSTOMER_FILLERS)}"
+            else:
+                speaker = "agent"
+                text = f"Agent response {i+1}: {rng.choice(AGENT_FILLERS)}"
+            
+            add_turn(speaker, text + self.filler(), 1.0, 4.0)
+        
+        events = []
+        if event_type is not None:
+            events.append({
+                "event_type": event_type,
+                "event_label": f"{event_type}_request",
+                "turn_id": event_turn,
+                "timestamp": turns[event_turn - 1]["timestamp"]
+            })
+        
+        # Closing
+        if rng.random() < 0.7:
+            if turns[-1]["speaker"] == "customer":
+                add_turn("agent", "Thank you for calling. Have a great day!", 0.0, 0.0)
+            else:
+                add_turn("customer", "Thank you for your help. Goodbye.", 0.0, 0.0)
+        
+        return {
+            "transcript_id": transcript_id,
+            "turns": turns,
+            "events": events,
+            "metadata": {
+                "num_turns": len(turns),
+                "duration": round(timestamp, 2),
+                "has_event": len(events) > 0
+            }
+        }
+
+
+def shard_path(output_dir: Path, shard_index: int, config: Dict[str, Any]) -> Path:
+    """Output file of a shard"""
+    suffix = '.parquet' if config['format'] == 'parquet' else '.jsonl'
+    if config['format'] == 'jsonl' and config['compression'] == 'gzip':
+        suffix += '.gz'
+    return output_dir / f"transcripts-{shard_index:05d}{suffix}"
+
+
+def write_shard(
+    shard_index: int,
+    start: int,
+    count: int,
+    output_dir: str,
+    config: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Generate and write one shard, streaming transcripts to disk.
+    
+    The shard's random generator depends only on the seed and shard index,
+    so output is identical for any number of workers. The file is written
+    under a temporary name and renamed when complete.
+    
+    Returns:
+        Shard statistics
+    """
+    path = shard_path(Path(output_dir), shard_index, config)
+    tmp_path = path.with_name(path.name + '.tmp')
+    factory = TranscriptFactory(config, random.Random(f"{config['seed']}-{shard_index}"))
+    id_width = len(str(config['num_transcripts']))
+    
+    stats = {'shard': path.name, 'transcripts': count, 'turns': 0, 'events': {}}
+    
+    def transcripts():
+        for i in range(start, start + count):
+            transcript = factory.generate(f"call_{i + 1:0{id_width}d}")
+            stats['turns'] += len(transcript['turns'])
+            for event in transcript['events']:
+                stats['events'][event['event_type']] = stats['events'].get(event['event_type'], 0) + 1
+            yield transcript
+    
+    if config['format'] == 'parquet':
+        _write_parquet(tmp_path, transcripts(), config['row_group_size'])
+    else:
+        if config['compression'] == 'gzip':
+            # Fixed header timestamp so identical runs give identical files
+            raw = gzip.GzipFile(tmp_path, 'wb', mtime=0)
+            f = io.TextIOWrapper(raw, encoding='utf-8')
+        else:
+            f = open(tmp_path, 'w', encoding='utf-8')
+        with f:
+            for transcript in transcripts():
+                f.write(json.dumps(transcript, ensure_ascii=False) + '\n')
+    
+    os.replace(tmp_path, path)
+    return stats
+
+
+def _write_parquet(path: Path, transcripts, row_group_size: int):
+    """Write transcripts to Parquet one row group at a time"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet output requires the pyarrow package")
+    
+    # One explicit schema for every row group and shard (inference would
+    # type an all-empty events column as list<null>)
+    schema = pa.schema([
+        ('transcript_id', pa.string()),
+        ('turns', pa.list_(pa.struct([
+            ('turn_id', pa.int64()),
+            ('speaker', pa.string()),
+            ('text', pa.string()),
+            ('timestamp', pa.float64())
+        ]))),
+        ('events', pa.list_(pa.struct([
+            ('event_type', pa.string()),
+            ('event_label', pa.string()),
+            ('turn_id', pa.int64()),
+            ('timestamp', pa.float64())
+        ]))),
+        ('metadata', pa.struct([
+            ('num_turns', pa.int64()),
+            ('duration', pa.float64()),
+            ('has_event', pa.bool_())
+        ]))
+    ])
+    
+    batch = []
+    with pq.ParquetWriter(str(path), schema, compression='zstd') as writer:
+        for transcript in transcripts:
+            batch.append(transcript)
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch = []
+        
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+
+def plan_shards(num_transcripts: int, shard_size: int) -> List[Tuple[int, int, int]]:
+    """(shard index, first transcript, transcript count) of every shard"""
+    return [
+        (shard_index, start, min(shard_size, num_transcripts - start))
+        for shard_index, start in enumerate(range(0, num_transcripts, shard_size))
+    ]
+
+
+def parse_event_mix(value: str) -> Dict[str, float]:
+    """Parse 'escalation=0.4,refund=0.3,churn=0.3' into normalized weights"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in EVENT_TRIGGERS:
+            raise ValueError(f"Unsupported event type: {name}")
+        mix[name] = float(weight)
+    
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Event mix weights must sum to a positive value")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def main():
+    """Generate a sharded synthetic corpus"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generate a sharded synthetic transcript corpus")
+    parser.add_argument("--num-transcripts", type=int, default=1_000_000, help="Number of transcripts")
+    parser.add_argument("--output", type=str, default="data/raw/corpus", help="Output directory for shards")
+    parser.add_argument("--format", type=str, default="jsonl", choices=SUPPORTED_FORMATS, help="Shard file format")
+    parser.add_argument("--compression", type=str, default="none", choices=['none', 'gzip'], help="Compression of JSONL shards")
+    parser.add_argument("--shard-size", type=int, default=100_000, help="Transcripts per shard")
+    parser.add_argument("--row-group-size", type=int, default=10_000, help="Transcripts per Parquet row group")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed, same corpus)")
+    parser.add_argument("--min-turns", type=int, default=5, help="Minimum turns after the opening")
+    parser.add_argument("--max-turns", type=int, default=15, help="Maximum turns after the opening")
+    parser.add_argument("--event-rate", type=float, default=0.3, help="Share of transcripts with an event")
+    parser.add_argument(
+        "--event-mix",
+        type=str,
+        default="escalation=0.4,refund=0.3,churn=0.3",
+        help="Relative frequency of event types"
+    )
+    parser.add_argument("--frustration-rate", type=float, default=0.2, help="Chance of a frustrated customer turn in event transcripts")
+    parser.add_argument("--filler-words", type=float, default=0.0, help="Mean filler words appended to each turn")
+    parser.add_argument("--vocab-size", type=int, default=5000, help="Filler vocabulary size")
+    parser.add_argument("--zipf-exponent", type=float, default=1.1, help="Zipf exponent of filler word frequencies")
+    parser.add_argument("--overwrite", action="store_true", help="Regenerate shards that already exist")
+    
+    args = parser.parse_args()
+    
+    if args.min_turns > args.max_turns:
+        parser.error("--min-turns must not exceed --max-turns")
+    if args.vocab_size > max_vocabulary_size():
+        parser.error(f"--vocab-size must not exceed {max_vocabulary_size()}")
+    if args.compression != 'none' and args.format != 'jsonl':
+        parser.error("--compression applies to JSONL shards only (Parquet shards use zstd)")
+    if args.format == 'parquet':
+        try:
+            import pyarrow
+        except ImportError:
+            parser.error("Parquet output requires the pyarrow package")
+    
+    config = {
+        'num_transcripts': args.num_transcripts,
+        'shard_size': args.shard_size,
+        'format': args.format,
+        'compression': args.compression,
+        'row_group_size': args.row_group_size,
+        'seed': args.seed,
+        'min_turns': args.min_turns,
+        'max_turns': args.max_turns,
+        'event_rate': args.event_rate,
+        'event_mix': parse_event_mix(args.event_mix),
+        'frustration_rate': args.frustration_rate,
+        'filler_words': args.filler_words,
+        'vocab_size': args.vocab_size,
+        'zipf_exponent': args.zipf_exponent
+    }
+    
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Existing shards are only reused when they were generated with the same
+    # settings (the manifest is written before any shard)
+    manifest_path = output_dir / "_manifest.json"
+    if manifest_path.exists() and not args.overwrite:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous_config = json.load(f).get('config')
+        if previous_config != json.loads(json.dumps(config)):
+            parser.error(
+                f"{output_dir} holds a corpus generated with different settings; "
+                f"use --overwrite or another --output directory"
+            )
+    
+    shards = plan_shards(args.num_transcripts, args.shard_size)
+    shard_names = [shard_path(output_dir, shard_index, config).name for shard_index, _, _ in shards]
+    
+    def write_manifest(stats: List[Dict[str, Any]]):
+        # Corpus settings and the shards generated by this run
+        # (underscore-prefixed, so transcript loaders skip it)
+        manifest = {
+            'generated_at': datetime.now().isoformat(),
+            'config': config,
+            'shards': shard_names,
+            'generated_shards': sorted(stats, key=lambda s: s['shard'])
+        }
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+    
+    write_manifest([])
+    pending = [
+        shard for shard in shards
+        if args.overwrite or not shard_path(output_dir, shard[0], config).exists()
+    ]
+    
+    print(f"Generating {args.num_transcripts} transcripts in {len(shards)} shards "
+          f"({len(shards) - len(pending)} already written) with {args.workers} workers...")
+    
+    start_time = time.time()
+    stats = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [
+            executor.submit(write_shard, shard_index, start, count, str(output_dir), config)
+            for shard_index, start, count in pending
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            shard_stats = future.result()
+            stats.append(shard_stats)
+            elapsed = time.time() - start_time
+            written = sum(s['transcripts'] for s in stats)
+            print(f"  [{done}/{len(pending)}] {shard_stats['shard']} "
+                  f"({written / max(elapsed, 1e-9):,.0f} transcripts/s)")
+    
+    write_manifest(stats)
+    
+    total_turns = sum(s['turns'] for s in stats)
+    event_counts: Dict[str, int] = {}
+    for shard_stats in stats:
+        for event_type, count in shard_stats['events'].items():
+            event_counts[event_type] = event_counts.get(event_type, 0) + count
+    
+    elapsed = time.time() - start_time
+    print(f"\n✓ Generation complete in {elapsed:.1f}s")
+    print(f"\nStatistics (shards generated this run):")
+    print(f"  Transcripts: {sum(s['transcripts'] for s in stats)}")
+    print(f"  Turns: {total_turns}")
+    for event_type in EVENT_TRIGGERS:
+        print(f"  {event_type.capitalize()} events: {event_counts.get(event_type, 0)}")
+    print(f"\nShards saved to: {output_dir}")
+    print(f"Manifest: {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
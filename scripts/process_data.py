@@ -10,6 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.data_processing.pipeline import DataProcessingPipeline
+from src.system import _get_vector_index_options
 
 
 def main():
@@ -20,7 +21,6 @@ def main():
     parser.add_argument(
         "--input",
         type=str,
-        required=True,
         help="Input directory containing transcript files"
     )
     parser.add_argument(
@@ -33,35 +33,66 @@ def main():
         "--pattern",
         type=str,
         default="*.json",
-        help="File pattern to match (default: *.json)"
+        help="File pattern to match (default: *.json; e.g. '*.jsonl.gz' for sharded corpora)"
+    )
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=1,
+        help="Processes decompressing and parsing input files (default: 1)"
     )
     parser.add_argument(
         "--index",
         action="store_true",
         help="Index spans to vector database"
     )
+    parser.add_argument(
+        "--reembed",
+        action="store_true",
+        help="Re-embed existing Chroma collections with the configured embedding model (stop the API first)"
+    )
     
     args = parser.parse_args()
     
+    if not args.input and not args.reembed:
+        parser.error("--input is required unless --reembed is given")
+    
+    # Same vector store settings as the API, so indexing and re-embedding
+    # write what the API reads
     print(f"Initializing data processing pipeline...")
     pipeline = DataProcessingPipeline(
-        vector_db_path=os.getenv("VECTOR_DB_PATH", "./data/processed/vector_db")
+        vector_db_path=os.getenv("VECTOR_DB_PATH", "./data/processed/vector_db"),
+        embedding_model=os.getenv("DEFAULT_EMBEDDING_MODEL", "all-MiniLM-L6-v2"),
+        vector_db_type=os.getenv("VECTOR_DB_TYPE", "chromadb"),
+        vector_index_options={
+            **_get_vector_index_options(),
+            'reembed': args.reembed,
+            'keyword_index': os.getenv("RETRIEVAL_MODE", "dense") == "hybrid"
+        }
     )
     
+    if args.reembed:
+        pipeline.vector_store.reembed_collections()
+        print(f"Collections embedded with {pipeline.vector_store.embedding_model_name}")
+        if not args.input:
+            return
+    
     print(f"Processing transcripts from: {args.input}")
     print(f"Output directory: {args.output}")
     print(f"File pattern: {args.pattern}")
     print(f"Index to vector DB: {args.index}")
     
-    # Process batch
-    processed = pipeline.process_batch(
-        input_directory=args.input,
+    # Stream the batch; processed transcripts are written out, not kept
+    num_processed = 0
+    for _ in pipeline.iter_processed(
+        str(Path(args.input) / args.pattern),
         output_directory=args.output,
-        file_pattern=args.pattern,
-        index_to_vector_db=args.index
-    )
+        index_to_vector_db=args.index,
+        load_workers=args.load_workers
+    ):
+        num_processed += 1
     
-    print(f"\nProcessed {len(processed)} transcripts")
+    print(f"\nProcessed {num_processed} transcripts")
     print(f"Processed transcripts saved to: {args.output}")
 
 
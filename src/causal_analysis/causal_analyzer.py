@@ -6,6 +6,7 @@ from typing import List, Dict, Any, Optional
 from .pattern_detector import CausalPatternDetector
 from .evidence_scorer import EvidenceScorer
 from ..retrieval.span_extractor import SpanExtractor
+from ..data_processing.turn_index import TurnIndex
 
 
 class CausalAnalyzer:
@@ -16,7 +17,8 @@ class CausalAnalyzer:
         relevance_weight: float = 0.4,
         temporal_weight: float = 0.3,
         pattern_weight: float = 0.2,
-        similarity_weight: float = 0.1
+        similarity_weight: float = 0.1,
+        turn_index: Optional[TurnIndex] = None
     ):
         self.pattern_detector = CausalPatternDetector()
         self.evidence_scorer = EvidenceScorer(
@@ -25,7 +27,7 @@ class CausalAnalyzer:
             pattern_weight=pattern_weight,
             similarity_weight=similarity_weight
         )
-        self.span_extractor = SpanExtractor()
+        self.span_extractor = SpanExtractor(turn_index=turn_index)
     
     def analyze_causal_spans(
         self,
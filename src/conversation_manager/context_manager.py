@@ -2,77 +2,58 @@
 Conversation context management for multi-turn dialogues
 """
 
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, field
-from datetime import datetime
+from typing import Dict, Any, Optional
 import uuid
+from .conversation import ConversationTurn, ConversationContext
+from .conversation_store import ConversationStore, InMemoryConversationStore
+from .evidence_cache import EvidenceCache, EvidenceSet
+from .followup_detector import FollowUpDetector
 
 
-@dataclass
-class ConversationTurn:
-    """Represents a single turn in a conversation"""
-    turn_id: str
-    query: str
-    response: str
-    timestamp: datetime = field(default_factory=datetime.now)
-    metadata: Dict[str, Any] = field(default_factory=dict)
-
-
-@dataclass
-class ConversationContext:
-    """Manages context for a conversation session"""
-    conversation_id: str
-    turns: List[ConversationTurn] = field(default_factory=list)
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    
-    def add_turn(self, query: str, response: str, metadata: Optional[Dict[str, Any]] = None):
-        """Add a turn to the conversation"""
-        turn = ConversationTurn(
-            turn_id=str(uuid.uuid4()),
-            query=query,
-            response=response,
-            metadata=metadata or {}
-        )
-        self.turns.append(turn)
-        self.updated_at = datetime.now()
+class ContextManager:
+    """
+    Manage conversation contexts across sessions.
     
-    def get_recent_turns(self, n: int = 3) -> List[ConversationTurn]:
-        """Get the most recent n turns"""
-        return self.turns[-n:] if len(self.turns) > n else self.turns
+    Conversations live in a pluggable ConversationStore. The default
+    in-memory store is bounded (LRU, TTL and byte budget); SQLite and Redis
+    stores share state between worker processes.
     
-    def get_context_summary(self) -> str:
-        """Get a summary of the conversation context"""
-        if not self.turns:
-            return ""
-        
-        summary_parts = []
-        for turn in self.get_recent_turns(3):
-            summary_parts.append(f"Q: {turn.query}")
-            summary_parts.append(f"A: {turn.response[:200]}...")  # Truncate
-        
-        return "\n".join(summary_parts)
-
-
-class ContextManager:
-    """Manage conversation contexts across sessions"""
+    Methods that read a conversation accept one the caller already loaded,
+    so a request costs a single store read (plus the append of its turn).
+    """
     
-    def __init__(self, max_context_length: int = 4000):
-        self.conversations: Dict[str, ConversationContext] = {}
+    def __init__(
+        self,
+        max_context_length: int = 4000,
+        max_conversations: int = 10000,
+        max_turns_per_conversation: int = 20,
+        max_total_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 3600,
+        sweep_interval: Optional[float] = 60,
+        store: Optional[ConversationStore] = None,
+        evidence_cache_size: int = 1000,
+        followup_detector: Optional[FollowUpDetector] = None
+    ):
         self.max_context_length = max_context_length
+        self.store = store or InMemoryConversationStore(
+            max_conversations=max_conversations,
+            max_turns_per_conversation=max_turns_per_conversation,
+            max_total_bytes=max_total_bytes,
+            ttl_seconds=ttl_seconds,
+            sweep_interval=sweep_interval
+        )
+        
+        # Evidence of each conversation's last turn, reused by follow-ups
+        self.evidence_cache = EvidenceCache(max_conversations=evidence_cache_size)
+        self.followup_detector = followup_detector or FollowUpDetector()
     
     def get_or_create_conversation(self, conversation_id: Optional[str] = None) -> ConversationContext:
         """Get existing conversation or create a new one"""
         if conversation_id is None:
-            conversation_id = str(uuid.uuid4())
+            # A fresh ID cannot exist yet
+            return self.store.create(str(uuid.uuid4()))
         
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = ConversationContext(
-                conversation_id=conversation_id
-            )
-        
-        return self.conversations[conversation_id]
+        return self.store.get(conversation_id) or self.store.create(conversation_id)
     
     def add_turn(
         self,
@@ -82,62 +63,75 @@ class ContextManager:
         metadata: Optional[Dict[str, Any]] = None
     ):
         """Add a turn to a conversation"""
-        conversation = self.get_or_create_conversation(conversation_id)
-        conversation.add_turn(query, response, metadata)
+        turn = ConversationTurn.from_metadata(query, response, metadata)
+        self.store.append_turn(conversation_id, turn)
     
     def get_context(self, conversation_id: str) -> Optional[ConversationContext]:
         """Get conversation context"""
-        return self.conversations.get(conversation_id)
+        return self.store.get(conversation_id)
     
-    def get_context_summary(self, conversation_id: str) -> str:
-        """Get context summary for a conversation"""
-        conversation = self.get_or_create_conversation(conversation_id)
-        return conversation.get_context_summary()
+    def get_context_summary(
+        self,
+        conversation_id: str,
+        conversation: Optional[ConversationContext] = None
+    ) -> str:
+        """
+        Get context summary for a conversation, capped at max_context_length.
+        
+        Args:
+            conversation_id: Conversation ID
+            conversation: The conversation, if the caller already loaded it
+        """
+        conversation = conversation or self.get_or_create_conversation(conversation_id)
+        return conversation.get_context_summary(max_length=self.max_context_length)
     
     def clear_conversation(self, conversation_id: str):
         """Clear a conversation"""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        self.store.delete(conversation_id)
+        self.evidence_cache.invalidate(conversation_id)
+    
+    def get_evidence(self, conversation_id: str) -> Optional[EvidenceSet]:
+        """Get the cached evidence of the conversation's previous turn"""
+        return self.evidence_cache.get(conversation_id)
+    
+    def set_evidence(self, conversation_id: str, evidence: EvidenceSet):
+        """Cache the evidence shown in the conversation's latest turn"""
+        self.evidence_cache.put(conversation_id, evidence)
+    
+    def sweep(self) -> int:
+        """Expire idle conversations; returns the number removed"""
+        return self.store.sweep()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get conversation store and evidence cache statistics"""
+        return {
+            **self.store.get_stats(),
+            'evidence_cache': self.evidence_cache.get_stats()
+        }
+    
+    def close(self):
+        """Release the conversation store"""
+        self.store.close()
     
-    def is_followup(self, query: str, conversation_id: str) -> bool:
+    def is_followup(
+        self,
+        query: str,
+        conversation_id: str,
+        conversation: Optional[ConversationContext] = None
+    ) -> bool:
         """
         Determine if a query is a follow-up to previous conversation.
         
         Args:
             query: Current query text
             conversation_id: Conversation ID
+            conversation: The conversation, if the caller already loaded it
         
         Returns:
             True if query appears to be a follow-up
         """
-        conversation = self.get_context(conversation_id)
+        conversation = conversation or self.get_context(conversation_id)
         if not conversation or not conversation.turns:
             return False
         
-        # Check for follow-up indicators
-        followup_indicators = [
-            'also', 'additionally', 'furthermore', 'moreover',
-            'what about', 'how about', 'tell me more', 'can you',
-            'what else', 'another', 'other', 'different',
-            'it', 'that', 'this', 'these', 'those', 'they'
-        ]
-        
-        query_lower = query.lower()
-        
-        # Check for explicit follow-up indicators
-        for indicator in followup_indicators:
-            if indicator in query_lower:
-                return True
-        
-        # Check for pronouns (likely referring to previous context)
-        pronouns = ['it', 'that', 'this', 'these', 'those', 'they', 'them']
-        query_words = query_lower.split()
-        if any(word in pronouns for word in query_words):
-            return True
-        
-        # Check query length (short queries are often follow-ups)
-        if len(query.split()) < 5:
-            return True
-        
-        return False
-
+        return self.followup_detector.detect(query)
@@ -0,0 +1,154 @@
+"""
+Conversation turn and context data structures
+"""
+
+import sys
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field
+
+# __slots__ dataclasses need Python 3.10+; older interpreters get regular ones
+SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Approximate per-turn overhead (object, typed fields) on top of the text bytes
+TURN_OVERHEAD_BYTES = 128
+
+# Turn metadata keys stored as typed fields rather than in the extra dict
+TYPED_METADATA_FIELDS = ('is_followup', 'event_type', 'evidence_count')
+
+
+@dataclass(**SLOTS)
+class ConversationTurn:
+    """
+    Represents a single turn in a conversation.
+    
+    Commonly used metadata is stored in typed fields (event types are
+    interned, so millions of turns share a handful of strings); anything
+    else goes into `extra`, which stays None when unused. Turn IDs are
+    per-conversation sequence numbers assigned on append.
+    """
+    query: str
+    response: str
+    turn_id: int = 0
+    timestamp: float = field(default_factory=time.time)
+    is_followup: bool = False
+    event_type: Optional[str] = None
+    evidence_count: int = 0
+    extra: Optional[Dict[str, Any]] = None
+    
+    @classmethod
+    def from_metadata(
+        cls,
+        query: str,
+        response: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        turn_id: int = 0,
+        timestamp: Optional[float] = None
+    ) -> "ConversationTurn":
+        """Build a turn from a free-form metadata dictionary"""
+        metadata = metadata or {}
+        event_type = metadata.get('event_type')
+        extra = {
+            key: value for key, value in metadata.items()
+            if key not in TYPED_METADATA_FIELDS
+        }
+        
+        return cls(
+            query=query,
+            response=response,
+            turn_id=turn_id,
+            timestamp=time.time() if timestamp is None else timestamp,
+            is_followup=bool(metadata.get('is_followup', False)),
+            event_type=sys.intern(event_type) if event_type else None,
+            evidence_count=int(metadata.get('evidence_count', 0) or 0),
+            extra=extra or None
+        )
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Turn metadata as a dictionary"""
+        metadata = {
+            'is_followup': self.is_followup,
+            'event_type': self.event_type,
+            'evidence_count': self.evidence_count
+        }
+        if self.extra:
+            metadata.update(self.extra)
+        return metadata
+
+
+@dataclass(**SLOTS)
+class ConversationContext:
+    """Manages context for a conversation session"""
+    conversation_id: str
+    turns: List[ConversationTurn] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    max_turns: Optional[int] = None
+    size_bytes: int = 0
+    next_turn_id: int = 0
+    _summary_cache: Optional[Tuple[Optional[int], str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    
+    def add_turn(self, query: str, response: str, metadata: Optional[Dict[str, Any]] = None):
+        """Add a turn to the conversation"""
+        self.append_turn(ConversationTurn.from_metadata(query, response, metadata))
+    
+    def append_turn(self, turn: ConversationTurn):
+        """Append a turn, assigning its ID and dropping the oldest beyond max_turns"""
+        turn.turn_id = self.next_turn_id
+        self.next_turn_id += 1
+        
+        self.turns.append(turn)
+        self.size_bytes += turn_size(turn)
+        self.updated_at = time.time()
+        self._summary_cache = None
+        
+        if self.max_turns is not None and len(self.turns) > self.max_turns:
+            dropped = self.turns[:-self.max_turns]
+            del self.turns[:-self.max_turns]
+            self.size_bytes -= sum(turn_size(t) for t in dropped)
+    
+    def get_recent_turns(self, n: int = 3) -> List[ConversationTurn]:
+        """Get the most recent n turns"""
+        return self.turns[-n:] if len(self.turns) > n else self.turns
+    
+    def get_context_summary(self, max_length: Optional[int] = None) -> str:
+        """
+        Get a summary of the conversation context.
+        
+        The summary is cached until the next turn is added.
+        
+        Args:
+            max_length: Optional character budget; the most recent turns are kept
+        
+        Returns:
+            Summary of the recent turns
+        """
+        if self._summary_cache is not None and self._summary_cache[0] == max_length:
+            return self._summary_cache[1]
+        
+        if not self.turns:
+            return ""
+        
+        summary_parts = []
+        for turn in self.get_recent_turns(3):
+            summary_parts.append(f"Q: {turn.query}")
+            summary_parts.append(f"A: {turn.response[:200]}...")  # Truncate
+        
+        summary = "\n".join(summary_parts)
+        if max_length is not None and len(summary) > max_length:
+            summary = summary[-max_length:]
+        
+        self._summary_cache = (max_length, summary)
+        return summary
+
+
+def turn_size(turn: ConversationTurn) -> int:
+    """Approximate resident size of a turn in bytes"""
+    size = len(turn.query.encode('utf-8')) + len(turn.response.encode('utf-8')) + TURN_OVERHEAD_BYTES
+    if turn.extra:
+        size += sum(len(str(key)) + len(str(value)) for key, value in turn.extra.items())
+    return size
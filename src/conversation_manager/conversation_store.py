@@ -0,0 +1,570 @@
+"""
+Storage backends for conversation contexts
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from .conversation import ConversationTurn, ConversationContext
+
+
+def serialize_turn(turn: ConversationTurn) -> str:
+    """
+    Serialize a turn as a compact JSON array.
+    
+    Turn IDs are not stored; stores derive them from the turn's position.
+    """
+    return json.dumps(
+        [
+            turn.query,
+            turn.response,
+            turn.timestamp,
+            int(turn.is_followup),
+            turn.event_type,
+            turn.evidence_count,
+            turn.extra
+        ],
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+
+
+def deserialize_turn(data: str, turn_id: int = 0) -> ConversationTurn:
+    """Rebuild a turn from serialize_turn output"""
+    query, response, timestamp, is_followup, event_type, evidence_count, extra = json.loads(data)
+    return ConversationTurn(
+        query=query,
+        response=response,
+        turn_id=turn_id,
+        timestamp=timestamp,
+        is_followup=bool(is_followup),
+        event_type=sys.intern(event_type) if event_type else None,
+        evidence_count=evidence_count,
+        extra=extra
+    )
+
+
+class ConversationStore:
+    """
+    Interface for conversation storage backends.
+    
+    Backends own retention (turn caps, TTL, eviction). Turns are appended
+    through the store rather than by mutating a loaded context, so
+    out-of-process backends see every write.
+    """
+    
+    def get(self, conversation_id: str) -> Optional[ConversationContext]:
+        """Load a conversation with its retained turns"""
+        raise NotImplementedError
+    
+    def create(self, conversation_id: str) -> ConversationContext:
+        """Create an empty conversation (or return the existing one)"""
+        raise NotImplementedError
+    
+    def append_turns(self, conversation_id: str, turns: List[ConversationTurn]):
+        """Append turns to a conversation, creating it if needed"""
+        raise NotImplementedError
+    
+    def append_turn(self, conversation_id: str, turn: ConversationTurn):
+        """Append a single turn to a conversation"""
+        self.append_turns(conversation_id, [turn])
+    
+    def delete(self, conversation_id: str):
+        """Delete a conversation"""
+        raise NotImplementedError
+    
+    def sweep(self) -> int:
+        """Expire idle conversations; returns the number removed"""
+        return 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backend statistics"""
+        return {}
+    
+    def close(self):
+        """Release background threads and connections"""
+        pass
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    Process-local store with LRU, TTL and memory caps.
+    
+    Conversations are kept in LRU order and evicted when the conversation
+    count or the approximate byte budget is exceeded, or after ttl_seconds
+    without access. A daemon thread sweeps expired conversations every
+    sweep_interval seconds.
+    """
+    
+    def __init__(
+        self,
+        max_conversations: int = 10000,
+        max_turns_per_conversation: int = 20,
+        max_total_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 3600,
+        sweep_interval: Optional[float] = 60
+    ):
+        self.conversations: Dict[str, ConversationContext] = OrderedDict()
+        self.max_conversations = max_conversations
+        self.max_turns_per_conversation = max_turns_per_conversation
+        self.max_total_bytes = max_total_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        
+        self.resident_bytes = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions_lru': 0,
+            'evictions_memory': 0,
+            'evictions_ttl': 0
+        }
+        
+        self._last_access: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._sweeper = None
+        
+        if ttl_seconds and sweep_interval:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop,
+                name="conversation-store-sweeper",
+                daemon=True
+            )
+            self._sweeper.start()
+    
+    def get(self, conversation_id: str) -> Optional[ConversationContext]:
+        with self._lock:
+            return self._get(conversation_id)
+    
+    def create(self, conversation_id: str) -> ConversationContext:
+        with self._lock:
+            conversation = self._get(conversation_id)
+            if conversation is None:
+                conversation = ConversationContext(
+                    conversation_id=conversation_id,
+                    max_turns=self.max_turns_per_conversation
+                )
+                self.conversations[conversation_id] = conversation
+                self._last_access[conversation_id] = time.monotonic()
+                self._evict(keep=conversation_id)
+            
+            return conversation
+    
+    def append_turns(self, conversation_id: str, turns: List[ConversationTurn]):
+        with self._lock:
+            conversation = self.create(conversation_id)
+            size_before = conversation.size_bytes
+            for turn in turns:
+                conversation.append_turn(turn)
+            self.resident_bytes += conversation.size_bytes - size_before
+            self._evict(keep=conversation_id)
+    
+    def delete(self, conversation_id: str):
+        with self._lock:
+            if conversation_id in self.conversations:
+                self._remove(conversation_id)
+    
+    def sweep(self) -> int:
+        if not self.ttl_seconds:
+            return 0
+        
+        cutoff = time.monotonic() - self.ttl_seconds
+        evicted = 0
+        
+        with self._lock:
+            # LRU order: stop at the first conversation that is still fresh
+            while self.conversations:
+                conversation_id = next(iter(self.conversations))
+                if self._last_access.get(conversation_id, 0.0) > cutoff:
+                    break
+                self._remove(conversation_id)
+                evicted += 1
+            
+            self.stats['evictions_ttl'] += evicted
+        
+        return evicted
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'conversations': len(self.conversations),
+                'turns': sum(len(c.turns) for c in self.conversations.values()),
+                'resident_bytes': self.resident_bytes,
+                'max_total_bytes': self.max_total_bytes,
+                'max_conversations': self.max_conversations,
+                **self.stats
+            }
+    
+    def close(self):
+        self._stop_event.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1.0)
+            self._sweeper = None
+    
+    def _get(self, conversation_id: str) -> Optional[ConversationContext]:
+        """Look up a conversation, refreshing its LRU position (caller holds the lock)"""
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            self.stats['misses'] += 1
+            return None
+        
+        now = time.monotonic()
+        if self.ttl_seconds and now - self._last_access.get(conversation_id, now) > self.ttl_seconds:
+            self._remove(conversation_id)
+            self.stats['evictions_ttl'] += 1
+            self.stats['misses'] += 1
+            return None
+        
+        self.conversations.move_to_end(conversation_id)
+        self._last_access[conversation_id] = now
+        self.stats['hits'] += 1
+        return conversation
+    
+    def _remove(self, conversation_id: str):
+        """Drop a conversation and its accounting (caller holds the lock)"""
+        conversation = self.conversations.pop(conversation_id)
+        self._last_access.pop(conversation_id, None)
+        self.resident_bytes -= conversation.size_bytes
+    
+    def _evict(self, keep: Optional[str] = None):
+        """Evict least recently used conversations over the caps (caller holds the lock)"""
+        while len(self.conversations) > self.max_conversations or (
+            self.resident_bytes > self.max_total_bytes and len(self.conversations) > 1
+        ):
+            conversation_id = next(iter(self.conversations))
+            if conversation_id == keep:
+                break
+            
+            if len(self.conversations) > self.max_conversations:
+                self.stats['evictions_lru'] += 1
+            else:
+                self.stats['evictions_memory'] += 1
+            self._remove(conversation_id)
+    
+    def _sweep_loop(self):
+        """Background loop expiring idle conversations"""
+        while not self._stop_event.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping conversations: {e}")
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    Conversation store in a SQLite database in WAL mode.
+    
+    Safe to share between worker processes on one host: WAL lets readers
+    proceed alongside a writer. Each conversation load is one indexed
+    range scan over its most recent turns, and each append (insert, trim
+    and touch) runs in a single transaction.
+    """
+    
+    def __init__(
+        self,
+        db_path: str = "./data/processed/conversations.sqlite",
+        max_turns_per_conversation: int = 20,
+        ttl_seconds: Optional[float] = 3600
+    ):
+        self.db_path = db_path
+        self.max_turns_per_conversation = max_turns_per_conversation
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        conn = self._connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                conversation_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                metadata TEXT NOT NULL DEFAULT '{}'
+            );
+            CREATE TABLE IF NOT EXISTS turns (
+                conversation_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (conversation_id, seq)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_conversations_updated_at
+                ON conversations (updated_at);
+        """)
+        conn.commit()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, conversation_id: str) -> Optional[ConversationContext]:
+        conn = self._connection()
+        
+        row = conn.execute(
+            "SELECT created_at, updated_at, metadata FROM conversations WHERE conversation_id = ?",
+            (conversation_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        created_at, updated_at, metadata = row
+        if self.ttl_seconds and time.time() - updated_at > self.ttl_seconds:
+            return None
+        
+        turn_rows = conn.execute(
+            "SELECT seq, data FROM turns WHERE conversation_id = ? ORDER BY seq DESC LIMIT ?",
+            (conversation_id, self.max_turns_per_conversation)
+        ).fetchall()
+        
+        return ConversationContext(
+            conversation_id=conversation_id,
+            turns=[deserialize_turn(data, turn_id=seq) for seq, data in reversed(turn_rows)],
+            created_at=created_at,
+            updated_at=updated_at,
+            metadata=json.loads(metadata),
+            max_turns=self.max_turns_per_conversation,
+            next_turn_id=turn_rows[0][0] + 1 if turn_rows else 0
+        )
+    
+    def create(self, conversation_id: str) -> ConversationContext:
+        conn = self._connection()
+        now = time.time()
+        
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO conversations (conversation_id, created_at, updated_at) VALUES (?, ?, ?)",
+                (conversation_id, now, now)
+            )
+        
+        return self.get(conversation_id) or ConversationContext(
+            conversation_id=conversation_id,
+            max_turns=self.max_turns_per_conversation
+        )
+    
+    def append_turns(self, conversation_id: str, turns: List[ConversationTurn]):
+        if not turns:
+            return
+        
+        conn = self._connection()
+        now = time.time()
+        
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO conversations (conversation_id, created_at, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT (conversation_id) DO UPDATE SET updated_at = excluded.updated_at
+                """,
+                (conversation_id, now, now)
+            )
+            
+            (last_seq,) = conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) FROM turns WHERE conversation_id = ?",
+                (conversation_id,)
+            ).fetchone()
+            
+            for i, turn in enumerate(turns):
+                turn.turn_id = last_seq + 1 + i
+            
+            conn.executemany(
+                "INSERT INTO turns (conversation_id, seq, data) VALUES (?, ?, ?)",
+                [(conversation_id, turn.turn_id, serialize_turn(turn)) for turn in turns]
+            )
+            
+            if self.max_turns_per_conversation:
+                conn.execute(
+                    "DELETE FROM turns WHERE conversation_id = ? AND seq <= ?",
+                    (conversation_id, last_seq + len(turns) - self.max_turns_per_conversation)
+                )
+    
+    def delete(self, conversation_id: str):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM turns WHERE conversation_id = ?", (conversation_id,))
+            conn.execute("DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,))
+    
+    def sweep(self) -> int:
+        if not self.ttl_seconds:
+            return 0
+        
+        conn = self._connection()
+        cutoff = time.time() - self.ttl_seconds
+        
+        with conn:
+            conn.execute(
+                """
+                DELETE FROM turns WHERE conversation_id IN (
+                    SELECT conversation_id FROM conversations WHERE updated_at < ?
+                )
+                """,
+                (cutoff,)
+            )
+            cursor = conn.execute("DELETE FROM conversations WHERE updated_at < ?", (cutoff,))
+        
+        return cursor.rowcount
+    
+    def get_stats(self) -> Dict[str, Any]:
+        conn = self._connection()
+        (conversations,) = conn.execute("SELECT COUNT(*) FROM conversations").fetchone()
+        (turns,) = conn.execute("SELECT COUNT(*) FROM turns").fetchone()
+        
+        return {
+            'backend': 'sqlite',
+            'conversations': conversations,
+            'turns': turns,
+            'db_bytes': Path(self.db_path).stat().st_size if Path(self.db_path).exists() else 0
+        }
+    
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisConversationStore(ConversationStore):
+    """
+    Conversation store on a Redis-protocol server.
+    
+    Each conversation is a timestamp hash plus a list of serialized
+    turns. Reads and writes are pipelined into a single round trip, turn
+    lists are trimmed with LTRIM, and TTLs are refreshed on every append.
+    Any client exposing the redis-py API can be injected (for example a
+    local stand-in in tests).
+    """
+    
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        url: str = "redis://localhost:6379/0",
+        key_prefix: str = "crs:conversation:",
+        max_turns_per_conversation: int = 20,
+        ttl_seconds: Optional[float] = 3600
+    ):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("Redis conversation store requires the redis package")
+            client = redis.Redis.from_url(url)
+        
+        self.client = client
+        self.key_prefix = key_prefix
+        self.max_turns_per_conversation = max_turns_per_conversation
+        self.ttl_seconds = ttl_seconds
+    
+    def _keys(self, conversation_id: str):
+        """Metadata and turn-list keys of a conversation"""
+        base = f"{self.key_prefix}{conversation_id}"
+        return f"{base}:meta", f"{base}:turns"
+    
+    def get(self, conversation_id: str) -> Optional[ConversationContext]:
+        meta_key, turns_key = self._keys(conversation_id)
+        
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(meta_key)
+        pipe.lrange(turns_key, -self.max_turns_per_conversation, -1)
+        meta, turn_data = pipe.execute()
+        if not meta:
+            return None
+        
+        meta = {_decode(key): float(value) for key, value in meta.items()}
+        
+        # Turn IDs follow from the number of turns ever appended
+        turn_count = int(meta.get('turn_count', len(turn_data)))
+        first_turn_id = turn_count - len(turn_data)
+        
+        return ConversationContext(
+            conversation_id=conversation_id,
+            turns=[
+                deserialize_turn(_decode(data), turn_id=first_turn_id + i)
+                for i, data in enumerate(turn_data)
+            ],
+            created_at=meta['created_at'],
+            updated_at=meta['updated_at'],
+            max_turns=self.max_turns_per_conversation,
+            next_turn_id=turn_count
+        )
+    
+    def create(self, conversation_id: str) -> ConversationContext:
+        meta_key, _ = self._keys(conversation_id)
+        now = time.time()
+        
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hsetnx(meta_key, 'created_at', now)
+        pipe.hsetnx(meta_key, 'updated_at', now)
+        if self.ttl_seconds:
+            pipe.expire(meta_key, int(self.ttl_seconds))
+        pipe.execute()
+        
+        return self.get(conversation_id) or ConversationContext(
+            conversation_id=conversation_id,
+            max_turns=self.max_turns_per_conversation
+        )
+    
+    def append_turns(self, conversation_id: str, turns: List[ConversationTurn]):
+        if not turns:
+            return
+        
+        meta_key, turns_key = self._keys(conversation_id)
+        now = time.time()
+        
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hsetnx(meta_key, 'created_at', now)
+        pipe.hset(meta_key, 'updated_at', now)
+        pipe.hincrby(meta_key, 'turn_count', len(turns))
+        pipe.rpush(turns_key, *[serialize_turn(turn) for turn in turns])
+        if self.max_turns_per_conversation:
+            pipe.ltrim(turns_key, -self.max_turns_per_conversation, -1)
+        if self.ttl_seconds:
+            pipe.expire(meta_key, int(self.ttl_seconds))
+            pipe.expire(turns_key, int(self.ttl_seconds))
+        pipe.execute()
+    
+    def delete(self, conversation_id: str):
+        self.client.delete(*self._keys(conversation_id))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {'backend': 'redis'}
+    
+    def close(self):
+        close = getattr(self.client, 'close', None)
+        if close is not None:
+            close()
+
+
+def _decode(data: Any) -> str:
+    """Decode a Redis reply that may be bytes"""
+    return data.decode('utf-8') if isinstance(data, bytes) else data
+
+
+def create_conversation_store(backend: str = "memory", **options) -> ConversationStore:
+    """
+    Create a conversation store by backend name.
+    
+    Args:
+        backend: "memory", "sqlite" or "redis"
+        **options: Backend constructor arguments
+    
+    Returns:
+        Conversation store instance
+    """
+    if backend == "memory":
+        return InMemoryConversationStore(**options)
+    elif backend == "sqlite":
+        return SQLiteConversationStore(**options)
+    elif backend == "redis":
+        return RedisConversationStore(**options)
+    else:
+        raise ValueError(f"Unsupported conversation store: {backend}")
@@ -0,0 +1,87 @@
+"""
+Per-conversation cache of the evidence shown in the previous turn
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+import numpy as np
+from .conversation import SLOTS
+
+
+@dataclass(**SLOTS)
+class EvidenceSet:
+    """
+    Evidence spans of a turn with their scores.
+    
+    Normalized embeddings are computed on the first follow-up that ranks
+    the pool (see FollowUpProcessor.get_pool_embeddings), so turns that
+    never get a follow-up cost no encoding. Until then, known_embeddings
+    holds vectors carried over from the previous pool.
+    """
+    span_ids: List[str]
+    spans: List[Dict[str, Any]]
+    scores: List[float]
+    event_type: Optional[str] = None
+    embeddings: Optional[np.ndarray] = None
+    known_embeddings: Optional[Dict[str, np.ndarray]] = None
+    
+    def get_embedding(self, span_id: str) -> Optional[np.ndarray]:
+        """Get the embedding of a span, if already computed"""
+        if self.embeddings is None:
+            return (self.known_embeddings or {}).get(span_id)
+        try:
+            return self.embeddings[self.span_ids.index(span_id)]
+        except ValueError:
+            return None
+
+
+class EvidenceCache:
+    """
+    Process-local LRU of evidence sets keyed by conversation.
+    
+    The cache is an optimization only: a miss (eviction, another worker
+    serving the conversation) falls back to full retrieval.
+    """
+    
+    def __init__(self, max_conversations: int = 1000):
+        self.max_conversations = max_conversations
+        self.entries: Dict[str, EvidenceSet] = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+    
+    def get(self, conversation_id: str) -> Optional[EvidenceSet]:
+        """Get the evidence set of a conversation's previous turn"""
+        with self._lock:
+            evidence = self.entries.get(conversation_id)
+            if evidence is None:
+                self.stats['misses'] += 1
+                return None
+            
+            self.entries.move_to_end(conversation_id)
+            self.stats['hits'] += 1
+            return evidence
+    
+    def put(self, conversation_id: str, evidence: EvidenceSet):
+        """Replace the evidence set of a conversation"""
+        with self._lock:
+            self.entries[conversation_id] = evidence
+            self.entries.move_to_end(conversation_id)
+            
+            while len(self.entries) > self.max_conversations:
+                self.entries.popitem(last=False)
+    
+    def invalidate(self, conversation_id: str):
+        """Drop the evidence set of a conversation"""
+        with self._lock:
+            self.entries.pop(conversation_id, None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counts"""
+        with self._lock:
+            return {
+                'conversations': len(self.entries),
+                'max_conversations': self.max_conversations,
+                **self.stats
+            }
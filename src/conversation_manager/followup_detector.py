@@ -0,0 +1,143 @@
+"""
+Follow-up query detection
+"""
+
+import re
+from typing import List, Optional, Any
+import numpy as np
+
+
+class FollowUpDetector:
+    """
+    Decide whether a query continues the previous conversation.
+    
+    Rules run on precompiled, token-bounded patterns (so "it" no longer
+    matches inside "item" or "credit"):
+        - explicit continuation phrases ("what about", "tell me more", ...)
+        - anaphoric pronouns in short queries ("why did they do that?")
+        - very short queries
+    
+    An optional embedding classifier decides the queries no rule claims.
+    """
+    
+    FOLLOWUP_PHRASES = [
+        'also', 'additionally', 'furthermore', 'moreover',
+        'what about', 'how about', 'tell me more', 'what else',
+        'another', 'elaborate', 'more detail', 'more details'
+    ]
+    
+    PRONOUNS = ['it', 'that', 'this', 'these', 'those', 'they', 'them']
+    
+    FOLLOWUP_PATTERN = re.compile(
+        r"\b(?:" + "|".join(re.escape(p) for p in FOLLOWUP_PHRASES) + r")\b",
+        re.IGNORECASE
+    )
+    
+    PRONOUN_PATTERN = re.compile(
+        r"\b(?:" + "|".join(PRONOUNS) + r")\b",
+        re.IGNORECASE
+    )
+    
+    TOKEN_PATTERN = re.compile(r"\S+")
+    
+    def __init__(
+        self,
+        short_query_tokens: int = 5,
+        pronoun_query_tokens: int = 10,
+        classifier: Optional["EmbeddingFollowUpClassifier"] = None
+    ):
+        self.short_query_tokens = short_query_tokens
+        self.pronoun_query_tokens = pronoun_query_tokens
+        self.classifier = classifier
+    
+    def match_rules(self, query: str) -> Optional[bool]:
+        """
+        Apply the rules to a query.
+        
+        Returns:
+            True if a rule marks it a follow-up, None if no rule applies
+        """
+        if self.FOLLOWUP_PATTERN.search(query):
+            return True
+        
+        num_tokens = len(self.TOKEN_PATTERN.findall(query))
+        if num_tokens < self.short_query_tokens:
+            return True
+        
+        if num_tokens <= self.pronoun_query_tokens and self.PRONOUN_PATTERN.search(query):
+            return True
+        
+        return None
+    
+    def detect(self, query: str) -> bool:
+        """Detect whether a single query is a follow-up"""
+        return self.detect_batch([query])[0]
+    
+    def detect_batch(self, queries: List[str]) -> List[bool]:
+        """
+        Detect follow-ups for a batch of queries.
+        
+        Rules run per query; the remaining queries are embedded and
+        classified in one batch when a classifier is configured.
+        """
+        results = [self.match_rules(query) for query in queries]
+        
+        undecided = [i for i, result in enumerate(results) if result is None]
+        if undecided and self.classifier is not None:
+            predictions = self.classifier.predict([queries[i] for i in undecided])
+            for i, prediction in zip(undecided, predictions):
+                results[i] = bool(prediction)
+        
+        return [bool(result) for result in results]
+
+
+class EmbeddingFollowUpClassifier:
+    """Logistic regression over sentence embeddings of queries"""
+    
+    def __init__(
+        self,
+        embedding_model: Any = "all-MiniLM-L6-v2",
+        threshold: float = 0.5
+    ):
+        if isinstance(embedding_model, str):
+            from sentence_transformers import SentenceTransformer
+            embedding_model = SentenceTransformer(embedding_model)
+        
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+        self.model = None
+    
+    def _embed(self, queries: List[str]) -> np.ndarray:
+        return self.embedding_model.encode(
+            queries,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+    
+    def fit(self, queries: List[str], labels: List[bool]) -> "EmbeddingFollowUpClassifier":
+        """
+        Train on labelled queries.
+        
+        Args:
+            queries: Query texts
+            labels: True for follow-ups, False for standalone queries
+        
+        Returns:
+            The fitted classifier
+        """
+        from sklearn.linear_model import LogisticRegression
+        
+        self.model = LogisticRegression(max_iter=1000)
+        self.model.fit(self._embed(queries), np.asarray(labels, dtype=int))
+        return self
+    
+    def predict_proba(self, queries: List[str]) -> np.ndarray:
+        """Get the follow-up probability of each query"""
+        if self.model is None:
+            raise ValueError("Classifier has not been fitted")
+        return self.model.predict_proba(self._embed(queries))[:, 1]
+    
+    def predict(self, queries: List[str]) -> List[bool]:
+        """Classify queries as follow-ups"""
+        return [bool(p >= self.threshold) for p in self.predict_proba(queries)]
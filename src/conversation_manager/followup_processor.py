@@ -3,7 +3,10 @@ Follow-up question processing for Task 2
 """
 
 from typing import Dict, Any, Optional, List
+import numpy as np
 from .context_manager import ContextManager
+from .conversation import ConversationContext
+from .evidence_cache import EvidenceSet
 from ..query_processing.query_parser import QueryParser
 from ..retrieval.retrieval_pipeline import RetrievalPipeline
 from ..causal_analysis.causal_analyzer import CausalAnalyzer
@@ -18,19 +21,27 @@ class FollowUpProcessor:
         context_manager: ContextManager,
         retrieval_pipeline: RetrievalPipeline,
         causal_analyzer: CausalAnalyzer,
-        explanation_generator: ExplanationGenerator
+        explanation_generator: ExplanationGenerator,
+        reuse_evidence: bool = True,
+        min_pool_similarity: float = 0.3,
+        min_pool_coverage: int = 3
     ):
         self.context_manager = context_manager
         self.query_parser = QueryParser()
         self.retrieval_pipeline = retrieval_pipeline
         self.causal_analyzer = causal_analyzer
         self.explanation_generator = explanation_generator
+        self.reuse_evidence = reuse_evidence
+        self.min_pool_similarity = min_pool_similarity
+        self.min_pool_coverage = min_pool_coverage
     
     def process_followup(
         self,
         query: str,
         conversation_id: str,
-        context: Optional[List[Dict[str, Any]]] = None
+        context: Optional[List[Dict[str, Any]]] = None,
+        is_followup: Optional[bool] = None,
+        conversation: Optional[ConversationContext] = None
     ) -> Dict[str, Any]:
         """
         Process a follow-up query with context from previous conversation.
@@ -39,13 +50,18 @@ class FollowUpProcessor:
             query: Follow-up query text
             conversation_id: Conversation ID for context tracking
             context: Optional explicit context (if not provided, retrieved from conversation)
+            is_followup: Follow-up decision already made by the caller, if any
+            conversation: The conversation, if the caller already loaded it
         
         Returns:
             Dictionary with contextual response and evidence
         """
+        # Load the conversation once; context, follow-up check and summary share it
+        if conversation is None:
+            conversation = self.context_manager.get_context(conversation_id)
+        
         # Get conversation context
         if context is None:
-            conversation = self.context_manager.get_context(conversation_id)
             if conversation:
                 context = [
                     {
@@ -58,22 +74,51 @@ class FollowUpProcessor:
             else:
                 context = []
         
-        # Determine if this is a follow-up
-        is_followup = self.context_manager.is_followup(query, conversation_id)
+        # Determine if this is a follow-up (unless the caller already did)
+        if is_followup is None:
+            is_followup = self.context_manager.is_followup(
+                query, conversation_id, conversation=conversation
+            )
         
-        # Enhance query with context
+        # Enhance query with context (used for parsing and generation)
         enhanced_query = self._enhance_query_with_context(query, context)
         
         # Parse query
         parsed_query = self.query_parser.parse_query(enhanced_query)
         
-        # Retrieve with context
-        retrieved_spans = self.retrieval_pipeline.retrieve_with_context(
-            query=enhanced_query,
-            context=context,
-            top_k=20,
-            rerank_top_k=10
-        )
+        # Context goes into the query vector; retrieval and reranking see
+        # only the short current query
+        query_embedding = self.retrieval_pipeline.embed_with_context(query, context)
+        
+        # Answer from the previous turn's evidence when it covers the query
+        evidence = None
+        retrieved_spans = None
+        if self.reuse_evidence and is_followup:
+            evidence = self.context_manager.get_evidence(conversation_id)
+            event_type = parsed_query.get('event_type')
+            if evidence is not None and not (
+                event_type and evidence.event_type and event_type != evidence.event_type
+            ):
+                retrieved_spans = self.retrieval_pipeline.retrieve_from_pool(
+                    query=query,
+                    spans=evidence.spans,
+                    embeddings=self.get_pool_embeddings(evidence),
+                    rerank_top_k=10,
+                    min_similarity=self.min_pool_similarity,
+                    min_coverage=self.min_pool_coverage,
+                    query_embedding=query_embedding
+                )
+        evidence_reused = retrieved_spans is not None
+        
+        # Otherwise retrieve with context
+        if retrieved_spans is None:
+            retrieved_spans = self.retrieval_pipeline.retrieve_with_context(
+                query=query,
+                context=context,
+                top_k=20,
+                rerank_top_k=10,
+                query_embedding=query_embedding
+            )
         
         # Analyze causal patterns
         analyzed_spans = self.causal_analyzer.analyze_causal_spans(
@@ -84,7 +129,9 @@ class FollowUpProcessor:
         )
         
         # Generate contextual explanation
-        context_summary = self.context_manager.get_context_summary(conversation_id)
+        context_summary = self.context_manager.get_context_summary(
+            conversation_id, conversation=conversation
+        )
         
         explanation_result = self.explanation_generator.llm_generator.generate_with_citations(
             query=enhanced_query,
@@ -103,9 +150,17 @@ class FollowUpProcessor:
             'citations': explanation_result['citations'],
             'evidence_count': len(analyzed_spans),
             'context_used': len(context) > 0,
-            'context_turns': len(context)
+            'context_turns': len(context),
+            'evidence_reused': evidence_reused
         }
         
+        self.cache_evidence(
+            conversation_id,
+            analyzed_spans,
+            event_type=parsed_query.get('event_type'),
+            previous=evidence
+        )
+        
         # Add turn to conversation
         self.context_manager.add_turn(
             conversation_id=conversation_id,
@@ -120,6 +175,65 @@ class FollowUpProcessor:
         
         return response
     
+    def cache_evidence(
+        self,
+        conversation_id: str,
+        spans: List[Dict[str, Any]],
+        event_type: Optional[str] = None,
+        previous: Optional[EvidenceSet] = None
+    ):
+        """
+        Cache the evidence shown for a turn so follow-ups can reuse it.
+        
+        Args:
+            conversation_id: Conversation ID
+            spans: Evidence spans of the turn
+            event_type: Event type the evidence was retrieved for
+            previous: Previous evidence set, whose computed embeddings are reused
+        """
+        if not spans:
+            self.context_manager.evidence_cache.invalidate(conversation_id)
+            return
+        
+        span_ids = [span.get('span_id', '') for span in spans]
+        
+        # Embeddings are computed lazily; keep the vectors the previous pool already has
+        known = {}
+        if previous is not None:
+            for span_id in span_ids:
+                embedding = previous.get_embedding(span_id)
+                if embedding is not None:
+                    known[span_id] = embedding
+        
+        self.context_manager.set_evidence(
+            conversation_id,
+            EvidenceSet(
+                span_ids=span_ids,
+                spans=[dict(span) for span in spans],
+                scores=[
+                    float(span.get('evidence_score', span.get('relevance_score', 0.0)))
+                    for span in spans
+                ],
+                event_type=event_type,
+                known_embeddings=known
+            )
+        )
+    
+    def get_pool_embeddings(self, evidence: EvidenceSet) -> np.ndarray:
+        """
+        Get the embeddings of an evidence pool, computing them on first use.
+        
+        Vectors carried over from the previous pool and vectors stored in
+        the index are reused; only the remaining spans are encoded.
+        """
+        if evidence.embeddings is None:
+            evidence.embeddings = self.retrieval_pipeline.embed_spans(
+                evidence.spans,
+                known=evidence.known_embeddings
+            )
+            evidence.known_embeddings = None
+        return evidence.embeddings
+    
     def _enhance_query_with_context(
         self,
         query: str,
@@ -180,7 +294,8 @@ class FollowUpProcessor:
                 'event_type': result['parsed_query'].get('event_type'),
                 'context_used': result['context_used'],
                 'context_turns': result['context_turns'],
-                'evidence_count': result['evidence_count']
+                'evidence_count': result['evidence_count'],
+                'evidence_reused': result.get('evidence_reused', False)
             }
         }
 
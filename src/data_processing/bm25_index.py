@@ -0,0 +1,170 @@
+"""
+Persistent inverted index for BM25 keyword retrieval over dialogue spans
+"""
+
+import re
+import json
+import math
+import heapq
+from typing import List, Dict, Optional, Collection, Tuple
+from pathlib import Path
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index of span texts.
+    
+    Postings map each term to the spans containing it and the term frequency
+    within each span, so a query only touches the spans that share at least
+    one term with it instead of scoring the whole corpus.
+    """
+    
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+    
+    def __init__(
+        self,
+        index_path: Optional[str] = None,
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+        # Forward map span_id -> distinct terms, so removal only touches that span's postings
+        self.span_terms: Dict[str, List[str]] = {}
+        
+        if index_path and Path(index_path).exists():
+            self.load()
+    
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+    
+    def __contains__(self, span_id: str) -> bool:
+        return span_id in self.doc_lengths
+    
+    def tokenize(self, text: str) -> List[str]:
+        """Lowercase and split text into terms"""
+        return self.TOKEN_PATTERN.findall(text.lower())
+    
+    def add(self, span_id: str, text: str):
+        """Add (or replace) a span in the index"""
+        if span_id in self.doc_lengths:
+            self.remove(span_id)
+        
+        terms = self.tokenize(text)
+        
+        term_freqs: Dict[str, int] = {}
+        for term in terms:
+            term_freqs[term] = term_freqs.get(term, 0) + 1
+        
+        for term, freq in term_freqs.items():
+            self.postings.setdefault(term, {})[span_id] = freq
+        
+        self.span_terms[span_id] = list(term_freqs)
+        self.doc_lengths[span_id] = len(terms)
+        self.total_length += len(terms)
+    
+    def remove(self, span_id: str):
+        """Remove a span from the index"""
+        if span_id not in self.doc_lengths:
+            return
+        
+        for term in self.span_terms.pop(span_id, []):
+            postings = self.postings.get(term)
+            if postings is not None and span_id in postings:
+                del postings[span_id]
+                if not postings:
+                    del self.postings[term]
+        
+        self.total_length -= self.doc_lengths.pop(span_id)
+    
+    def idf(self, term: str) -> float:
+        """Inverse document frequency of a term (non-negative variant)"""
+        num_docs = len(self.doc_lengths)
+        doc_freq = len(self.postings.get(term, {}))
+        return math.log((num_docs - doc_freq + 0.5) / (doc_freq + 0.5) + 1.0)
+    
+    def search(
+        self,
+        query: str,
+        n_results: int = 10,
+        span_ids: Optional[Collection[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Score spans against a query.
+        
+        Args:
+            query: Search query text
+            n_results: Number of results to return
+            span_ids: Optional set of span IDs to restrict results to
+        
+        Returns:
+            List of (span_id, score) tuples, highest score first
+        """
+        if not self.doc_lengths:
+            return []
+        
+        avg_length = self.total_length / len(self.doc_lengths) or 1.0
+        
+        scores: Dict[str, float] = {}
+        for term in set(self.tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            
+            idf = self.idf(term)
+            for span_id, freq in postings.items():
+                if span_ids is not None and span_id not in span_ids:
+                    continue
+                
+                length_norm = 1.0 - self.b + self.b * self.doc_lengths[span_id] / avg_length
+                scores[span_id] = scores.get(span_id, 0.0) + idf * (
+                    freq * (self.k1 + 1.0) / (freq + self.k1 * length_norm)
+                )
+        
+        return heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+    
+    def save(self, index_path: Optional[str] = None):
+        """Persist the index to disk"""
+        index_path = index_path or self.index_path
+        if not index_path:
+            return
+        
+        Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        data = {
+            'postings': self.postings,
+            'doc_lengths': self.doc_lengths
+        }
+        
+        tmp_path = Path(str(index_path) + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        tmp_path.replace(index_path)
+    
+    def load(self, index_path: Optional[str] = None):
+        """Load the index from disk"""
+        index_path = index_path or self.index_path
+        
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        self.postings = data.get('postings', {})
+        self.doc_lengths = data.get('doc_lengths', {})
+        self.total_length = sum(self.doc_lengths.values())
+        
+        # The forward map is not persisted; rebuild it from the postings
+        self.span_terms = {}
+        for term, postings in self.postings.items():
+            for span_id in postings:
+                self.span_terms.setdefault(span_id, []).append(term)
+    
+    def clear(self):
+        """Remove all indexed spans"""
+        self.postings = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+        self.span_terms = {}
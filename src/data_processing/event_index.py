@@ -0,0 +1,112 @@
+"""
+Inverted index from event types to the dialogue spans that contain them
+"""
+
+import json
+from typing import List, Dict, Any, Optional, Set
+from pathlib import Path
+
+
+class EventIndex:
+    """
+    Posting lists of span IDs per event type.
+    
+    Each posting records the turn indices (within the transcript) at which
+    the event occurs inside the span, so event-filtered retrieval can
+    restrict candidates and reason about temporal position without
+    scanning span metadata.
+    """
+    
+    def __init__(self, index_path: Optional[str] = None):
+        self.index_path = index_path
+        self.postings: Dict[str, Dict[str, List[int]]] = {}
+        
+        if index_path and Path(index_path).exists():
+            self.load()
+    
+    def __len__(self) -> int:
+        return sum(len(postings) for postings in self.postings.values())
+    
+    def __contains__(self, event_type: str) -> bool:
+        return event_type.lower() in self.postings
+    
+    def add(self, event_type: str, span_id: str, event_turn_indices: List[int]):
+        """Add a span to the posting list of an event type"""
+        postings = self.postings.setdefault(event_type.lower(), {})
+        positions = postings.setdefault(span_id, [])
+        
+        for turn_index in event_turn_indices:
+            if turn_index not in positions:
+                positions.append(turn_index)
+    
+    def add_span(
+        self,
+        span: Dict[str, Any],
+        events: List[Dict[str, Any]]
+    ) -> List[str]:
+        """
+        Index the events that occur inside a span.
+        
+        Args:
+            span: Dialogue span with span_id, turn_ids and start_turn_index
+            events: Events of the span's transcript
+        
+        Returns:
+            Event types found in the span
+        """
+        turn_ids = span.get('turn_ids', [])
+        start_turn_index = span.get('start_turn_index', 0)
+        
+        span_event_types = []
+        for event in events:
+            turn_id = event.get('turn_id')
+            if not turn_id or turn_id not in turn_ids:
+                continue
+            
+            event_type = event.get('event_type', '')
+            self.add(
+                event_type,
+                span['span_id'],
+                [start_turn_index + turn_ids.index(turn_id)]
+            )
+            span_event_types.append(event_type)
+        
+        return span_event_types
+    
+    def get_span_ids(self, event_type: str) -> Set[str]:
+        """Get the IDs of all spans containing an event type"""
+        return set(self.postings.get(event_type.lower(), {}))
+    
+    def get_event_turn_indices(self, event_type: str, span_id: str) -> List[int]:
+        """Get the turn indices at which an event occurs within a span"""
+        return self.postings.get(event_type.lower(), {}).get(span_id, [])
+    
+    def get_event_types(self) -> List[str]:
+        """Get all indexed event types"""
+        return list(self.postings.keys())
+    
+    def save(self, index_path: Optional[str] = None):
+        """Persist the index to disk"""
+        index_path = index_path or self.index_path
+        if not index_path:
+            return
+        
+        Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        tmp_path = Path(str(index_path) + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'postings': self.postings}, f, ensure_ascii=False)
+        tmp_path.replace(index_path)
+    
+    def load(self, index_path: Optional[str] = None):
+        """Load the index from disk"""
+        index_path = index_path or self.index_path
+        
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        self.postings = data.get('postings', {})
+    
+    def clear(self):
+        """Remove all postings"""
+        self.postings = {}
@@ -0,0 +1,604 @@
+"""
+FAISS index with a SQLite sidecar for span documents and metadata
+"""
+
+import json
+import sqlite3
+from typing import List, Dict, Any, Optional, Collection
+from pathlib import Path
+import faiss
+import numpy as np
+
+
+def matches_filter(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate a Chroma-style metadata filter against a metadata dictionary.
+    
+    Supports field equality, $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte,
+    and the $and / $or combinators.
+    """
+    if not where:
+        return True
+    
+    for key, condition in where.items():
+        if key == '$and':
+            if not all(matches_filter(metadata, c) for c in condition):
+                return False
+            continue
+        if key == '$or':
+            if not any(matches_filter(metadata, c) for c in condition):
+                return False
+            continue
+        
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        
+        for op, operand in condition.items():
+            if op == '$eq' and value != operand:
+                return False
+            elif op == '$ne' and value == operand:
+                return False
+            elif op == '$in' and value not in operand:
+                return False
+            elif op == '$nin' and value in operand:
+                return False
+            elif op in ('$gt', '$gte', '$lt', '$lte'):
+                if value is None:
+                    return False
+                if op == '$gt' and not value > operand:
+                    return False
+                if op == '$gte' and not value >= operand:
+                    return False
+                if op == '$lt' and not value < operand:
+                    return False
+                if op == '$lte' and not value <= operand:
+                    return False
+    
+    return True
+
+
+def filter_to_sql(where: Dict[str, Any]) -> tuple:
+    """
+    Translate a Chroma-style metadata filter into a SQLite condition on the
+    JSON metadata column, with the same semantics as matches_filter.
+    
+    Returns:
+        (SQL condition, parameters)
+    """
+    clauses = []
+    params = []
+    
+    for key, condition in where.items():
+        if key in ('$and', '$or'):
+            parts = [filter_to_sql(c) for c in condition]
+            if not parts:
+                clauses.append('1' if key == '$and' else '0')
+                continue
+            joiner = ' AND ' if key == '$and' else ' OR '
+            clauses.append('(' + joiner.join(part for part, _ in parts) + ')')
+            for _, part_params in parts:
+                params.extend(part_params)
+            continue
+        
+        field = "json_extract(metadata, ?)"
+        path = '$."' + key.replace('"', '\\"') + '"'
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        
+        for op, operand in condition.items():
+            if op in ('$in', '$nin'):
+                operand = list(operand)
+                if not operand:
+                    clauses.append('0' if op == '$in' else '1')
+                    continue
+                placeholders = ','.join('?' * len(operand))
+                if op == '$in':
+                    clauses.append(f"{field} IN ({placeholders})")
+                else:
+                    # A missing field is not in any list
+                    clauses.append(f"({field} IS NULL OR {field} NOT IN ({placeholders}))")
+                    params.append(path)
+                params.append(path)
+                params.extend(operand)
+                continue
+            
+            sql_op = {
+                '$eq': 'IS', '$ne': 'IS NOT',
+                '$gt': '>', '$gte': '>=', '$lt': '<', '$lte': '<='
+            }.get(op)
+            if sql_op is None:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            clauses.append(f"{field} {sql_op} ?")
+            params.extend([path, operand])
+    
+    return ' AND '.join(clauses) or '1', params
+
+
+class FaissStore:
+    """
+    Approximate nearest neighbour index over span embeddings.
+    
+    Vectors live in a FAISS index (Flat, HNSW or IVF-PQ) keyed by integer
+    IDs; span IDs, documents and metadata live in a SQLite sidecar. The
+    index is written to disk on persist() and memory-mapped on load.
+    Embeddings are expected to be L2-normalized; scores are inner products
+    and distances are reported as 1 - cosine similarity.
+    """
+    
+    SUPPORTED_INDEX_TYPES = ['flat', 'hnsw', 'ivfpq']
+    
+    # Candidate sets up to this size are scored exactly from reconstructed
+    # vectors; graph and IVF traversal lose recall under selective filters
+    EXACT_SELECTOR_LIMIT = 10000
+    
+    def __init__(
+        self,
+        db_path: str,
+        dimension: int,
+        index_type: str = "hnsw",
+        nprobe: int = 16,
+        ef_search: int = 64,
+        nlist: int = 1024,
+        pq_m: int = 16,
+        pq_nbits: int = 8,
+        hnsw_m: int = 32,
+        ef_construction: int = 200,
+        use_mmap: bool = True
+    ):
+        if index_type not in self.SUPPORTED_INDEX_TYPES:
+            raise ValueError(f"Unsupported FAISS index type: {index_type}")
+        
+        self.db_path = Path(db_path)
+        self.dimension = dimension
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.pq_nbits = pq_nbits
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.use_mmap = use_mmap
+        
+        self.index_path = self.db_path / "faiss.index"
+        self.pending_path = self.db_path / "faiss_pending.npz"
+        
+        self.db_path.mkdir(parents=True, exist_ok=True)
+        self._init_sidecar()
+        
+        # Vectors added before an IVF-PQ index has enough data to train
+        self.pending_ids = np.empty((0,), dtype=np.int64)
+        self.pending_vectors = np.empty((0, dimension), dtype=np.float32)
+        
+        self._mmapped = False
+        if self.index_path.exists():
+            self._load_index()
+        else:
+            self.index = self._build_index()
+        
+        if self.pending_path.exists():
+            pending = np.load(self.pending_path)
+            self.pending_ids = pending['ids']
+            self.pending_vectors = pending['vectors']
+    
+    def _init_sidecar(self):
+        """Initialize the SQLite metadata store"""
+        self.conn = sqlite3.connect(
+            str(self.db_path / "metadata.sqlite"),
+            check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS spans ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "span_id TEXT UNIQUE NOT NULL, "
+            "document TEXT, "
+            "metadata TEXT)"
+        )
+        self.conn.commit()
+    
+    def _build_index(self):
+        """Create an empty FAISS index of the configured type"""
+        if self.index_type == 'flat':
+            return faiss.IndexIDMap2(
+                faiss.IndexFlatIP(self.dimension)
+            )
+        elif self.index_type == 'hnsw':
+            hnsw = faiss.IndexHNSWFlat(
+                self.dimension,
+                self.hnsw_m,
+                faiss.METRIC_INNER_PRODUCT
+            )
+            hnsw.hnsw.efConstruction = self.ef_construction
+            return faiss.IndexIDMap2(hnsw)
+        else:
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            return faiss.IndexIVFPQ(
+                quantizer,
+                self.dimension,
+                self.nlist,
+                self.pq_m,
+                self.pq_nbits,
+                faiss.METRIC_INNER_PRODUCT
+            )
+    
+    def _load_index(self):
+        """Load the index from disk, memory-mapping it when possible"""
+        if self.use_mmap:
+            try:
+                self.index = faiss.read_index(
+                    str(self.index_path),
+                    faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                )
+                self._mmapped = True
+                return
+            except RuntimeError:
+                # Not every index type supports memory-mapped loading
+                pass
+        
+        self.index = faiss.read_index(str(self.index_path))
+        self._mmapped = False
+    
+    def _ensure_writable(self):
+        """Reload a memory-mapped index into memory before mutating it"""
+        if self._mmapped:
+            self.index = faiss.read_index(str(self.index_path))
+            self._mmapped = False
+    
+    @property
+    def min_training_size(self) -> int:
+        """Number of vectors needed to train an IVF-PQ index"""
+        return max(self.nlist * 39, 2 ** self.pq_nbits)
+    
+    def set_search_params(
+        self,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ):
+        """Tune the recall/latency trade-off of subsequent searches"""
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+    
+    def count(self) -> int:
+        """Number of stored spans"""
+        return self.conn.execute("SELECT COUNT(*) FROM spans").fetchone()[0]
+    
+    def add(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """
+        Add spans to the index. Span IDs that already exist are skipped.
+        
+        Args:
+            ids: Span IDs
+            embeddings: L2-normalized embeddings, one row per span
+            documents: Span texts
+            metadatas: Span metadata dictionaries
+        """
+        existing = set(self._lookup_int_ids(ids))
+        rows = [
+            (span_id, document, json.dumps(metadata, ensure_ascii=False))
+            for span_id, document, metadata in zip(ids, documents, metadatas)
+            if span_id not in existing
+        ]
+        if not rows:
+            return
+        
+        keep = [i for i, span_id in enumerate(ids) if span_id not in existing]
+        vectors = np.ascontiguousarray(embeddings[keep], dtype=np.float32)
+        
+        self.conn.executemany(
+            "INSERT INTO spans (span_id, document, metadata) VALUES (?, ?, ?)",
+            rows
+        )
+        self.conn.commit()
+        
+        int_ids = self._lookup_int_ids([row[0] for row in rows])
+        id_array = np.array([int_ids[row[0]] for row in rows], dtype=np.int64)
+        
+        self._ensure_writable()
+        
+        if self.index.is_trained:
+            self.index.add_with_ids(vectors, id_array)
+            return
+        
+        # IVF-PQ: buffer until there is enough data to train on
+        self.pending_ids = np.concatenate([self.pending_ids, id_array])
+        self.pending_vectors = np.vstack([self.pending_vectors, vectors])
+        
+        if len(self.pending_ids) >= self.min_training_size:
+            self.train()
+    
+    def train(self):
+        """Train an IVF-PQ index on the buffered vectors and add them"""
+        if self.index.is_trained or len(self.pending_ids) < self.nlist:
+            return
+        
+        self._ensure_writable()
+        self.index.train(self.pending_vectors)
+        self.index.add_with_ids(self.pending_vectors, self.pending_ids)
+        
+        self.pending_ids = np.empty((0,), dtype=np.int64)
+        self.pending_vectors = np.empty((0, self.dimension), dtype=np.float32)
+    
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        span_ids: Optional[Collection[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for the nearest spans to a query embedding.
+        
+        Metadata filters, like span IDs, are resolved to integer IDs in the
+        sidecar before searching, so selective filters still return up to
+        n_results matches.
+        
+        Args:
+            query_embedding: L2-normalized query embedding
+            n_results: Number of results to return
+            where: Optional Chroma-style metadata filter
+            span_ids: Optional set of span IDs to restrict results to
+        
+        Returns:
+            List of search results with span_id, text, metadata and distance
+        """
+        query = np.ascontiguousarray(
+            np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+        )
+        
+        selector_ids = None
+        if span_ids is not None:
+            selector_ids = np.array(
+                list(self._lookup_int_ids(list(span_ids)).values()),
+                dtype=np.int64
+            )
+        if where:
+            filter_ids = self._filter_int_ids(where)
+            selector_ids = filter_ids if selector_ids is None else np.intersect1d(selector_ids, filter_ids)
+        if selector_ids is not None and len(selector_ids) == 0:
+            return []
+        
+        candidates = self._search_index(query, n_results, selector_ids)
+        candidates.extend(self._search_pending(query, n_results, selector_ids))
+        candidates.sort(key=lambda x: x[1], reverse=True)
+        candidates = candidates[:n_results]
+        
+        rows = self._fetch_rows([int_id for int_id, _ in candidates])
+        
+        results = []
+        for int_id, score in candidates:
+            row = rows.get(int_id)
+            if row is None:
+                continue
+            
+            span_id, document, metadata = row
+            results.append({
+                'span_id': span_id,
+                'text': document,
+                'metadata': metadata,
+                'distance': 1.0 - float(score)
+            })
+        
+        return results
+    
+    def _search_index(
+        self,
+        query: np.ndarray,
+        k: int,
+        selector_ids: Optional[np.ndarray] = None
+    ) -> List[tuple]:
+        """Search the trained FAISS index"""
+        if not self.index.is_trained or self.index.ntotal == 0:
+            return []
+        
+        if selector_ids is not None and len(selector_ids) <= self.EXACT_SELECTOR_LIMIT:
+            return self._score_ids(query, k, selector_ids)
+        
+        selector = faiss.IDSelectorBatch(selector_ids) if selector_ids is not None else None
+        wanted = min(k, self.index.ntotal) if selector_ids is None else min(k, len(selector_ids))
+        ef_search = max(self.ef_search, k)
+        nprobe = self.nprobe
+        
+        while True:
+            if self.index_type == 'ivfpq':
+                params = faiss.SearchParametersIVF(nprobe=nprobe)
+            elif self.index_type == 'hnsw':
+                params = faiss.SearchParametersHNSW(efSearch=ef_search)
+            else:
+                params = faiss.SearchParameters()
+            
+            if selector is not None:
+                params.sel = selector
+            
+            scores, int_ids = self.index.search(query, min(k, self.index.ntotal), params=params)
+            
+            # Traversal can stop short of k matches under a filter; widen
+            # the search until it finds them or covers the whole index
+            if selector is None or int((int_ids[0] != -1).sum()) >= wanted:
+                break
+            if self.index_type == 'hnsw' and ef_search < self.index.ntotal:
+                ef_search *= 2
+            elif self.index_type == 'ivfpq' and nprobe < self.index.nlist:
+                nprobe *= 2
+            else:
+                break
+        
+        return [
+            (int(int_id), float(score))
+            for int_id, score in zip(int_ids[0], scores[0])
+            if int_id != -1
+        ]
+    
+    def _score_ids(
+        self,
+        query: np.ndarray,
+        k: int,
+        selector_ids: np.ndarray
+    ) -> List[tuple]:
+        """Exactly score a small set of indexed vectors"""
+        if self.index_type == 'ivfpq':
+            self._ensure_direct_map()
+        
+        pending = set(self.pending_ids.tolist())
+        ids = [int(i) for i in selector_ids if int(i) not in pending]
+        if not ids:
+            return []
+        
+        vectors = self.index.reconstruct_batch(np.array(ids, dtype=np.int64))
+        scores = vectors @ query[0]
+        
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        
+        return [(ids[i], float(scores[i])) for i in top]
+    
+    def _ensure_direct_map(self):
+        """Enable ID -> vector reconstruction on an IVF index"""
+        if self.index.direct_map.type != faiss.DirectMap.Hashtable:
+            self.index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    
+    def _search_pending(
+        self,
+        query: np.ndarray,
+        k: int,
+        selector_ids: Optional[np.ndarray] = None
+    ) -> List[tuple]:
+        """Brute-force search over vectors buffered before training"""
+        if len(self.pending_ids) == 0:
+            return []
+        
+        ids = self.pending_ids
+        vectors = self.pending_vectors
+        if selector_ids is not None:
+            mask = np.isin(ids, selector_ids)
+            ids = ids[mask]
+            vectors = vectors[mask]
+            if len(ids) == 0:
+                return []
+        
+        scores = vectors @ query[0]
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        
+        return [(int(ids[i]), float(scores[i])) for i in top]
+    
+    def get(
+        self,
+        span_ids: List[str],
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch stored spans by span ID, optionally filtered on metadata"""
+        int_ids = self._lookup_int_ids(span_ids)
+        rows = self._fetch_rows(list(int_ids.values()))
+        
+        results = []
+        for span_id in span_ids:
+            int_id = int_ids.get(span_id)
+            if int_id is None or int_id not in rows:
+                continue
+            _, document, metadata = rows[int_id]
+            if not matches_filter(metadata, where):
+                continue
+            results.append({
+                'span_id': span_id,
+                'text': document,
+                'metadata': metadata
+            })
+        
+        return results
+    
+    def get_vectors(self, span_ids: List[str]) -> Dict[str, tuple]:
+        """Fetch (document, vector) of stored spans by span ID"""
+        int_ids = self._lookup_int_ids(span_ids)
+        rows = self._fetch_rows(list(int_ids.values()))
+        if not rows:
+            return {}
+        
+        # Untrained IVF-PQ vectors are still in the pending buffer
+        pending = {int(i): row for row, i in enumerate(self.pending_ids.tolist())}
+        indexed = [int_id for int_id in rows if int_id not in pending]
+        vectors = {int_id: self.pending_vectors[pending[int_id]] for int_id in rows if int_id in pending}
+        if indexed:
+            if self.index_type == 'ivfpq':
+                self._ensure_direct_map()
+            reconstructed = self.index.reconstruct_batch(np.array(indexed, dtype=np.int64))
+            vectors.update(zip(indexed, reconstructed))
+        
+        return {
+            span_id: (rows[int_id][1], vectors[int_id])
+            for span_id, int_id in int_ids.items()
+            if int_id in rows
+        }
+    
+    def _filter_int_ids(self, where: Dict[str, Any]) -> np.ndarray:
+        """Integer IDs of the spans whose metadata matches a filter"""
+        condition, params = filter_to_sql(where)
+        return np.array(
+            [row[0] for row in self.conn.execute(f"SELECT id FROM spans WHERE {condition}", params)],
+            dtype=np.int64
+        )
+    
+    def _lookup_int_ids(self, span_ids: List[str]) -> Dict[str, int]:
+        """Map span IDs to integer index IDs"""
+        mapping = {}
+        for start in range(0, len(span_ids), 900):
+            chunk = span_ids[start:start + 900]
+            placeholders = ','.join('?' * len(chunk))
+            for int_id, span_id in self.conn.execute(
+                f"SELECT id, span_id FROM spans WHERE span_id IN ({placeholders})",
+                chunk
+            ):
+                mapping[span_id] = int_id
+        return mapping
+    
+    def _fetch_rows(self, int_ids: List[int]) -> Dict[int, tuple]:
+        """Fetch (span_id, document, metadata) rows by integer ID"""
+        rows = {}
+        for start in range(0, len(int_ids), 900):
+            chunk = int_ids[start:start + 900]
+            placeholders = ','.join('?' * len(chunk))
+            for int_id, span_id, document, metadata in self.conn.execute(
+                f"SELECT id, span_id, document, metadata FROM spans WHERE id IN ({placeholders})",
+                chunk
+            ):
+                rows[int_id] = (span_id, document, json.loads(metadata))
+        return rows
+    
+    def persist(self):
+        """Write the index and any untrained vectors to disk"""
+        self.conn.commit()
+        
+        if not self._mmapped:
+            tmp_path = Path(str(self.index_path) + '.tmp')
+            faiss.write_index(self.index, str(tmp_path))
+            tmp_path.replace(self.index_path)
+        
+        if len(self.pending_ids) > 0:
+            with open(self.pending_path, 'wb') as f:
+                np.savez(f, ids=self.pending_ids, vectors=self.pending_vectors)
+        elif self.pending_path.exists():
+            self.pending_path.unlink()
+    
+    def reset(self):
+        """Remove all vectors and metadata"""
+        self.conn.execute("DELETE FROM spans")
+        self.conn.commit()
+        
+        self.index = self._build_index()
+        self._mmapped = False
+        self.pending_ids = np.empty((0,), dtype=np.int64)
+        self.pending_vectors = np.empty((0, self.dimension), dtype=np.float32)
+        
+        for path in (self.index_path, self.pending_path):
+            if path.exists():
+                path.unlink()
@@ -2,30 +2,65 @@
 Main data processing pipeline
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Union
 from pathlib import Path
 from .transcript_loader import TranscriptLoader
 from .preprocessor import TranscriptPreprocessor
 from .vector_store import VectorStore
+from .turn_index import TurnIndex
 import json
 
 
 class DataProcessingPipeline:
-    """End-to-end data processing pipeline"""
+    """
+    End-to-end data processing pipeline.
+    
+    Span granularities:
+        - single: windows of span_window_size turns every span_stride turns
+        - multi: only non-overlapping coarse windows of coarse_window_size
+          turns are embedded; fine windows are cut from the turn index at
+          query time (see SpanExtractor.expand_fine_spans)
+    """
+    
+    SUPPORTED_SPAN_GRANULARITIES = ['single', 'multi']
     
     def __init__(
         self,
         vector_db_path: Optional[str] = None,
         embedding_model: str = "all-MiniLM-L6-v2",
-        span_window_size: int = 5
+        span_window_size: int = 5,
+        turn_index_path: Optional[str] = None,
+        vector_db_type: str = "chromadb",
+        vector_index_options: Optional[Dict[str, Any]] = None,
+        span_stride: int = 1,
+        span_granularity: str = "single",
+        coarse_window_size: int = 10
     ):
+        if span_granularity not in self.SUPPORTED_SPAN_GRANULARITIES:
+            raise ValueError(f"Unsupported span granularity: {span_granularity}")
+        
         self.loader = TranscriptLoader()
         self.preprocessor = TranscriptPreprocessor()
         self.vector_store = VectorStore(
+            db_type=vector_db_type,
             db_path=vector_db_path,
-            embedding_model=embedding_model
+            embedding_model=embedding_model,
+            **(vector_index_options or {})
         )
         self.span_window_size = span_window_size
+        self.span_stride = span_stride
+        self.span_granularity = span_granularity
+        self.coarse_window_size = coarse_window_size
+        
+        # Turn index lives next to the vector database
+        self.turn_index = TurnIndex(
+            index_path=turn_index_path or str(Path(self.vector_store.db_path) / "turn_index.sqlite")
+        )
+        
+        # Turn indexes used to be a single JSON file; import one once
+        legacy_path = Path(self.vector_store.db_path) / "turn_index.json"
+        if turn_index_path is None and legacy_path.exists() and len(self.turn_index) == 0:
+            self.turn_index.import_json(str(legacy_path))
     
     def process_transcript(
         self,
@@ -45,20 +80,54 @@ class DataProcessingPipeline:
         # Load transcript
         transcript = self.loader.load_transcript(transcript_path)
         
+        # Preprocess, extract spans and index
+        processed = self._process_loaded_transcript(transcript, index_to_vector_db)
+        
+        if index_to_vector_db:
+            self.vector_store.persist()
+            self.turn_index.save()
+        
+        return processed
+    
+    def _process_loaded_transcript(
+        self,
+        transcript: Dict[str, Any],
+        index_to_vector_db: bool = True
+    ) -> Dict[str, Any]:
+        """Preprocess a loaded transcript, extract its spans and index them"""
         # Preprocess
         processed = self.preprocessor.preprocess(transcript)
         
         # Extract dialogue spans
-        spans = self.preprocessor.extract_dialogue_spans(
-            processed['turns'],
-            window_size=self.span_window_size
-        )
-        
-        # Index to vector database
-        if index_to_vector_db and spans:
-            self.vector_store.add_transcript_spans(
+        if self.span_granularity == 'multi':
+            spans = self.preprocessor.extract_dialogue_spans(
+                processed['turns'],
+                window_size=self.coarse_window_size,
                 transcript_id=processed['transcript_id'],
-                spans=spans,
+                stride=self.coarse_window_size,
+                granularity='coarse'
+            )
+        else:
+            spans = self.preprocessor.extract_dialogue_spans(
+                processed['turns'],
+                window_size=self.span_window_size,
+                transcript_id=processed['transcript_id'],
+                stride=self.span_stride
+            )
+        
+        # Index to vector database and turn index
+        if index_to_vector_db:
+            if spans:
+                self.vector_store.add_transcript_spans(
+                    transcript_id=processed['transcript_id'],
+                    spans=spans,
+                    events=processed.get('events', []),
+                    transcript_metadata=processed.get('metadata', {})
+                )
+            
+            self.turn_index.add_transcript(
+                processed['transcript_id'],
+                processed['turns'],
                 events=processed.get('events', [])
             )
         
@@ -72,7 +141,8 @@ class DataProcessingPipeline:
         input_directory: str,
         output_directory: Optional[str] = None,
         file_pattern: str = "*.json",
-        index_to_vector_db: bool = True
+        index_to_vector_db: bool = True,
+        load_workers: int = 1
     ) -> List[Dict[str, Any]]:
         """
         Process multiple transcripts from a directory.
@@ -80,92 +150,79 @@ class DataProcessingPipeline:
         Args:
             input_directory: Directory containing transcript files
             output_directory: Optional directory to save processed transcripts
-            file_pattern: File pattern to match
+            file_pattern: File pattern to match (e.g. "*.jsonl.gz" for sharded exports)
             index_to_vector_db: Whether to index spans to vector database
+            load_workers: Number of processes decompressing and parsing input files
         
         Returns:
             List of processed transcript dictionaries
         """
-        input_dir = Path(input_directory)
-        processed_transcripts = []
-        
-        # Process each transcript file
-        for file_path in input_dir.glob(file_pattern):
-            try:
-                # Check if file contains a list of transcripts
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                if isinstance(data, list):
-                    # File contains list of transcripts - process each one
-                    for i, transcript_data in enumerate(data):
-                        try:
-                            # Create a temporary transcript dict
-                            transcript = {
-                                'transcript_id': transcript_data.get('transcript_id', f"{file_path.stem}_{i}"),
-                                'turns': transcript_data.get('turns', []),
-                                'events': transcript_data.get('events', []),
-                                'metadata': transcript_data.get('metadata', {})
-                            }
-                            
-                            # Preprocess
-                            processed = self.preprocessor.preprocess(transcript)
-                            
-                            # Extract dialogue spans
-                            spans = self.preprocessor.extract_dialogue_spans(
-                                processed['turns'],
-                                window_size=self.span_window_size
-                            )
-                            
-                            # Index to vector database
-                            if index_to_vector_db and spans:
-                                self.vector_store.add_transcript_spans(
-                                    transcript_id=processed['transcript_id'],
-                                    spans=spans,
-                                    events=processed.get('events', [])
-                                )
-                            
-                            # Add spans to processed transcript
-                            processed['spans'] = spans
-                            processed_transcripts.append(processed)
-                            
-                            # Save processed transcript if output directory specified
-                            if output_directory:
-                                output_dir = Path(output_directory)
-                                output_dir.mkdir(parents=True, exist_ok=True)
-                                
-                                output_file = output_dir / f"{processed['transcript_id']}.json"
-                                with open(output_file, 'w', encoding='utf-8') as f:
-                                    json.dump(processed, f, indent=2, ensure_ascii=False)
-                        except Exception as e:
-                            print(f"Error processing transcript {i} in {file_path}: {e}")
-                            continue
-                else:
-                    # Single transcript in file
-                    processed = self.process_transcript(
-                        str(file_path),
+        return list(self.iter_processed(
+            str(Path(input_directory) / file_pattern),
+            output_directory=output_directory,
+            index_to_vector_db=index_to_vector_db,
+            load_workers=load_workers
+        ))
+    
+    def iter_processed(
+        self,
+        inputs: Union[str, List[str]],
+        output_directory: Optional[str] = None,
+        index_to_vector_db: bool = True,
+        load_workers: int = 1
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream transcripts from files, directories or glob patterns through
+        the pipeline.
+        
+        Transcripts are read with TranscriptLoader.iter_transcripts, so
+        JSON Lines inputs are never loaded in full; the indexes are
+        persisted when the iteration ends or is closed.
+        
+        Args:
+            inputs: File, directory or glob pattern, or a list of them
+            output_directory: Optional directory to save processed transcripts
+            index_to_vector_db: Whether to index spans to vector database
+            load_workers: Number of processes decompressing and parsing input files
+        
+        Yields:
+            Processed transcript dictionaries
+        """
+        output_dir = Path(output_directory) if output_directory else None
+        if output_dir:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        
+        try:
+            for transcript in self.loader.iter_transcripts(inputs, workers=load_workers):
+                try:
+                    # Preprocess, extract spans and index
+                    processed = self._process_loaded_transcript(
+                        transcript,
                         index_to_vector_db=index_to_vector_db
                     )
-                    processed_transcripts.append(processed)
-                    
-                    # Save processed transcript if output directory specified
-                    if output_directory:
-                        output_dir = Path(output_directory)
-                        output_dir.mkdir(parents=True, exist_ok=True)
-                        
-                        output_file = output_dir / f"{processed['transcript_id']}.json"
-                        with open(output_file, 'w', encoding='utf-8') as f:
-                            json.dump(processed, f, indent=2, ensure_ascii=False)
-            
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-                import traceback
-                traceback.print_exc()
-                continue
-        
-        return processed_transcripts
+                except Exception as e:
+                    print(f"Error processing transcript {transcript.get('transcript_id')}: {e}")
+                    continue
+                
+                # Save processed transcript if output directory specified
+                if output_dir:
+                    output_file = output_dir / f"{processed['transcript_id']}.json"
+                    with open(output_file, 'w', encoding='utf-8') as f:
+                        json.dump(processed, f, indent=2, ensure_ascii=False)
+                
+                yield processed
+        finally:
+            # Persist the auxiliary indexes once per batch, including when the
+            # caller stops early or an input fails to load
+            if index_to_vector_db:
+                self.vector_store.persist()
+                self.turn_index.save()
     
     def get_vector_store(self) -> VectorStore:
         """Get the vector store instance"""
         return self.vector_store
+    
+    def get_turn_index(self) -> TurnIndex:
+        """Get the turn index instance"""
+        return self.turn_index
 
@@ -2,9 +2,9 @@
 Transcript preprocessing utilities
 """
 
-import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+import numpy as np
 
 
 @dataclass
@@ -27,6 +27,18 @@ class Event:
     metadata: Optional[Dict[str, Any]] = None
 
 
+# Canonical event types of common event labels
+EVENT_TYPE_MAPPING = {
+    'escalation': 'escalation',
+    'escalate': 'escalation',
+    'refund': 'refund',
+    'refund_request': 'refund',
+    'churn': 'churn',
+    'churn_intent': 'churn',
+    'cancellation': 'churn'
+}
+
+
 class TranscriptPreprocessor:
     """Preprocess transcripts for analysis"""
     
@@ -35,6 +47,8 @@ class TranscriptPreprocessor:
             'agent': ['agent', 'representative', 'rep', 'support'],
             'customer': ['customer', 'client', 'caller', 'user']
         }
+        # Raw speaker label -> normalized label; transcripts reuse a handful of labels
+        self._speaker_lookup: Dict[str, str] = {}
     
     def preprocess(self, transcript: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -43,11 +57,11 @@ class TranscriptPreprocessor:
         - Clean text
         - Segment turns
         - Extract dialogue structure
-        """
-        turns = self._normalize_turns(transcript['turns'])
-        turns = self._clean_turns(turns)
-        turns = self._add_turn_indices(turns)
         
+        Turns are normalized, cleaned and indexed in a single pass that also
+        collects the dialogue structure; each input turn is copied once.
+        """
+        turns, dialogue_structure = self._preprocess_turns(transcript['turns'])
         events = self._normalize_events(transcript.get('events', []))
         
         return {
@@ -55,61 +69,65 @@ class TranscriptPreprocessor:
             'turns': turns,
             'events': events,
             'metadata': transcript.get('metadata', {}),
-            'dialogue_structure': self._extract_dialogue_structure(turns)
+            'dialogue_structure': dialogue_structure
         }
     
-    def _normalize_turns(self, turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Normalize speaker labels"""
-        normalized = []
-        
-        for turn in turns:
-            speaker = turn.get('speaker', '').lower()
-            
-            # Normalize speaker label
-            normalized_speaker = speaker
+    def normalize_speaker(self, speaker: str) -> str:
+        """Normalize a speaker label (e.g. 'Support Rep' -> 'agent')"""
+        normalized = self._speaker_lookup.get(speaker)
+        if normalized is None:
+            normalized = speaker.lower()
             for standard, variants in self.speaker_normalization.items():
-                if any(variant in speaker for variant in variants):
-                    normalized_speaker = standard
+                if any(variant in normalized for variant in variants):
+                    normalized = standard
                     break
-            
-            turn_copy = turn.copy()
-            turn_copy['speaker'] = normalized_speaker
-            normalized.append(turn_copy)
-        
+            self._speaker_lookup[speaker] = normalized
         return normalized
     
-    def _clean_turns(self, turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Clean text in turns"""
-        cleaned = []
+    def _preprocess_turns(self, turns: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Normalize speakers, clean text and add turn indices in one pass.
         
-        for turn in turns:
-            text = turn.get('text', '')
-            
-            # Remove excessive whitespace
-            text = re.sub(r'\s+', ' ', text)
+        Returns:
+            Tuple of (processed turns, dialogue structure)
+        """
+        processed = []
+        speaker_counts = {}
+        total_length = 0
+        # Conversation phases: runs of consecutive turns by the same speaker
+        segments = []
+        segment = None
+        
+        for i, turn in enumerate(turns):
+            speaker = self.normalize_speaker(turn.get('speaker', ''))
+            # Collapse whitespace runs and trim (same result as re.sub(r'\s+', ' ', text).strip())
+            text = ' '.join(turn.get('text', '').split())
             
-            # Remove special characters that might interfere (keep basic punctuation)
-            # text = re.sub(r'[^\w\s.,!?;:\-\'"]', '', text)
+            processed_turn = turn.copy()
+            processed_turn['speaker'] = speaker
+            processed_turn['text'] = text
+            processed_turn['turn_index'] = i
+            processed.append(processed_turn)
             
-            # Trim
-            text = text.strip()
+            speaker_counts[speaker] = speaker_counts.get(speaker, 0) + 1
+            total_length += len(text)
             
-            turn_copy = turn.copy()
-            turn_copy['text'] = text
-            cleaned.append(turn_copy)
-        
-        return cleaned
-    
-    def _add_turn_indices(self, turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Add sequential turn indices"""
-        indexed = []
+            if segment is not None and segment['speaker'] == speaker:
+                segment['end_turn'] = i
+            else:
+                segment = {'speaker': speaker, 'start_turn': i, 'end_turn': i}
+                segments.append(segment)
         
-        for i, turn in enumerate(turns):
-            turn_copy = turn.copy()
-            turn_copy['turn_index'] = i
-            indexed.append(turn_copy)
+        if not processed:
+            return processed, {}
         
-        return indexed
+        dialogue_structure = {
+            'total_turns': len(processed),
+            'speaker_distribution': speaker_counts,
+            'average_turn_length': total_length / len(processed),
+            'segments': segments
+        }
+        return processed, dialogue_structure
     
     def _normalize_events(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Normalize event labels"""
@@ -118,120 +136,204 @@ class TranscriptPreprocessor:
         for event in events:
             event_type = event.get('event_type', '').lower()
             
-            # Normalize common event types
-            event_type_mapping = {
-                'escalation': 'escalation',
-                'escalate': 'escalation',
-                'refund': 'refund',
-                'refund_request': 'refund',
-                'churn': 'churn',
-                'churn_intent': 'churn',
-                'cancellation': 'churn'
-            }
-            
-            normalized_type = event_type_mapping.get(event_type, event_type)
-            
             event_copy = event.copy()
-            event_copy['event_type'] = normalized_type
+            event_copy['event_type'] = EVENT_TYPE_MAPPING.get(event_type, event_type)
             normalized.append(event_copy)
         
         return normalized
     
-    def _extract_dialogue_structure(self, turns: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Extract dialogue structure features"""
-        if not turns:
-            return {}
-        
-        # Count turns by speaker
-        speaker_counts = {}
-        for turn in turns:
-            speaker = turn.get('speaker', 'unknown')
-            speaker_counts[speaker] = speaker_counts.get(speaker, 0) + 1
-        
-        # Calculate average turn length
-        turn_lengths = [len(turn.get('text', '')) for turn in turns]
-        avg_turn_length = sum(turn_lengths) / len(turn_lengths) if turn_lengths else 0
-        
-        # Identify dialogue segments (conversation phases)
-        segments = self._identify_segments(turns)
-        
-        return {
-            'total_turns': len(turns),
-            'speaker_distribution': speaker_counts,
-            'average_turn_length': avg_turn_length,
-            'segments': segments
-        }
-    
-    def _identify_segments(self, turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Identify conversation segments/phases"""
-        # Simple segmentation: group consecutive turns by speaker
-        segments = []
-        current_segment = None
-        
-        for i, turn in enumerate(turns):
-            speaker = turn.get('speaker', 'unknown')
-            
-            if current_segment is None or current_segment['speaker'] != speaker:
-                if current_segment is not None:
-                    segments.append(current_segment)
-                
-                current_segment = {
-                    'speaker': speaker,
-                    'start_turn': i,
-                    'end_turn': i,
-                    'turns': [turn]
-                }
-            else:
-                current_segment['end_turn'] = i
-                current_segment['turns'].append(turn)
-        
-        if current_segment is not None:
-            segments.append(current_segment)
-        
-        return segments
+    def segment_turns(self, turns: List[Dict[str, Any]], segment: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Turns of a dialogue structure segment"""
+        return turns[segment['start_turn']:segment['end_turn'] + 1]
     
     def extract_dialogue_spans(
         self, 
         turns: List[Dict[str, Any]], 
-        window_size: int = 5
+        window_size: int = 5,
+        transcript_id: Optional[str] = None,
+        stride: int = 1,
+        granularity: str = "fine",
+        builder: Optional["SpanBuilder"] = None,
+        materialize_text: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Extract dialogue spans (sliding windows of turns) for retrieval.
         
+        Span text is sliced from one joined buffer (see SpanBuilder), so
+        building all spans is linear in the transcript length. With
+        materialize_text=False spans carry 'text_offsets' into the
+        builder's buffer instead of 'text', and the text is created only
+        when needed with builder.span_text(span).
+        
         Args:
             turns: List of turn dictionaries
             window_size: Number of consecutive turns per span
+            transcript_id: Transcript the turns belong to (used for span IDs)
+            stride: Turns between the starts of consecutive windows
+            granularity: "fine" for retrieval windows or "coarse" for the
+                first-stage windows of multi-granularity indexing
+            builder: SpanBuilder of the turns (built if not given); pass one to
+                materialize offset-only spans later
+            materialize_text: Whether spans carry their text
         
         Returns:
             List of span dictionaries with text, metadata, and turn indices
         """
-        spans = []
+        if transcript_id is None:
+            transcript_id = turns[0].get('transcript_id', 'unknown') if turns else 'unknown'
         
-        for i in range(len(turns) - window_size + 1):
-            span_turns = turns[i:i + window_size]
-            
-            # Combine text from span turns
-            span_text = ' '.join([turn.get('text', '') for turn in span_turns])
-            
-            # Extract metadata
-            speakers = [turn.get('speaker', 'unknown') for turn in span_turns]
-            turn_ids = [turn.get('turn_id', i + j) for j, turn in enumerate(span_turns)]
-            
+        if granularity == 'coarse':
+            # Coarse windows tile the transcript; the last one may be shorter
+            id_prefix = 'coarse'
+            starts = list(range(0, len(turns), stride))
+        else:
+            id_prefix = 'span'
+            starts = window_starts(len(turns), window_size, stride)
+        
+        if not starts:
+            return []
+        
+        builder = builder or SpanBuilder(turns)
+        ends = [min(i + window_size, len(turns)) for i in starts]
+        speaker_counts = builder.speaker_counts(starts, ends).tolist()
+        labels = builder.speaker_labels
+        text_starts = builder.turn_starts[starts].tolist()
+        text_ends = builder.turn_ends[np.asarray(ends) - 1].tolist()
+        
+        spans = []
+        for i, end, counts, text_start, text_end in zip(starts, ends, speaker_counts, text_starts, text_ends):
             span = {
-                'span_id': f"{turns[0].get('transcript_id', 'unknown')}_span_{i}",
-                'text': span_text,
+                'span_id': f"{transcript_id}_{id_prefix}_{i}",
                 'start_turn_index': i,
-                'end_turn_index': i + window_size - 1,
-                'turn_ids': turn_ids,
-                'speakers': speakers,
-                'transcript_id': turns[0].get('transcript_id', 'unknown'),
+                'end_turn_index': end - 1,
+                'turn_ids': builder.turn_ids[i:end],
+                'speakers': builder.speakers[i:end],
+                'transcript_id': transcript_id,
                 'metadata': {
-                    'window_size': window_size,
-                    'speaker_distribution': {s: speakers.count(s) for s in set(speakers)}
+                    'window_size': end - i,
+                    'stride': stride,
+                    'granularity': granularity,
+                    'speaker_distribution': {
+                        labels[code]: count for code, count in enumerate(counts) if count
+                    }
                 }
             }
+            if materialize_text:
+                span['text'] = builder.buffer[text_start:text_end]
+            else:
+                span['text_offsets'] = (text_start, text_end)
             
             spans.append(span)
         
         return spans
 
+
+class SpanBuilder:
+    """
+    Span text and speaker statistics of a transcript's turns, computed once.
+    
+    Turn texts are joined into a single buffer with the character offsets
+    of every turn, so the text of turns [start, end) is one slice of the
+    buffer (identical to joining the turn texts with spaces). Speakers are
+    coded once, with prefix sums of the codes giving the speaker counts of
+    any window in constant time.
+    
+    Args:
+        turns: Turn dictionaries, in transcript order
+    """
+    
+    def __init__(self, turns: List[Dict[str, Any]]):
+        texts = [turn.get('text', '') for turn in turns]
+        self.buffer = ' '.join(texts)
+        
+        # Each turn starts one separator after the end of the previous one
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        self.turn_starts = np.zeros(len(texts), dtype=np.int64)
+        np.cumsum(lengths[:-1] + 1, out=self.turn_starts[1:])
+        self.turn_ends = self.turn_starts + lengths
+        
+        self.speakers = [turn.get('speaker', 'unknown') for turn in turns]
+        self.turn_ids = [turn.get('turn_id', i) for i, turn in enumerate(turns)]
+        
+        speaker_codes: Dict[str, int] = {}
+        codes = np.fromiter(
+            (speaker_codes.setdefault(speaker, len(speaker_codes)) for speaker in self.speakers),
+            dtype=np.int64,
+            count=len(self.speakers)
+        )
+        self.speaker_labels = list(speaker_codes)
+        
+        # speaker_prefix[i, c]: turns of speaker c among the first i turns
+        self.speaker_prefix = np.zeros((len(codes) + 1, len(speaker_codes)), dtype=np.int64)
+        self.speaker_prefix[np.arange(1, len(codes) + 1), codes] = 1
+        np.cumsum(self.speaker_prefix, axis=0, out=self.speaker_prefix)
+        
+        # UTF-8 buffer and per-turn byte offsets, for view()
+        self._encoded: Optional[bytes] = None
+        self._byte_starts: Optional[np.ndarray] = None
+        self._byte_ends: Optional[np.ndarray] = None
+    
+    def __len__(self) -> int:
+        return len(self.speakers)
+    
+    def offsets(self, start: int, end: int) -> Tuple[int, int]:
+        """Character offsets of turns [start, end) in the buffer"""
+        return int(self.turn_starts[start]), int(self.turn_ends[end - 1])
+    
+    def text(self, start: int, end: int) -> str:
+        """Text of turns [start, end)"""
+        char_start, char_end = self.offsets(start, end)
+        return self.buffer[char_start:char_end]
+    
+    def span_text(self, span: Dict[str, Any]) -> str:
+        """Materialize the text of a span built with materialize_text=False"""
+        if 'text' in span:
+            return span['text']
+        char_start, char_end = span['text_offsets']
+        return self.buffer[char_start:char_end]
+    
+    def view(self, start: int, end: int) -> memoryview:
+        """
+        UTF-8 bytes of turns [start, end), without copying.
+        
+        The buffer is encoded on first use.
+        """
+        if self._encoded is None:
+            self._encoded = self.buffer.encode('utf-8')
+            byte_lengths = np.fromiter(
+                (len(self.buffer[a:b].encode('utf-8')) for a, b in zip(self.turn_starts, self.turn_ends)),
+                dtype=np.int64,
+                count=len(self)
+            )
+            self._byte_starts = np.zeros(len(self), dtype=np.int64)
+            np.cumsum(byte_lengths[:-1] + 1, out=self._byte_starts[1:])
+            self._byte_ends = self._byte_starts + byte_lengths
+        
+        return memoryview(self._encoded)[self._byte_starts[start]:self._byte_ends[end - 1]]
+    
+    def speaker_counts(self, starts: List[int], ends: List[int]) -> np.ndarray:
+        """
+        Speaker counts of windows [start, end), one row per window and one
+        column per label in speaker_labels.
+        """
+        return self.speaker_prefix[np.asarray(ends)] - self.speaker_prefix[np.asarray(starts)]
+
+
+def window_starts(num_turns: int, window_size: int, stride: int = 1) -> List[int]:
+    """
+    Start indices of sliding windows over a transcript.
+    
+    With stride > 1 a final window is aligned to the last turn, so the
+    tail of the transcript is always covered.
+    """
+    if stride < 1:
+        raise ValueError(f"Unsupported span stride: {stride}")
+    
+    last_start = num_turns - window_size
+    if last_start < 0:
+        return []
+    
+    starts = list(range(0, last_start + 1, stride))
+    if starts[-1] != last_start:
+        starts.append(last_start)
+    return starts
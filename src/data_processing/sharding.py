@@ -0,0 +1,207 @@
+"""
+Shard routing for partitioned vector indexes
+"""
+
+import zlib
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Set
+
+
+class ShardRouter:
+    """
+    Assign transcripts to shards and select the shards a query must visit.
+    
+    Strategies:
+        - hash: stable hash of transcript_id modulo num_shards
+        - time: calendar period (day, month or year) of a transcript date
+        - tenant: value of a tenant field in the transcript metadata
+    
+    The routed value is stored in each span's metadata under `shard`, so
+    a metadata filter on the routing field can be resolved to a subset of
+    shards before any index is queried.
+    """
+    
+    SUPPORTED_STRATEGIES = ['hash', 'time', 'tenant']
+    
+    TIME_FORMATS = {
+        'day': '%Y-%m-%d',
+        'month': '%Y-%m',
+        'year': '%Y'
+    }
+    
+    def __init__(
+        self,
+        strategy: str = "hash",
+        num_shards: int = 8,
+        time_field: str = "date",
+        time_granularity: str = "month",
+        tenant_field: str = "tenant_id",
+        default_shard: str = "default"
+    ):
+        if strategy not in self.SUPPORTED_STRATEGIES:
+            raise ValueError(f"Unsupported sharding strategy: {strategy}")
+        if time_granularity not in self.TIME_FORMATS:
+            raise ValueError(f"Unsupported time granularity: {time_granularity}")
+        
+        self.strategy = strategy
+        self.num_shards = num_shards
+        self.time_field = time_field
+        self.time_granularity = time_granularity
+        self.tenant_field = tenant_field
+        self.default_shard = default_shard
+    
+    @property
+    def routing_field(self) -> str:
+        """Span metadata field whose value determines the shard"""
+        if self.strategy == 'hash':
+            return 'transcript_id'
+        if self.strategy == 'tenant':
+            return self.tenant_field
+        return 'shard'
+    
+    def shard_for(
+        self,
+        transcript_id: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Get the shard key of a transcript.
+        
+        Args:
+            transcript_id: Unique identifier for the transcript
+            metadata: Transcript-level metadata (date, tenant, ...)
+        
+        Returns:
+            Shard key, safe to use in collection names and paths
+        """
+        metadata = metadata or {}
+        
+        if self.strategy == 'hash':
+            return self._hash_shard(transcript_id)
+        
+        if self.strategy == 'tenant':
+            tenant = metadata.get(self.tenant_field)
+            return self._sanitize(str(tenant)) if tenant else self.default_shard
+        
+        period = self._time_period(metadata.get(self.time_field))
+        return period or self.default_shard
+    
+    def select_shards(
+        self,
+        shard_keys: List[str],
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """
+        Drop shards whose spans cannot match a metadata filter.
+        
+        Only equality and $in conditions on the routing field (or on
+        `shard` itself) are used for pruning; anything else keeps all shards.
+        """
+        allowed = self.pinned_shards(filter_dict)
+        if allowed is None:
+            return list(shard_keys)
+        
+        return [key for key in shard_keys if key in allowed]
+    
+    def pinned_shards(self, filter_dict: Optional[Dict[str, Any]] = None) -> Optional[Set[str]]:
+        """Get the shard keys a filter restricts a query to (None if any shard)"""
+        allowed = self._allowed_values(filter_dict, 'shard')
+        
+        routed = self._allowed_values(filter_dict, self.routing_field)
+        if routed is not None and self.routing_field != 'shard':
+            if self.strategy == 'hash':
+                routed = {self._hash_shard(str(value)) for value in routed}
+            else:
+                routed = {self._sanitize(str(value)) for value in routed}
+            allowed = routed if allowed is None else allowed & routed
+        
+        return allowed
+    
+    def recent_shards(self, shard_keys: List[str], max_shards: int) -> List[str]:
+        """
+        Get the most recent time shards (others are left unloaded).
+        
+        The default shard holds spans without a timestamp, which no time
+        window covers, so it is always kept in addition to max_shards dated
+        shards.
+        """
+        if self.strategy != 'time':
+            return list(shard_keys)
+        
+        dated = sorted(key for key in shard_keys if key != self.default_shard)
+        recent = dated[-max_shards:] if max_shards > 0 else []
+        if self.default_shard in shard_keys:
+            recent.append(self.default_shard)
+        return recent
+    
+    def _hash_shard(self, transcript_id: str) -> str:
+        """Stable (process-independent) hash shard of a transcript ID"""
+        bucket = zlib.crc32(transcript_id.encode('utf-8')) % self.num_shards
+        return f"{bucket:03d}"
+    
+    def _time_period(self, value: Any) -> Optional[str]:
+        """Format an epoch timestamp or ISO date as a calendar period"""
+        if value is None or value == '':
+            return None
+        
+        try:
+            if isinstance(value, (int, float)):
+                moment = datetime.fromtimestamp(value, tz=timezone.utc)
+            else:
+                moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except (ValueError, OverflowError, OSError):
+            return None
+        
+        return moment.strftime(self.TIME_FORMATS[self.time_granularity])
+    
+    def _allowed_values(
+        self,
+        filter_dict: Optional[Dict[str, Any]],
+        field: str
+    ) -> Optional[Set[Any]]:
+        """Collect the values a filter allows for a field (None if unconstrained)"""
+        if not filter_dict:
+            return None
+        
+        allowed = None
+        for key, condition in filter_dict.items():
+            if key == '$and':
+                for clause in condition:
+                    values = self._allowed_values(clause, field)
+                    if values is not None:
+                        allowed = values if allowed is None else allowed & values
+                continue
+            
+            if key == '$or':
+                union = set()
+                for clause in condition:
+                    values = self._allowed_values(clause, field)
+                    if values is None:
+                        # One unconstrained branch makes the whole $or unconstrained
+                        union = None
+                        break
+                    union |= values
+                if union is not None:
+                    allowed = union if allowed is None else allowed & union
+                continue
+            
+            if key != field:
+                continue
+            
+            if not isinstance(condition, dict):
+                values = {condition}
+            elif '$eq' in condition:
+                values = {condition['$eq']}
+            elif '$in' in condition:
+                values = set(condition['$in'])
+            else:
+                continue
+            
+            allowed = values if allowed is None else allowed & values
+        
+        return allowed
+    
+    @staticmethod
+    def _sanitize(value: str) -> str:
+        """Make a shard key safe for collection names and directories"""
+        return ''.join(c if c.isalnum() or c in '-_' else '_' for c in value) or 'default'
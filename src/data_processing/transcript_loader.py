@@ -2,17 +2,63 @@
 Transcript loading and parsing utilities
 """
 
+import glob
+import gzip
+import io
 import json
+import multiprocessing
+import queue
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, TextIO, Union
 from pathlib import Path
 
+# Newline-delimited formats, streamed one line at a time
+JSONL_FORMATS = ['.jsonl', '.jsonl.gz', '.jsonl.zst']
+
+# CSV transcript exports: one row per turn
+CSV_REQUIRED_COLUMNS = ['transcript_id', 'turn_id', 'speaker', 'text']
+CSV_DTYPES = {
+    'transcript_id': str,
+    'speaker': str,
+    'text': str,
+    'event_type': str,
+    'event_label': str
+}
+CSV_CHUNK_SIZE = 100_000
+
+
+def transcript_format(file_path: Path) -> str:
+    """File format of a transcript path, including compression suffixes"""
+    name = file_path.name.lower()
+    for suffix in JSONL_FORMATS:
+        if name.endswith(suffix):
+            return suffix
+    return file_path.suffix.lower()
+
+
+def normalize_transcript(data: Dict[str, Any], default_id: str) -> Dict[str, Any]:
+    """Normalize a raw transcript record to the loader's structure"""
+    return {
+        'transcript_id': data.get('transcript_id', default_id),
+        'turns': data.get('turns', []),
+        'events': data.get('events', []),
+        'metadata': data.get('metadata', {})
+    }
+
 
 class TranscriptLoader:
-    """Load and parse conversational transcripts"""
+    """
+    Load and parse conversational transcripts.
+    
+    Single-transcript files (.json, .csv, .txt) load with load_transcript;
+    multi-transcript inputs (JSON lists, CSV exports and JSON Lines,
+    optionally gzip or zstd compressed, across any number of shards)
+    stream through iter_transcripts.
+    """
     
     def __init__(self):
-        self.supported_formats = ['.json', '.csv', '.txt']
+        self.supported_formats = ['.json', '.csv', '.txt'] + JSONL_FORMATS
     
     def load_transcript(self, file_path: str) -> Dict[str, Any]:
         """
@@ -20,22 +66,29 @@ class TranscriptLoader:
         
         Expected formats:
         - JSON: {"transcript_id": str, "turns": [...], "events": [...], "metadata": {...}}
+        - JSON Lines (.jsonl, .jsonl.gz, .jsonl.zst): one JSON transcript per line
         - CSV: columns: transcript_id, turn_id, speaker, text, timestamp, event_type, event_label
         - TXT: Simple text format (basic parsing)
+        
+        JSON lists, JSON Lines and CSV files must hold exactly one
+        transcript; use iter_transcripts for multi-transcript files.
         """
         file_path = Path(file_path)
         
         if not file_path.exists():
             raise FileNotFoundError(f"Transcript file not found: {file_path}")
         
-        if file_path.suffix == '.json':
+        file_format = transcript_format(file_path)
+        if file_format == '.json':
             return self._load_json(file_path)
-        elif file_path.suffix == '.csv':
-            return self._load_csv(file_path)
-        elif file_path.suffix == '.txt':
+        elif file_format in JSONL_FORMATS:
+            return self._single(self._iter_jsonl(file_path), file_path)
+        elif file_format == '.csv':
+            return self._single(self._iter_csv(file_path), file_path)
+        elif file_format == '.txt':
             return self._load_txt(file_path)
         else:
-            raise ValueError(f"Unsupported file format: {file_path.suffix}")
+            raise ValueError(f"Unsupported file format: {file_format}")
     
     def _load_json(self, file_path: Path) -> Dict[str, Any]:
         """Load JSON format transcript"""
@@ -44,62 +97,94 @@ class TranscriptLoader:
         
         # Handle list of transcripts (batch file)
         if isinstance(data, list):
-            if len(data) == 0:
-                raise ValueError(f"Empty transcript list in {file_path}")
-            # Return first transcript (for single file processing)
-            # For batch processing, use load_batch instead
-            data = data[0]
+            return self._single(self._iter_json_list(data, file_path), file_path)
         
         # Normalize structure
-        transcript = {
-            'transcript_id': data.get('transcript_id', file_path.stem),
-            'turns': data.get('turns', []),
-            'events': data.get('events', []),
-            'metadata': data.get('metadata', {})
-        }
+        return normalize_transcript(data, file_path.stem)
+    
+    def _single(self, transcripts: Iterator[Dict[str, Any]], file_path: Path) -> Dict[str, Any]:
+        """The only transcript of a multi-transcript file"""
+        first = next(transcripts, None)
+        if first is None:
+            raise ValueError(f"Empty transcript list in {file_path}")
+        if next(transcripts, None) is not None:
+            raise ValueError(
+                f"{file_path} holds more than one transcript; use iter_transcripts to read all of them"
+            )
+        return first
+    
+    def _iter_csv(self, file_path: Path, chunk_size: int = CSV_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the transcripts of a CSV file.
         
-        return transcript
+        The file is read in chunks of chunk_size rows with fixed column
+        dtypes and each chunk is split into transcripts by transcript_id.
+        Rows of the chunk's last transcript are held back and joined to
+        the next chunk, so a transcript crossing a chunk boundary is
+        yielded whole. Transcripts are yielded in order of first
+        appearance; rows of one transcript are expected to be contiguous,
+        as in platform exports.
+        """
+        pending = None
+        
+        with pd.read_csv(file_path, dtype=CSV_DTYPES, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                if not all(col in chunk.columns for col in CSV_REQUIRED_COLUMNS):
+                    raise ValueError(f"CSV missing required columns: {CSV_REQUIRED_COLUMNS}")
+                
+                if chunk.empty:
+                    continue
+                if pending is not None:
+                    chunk = pd.concat([pending, chunk], ignore_index=True)
+                
+                held = chunk['transcript_id'].eq(chunk['transcript_id'].iat[-1])
+                pending = chunk[held]
+                yield from self._csv_transcripts(chunk[~held])
+        
+        if pending is not None:
+            yield from self._csv_transcripts(pending)
     
-    def _load_csv(self, file_path: Path) -> Dict[str, Any]:
-        """Load CSV format transcript"""
-        df = pd.read_csv(file_path)
+    def _csv_transcripts(self, df: pd.DataFrame) -> Iterator[Dict[str, Any]]:
+        """Split CSV rows into transcripts, grouping by transcript_id"""
+        if df.empty:
+            return
         
         # Expected columns: transcript_id, turn_id, speaker, text, timestamp, event_type, event_label
-        required_cols = ['transcript_id', 'turn_id', 'speaker', 'text']
+        columns = df.columns
+        turns = pd.DataFrame({
+            'turn_id': df['turn_id'],
+            'speaker': df['speaker'],
+            'text': df['text'],
+            # Numeric in every chunk, whatever pandas would infer for it
+            'timestamp': pd.to_numeric(df['timestamp'], errors='coerce') if 'timestamp' in columns else None
+        })
+        turn_records = _records(turns)
         
-        if not all(col in df.columns for col in required_cols):
-            raise ValueError(f"CSV missing required columns: {required_cols}")
+        codes, transcript_ids = pd.factorize(df['transcript_id'])
+        # Row positions grouped by transcript, in order of first appearance
+        order = np.argsort(codes, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0], minlength=len(transcript_ids)))])
+        order = order[len(order) - bounds[-1]:]  # rows without a transcript_id sort first
         
-        # Group by transcript_id
-        transcript_id = df['transcript_id'].iloc[0]
+        # Events, grouped the same way
+        event_groups: Dict[int, List[Dict[str, Any]]] = {}
+        if 'event_type' in columns:
+            has_event = (df['event_type'].notna() & (codes >= 0)).to_numpy()
+            events = pd.DataFrame({
+                'event_type': df['event_type'],
+                'event_label': df['event_label'] if 'event_label' in columns else None,
+                'turn_id': df['turn_id']
+            })[has_event]
+            for code, event in zip(codes[has_event], _records(events)):
+                event_groups.setdefault(code, []).append(event)
         
-        turns = []
-        events = []
-        
-        for _, row in df.iterrows():
-            turn = {
-                'turn_id': row['turn_id'],
-                'speaker': row['speaker'],
-                'text': row['text'],
-                'timestamp': row.get('timestamp', None)
+        for code, transcript_id in enumerate(transcript_ids):
+            yield {
+                'transcript_id': transcript_id,
+                'turns': [turn_records[i] for i in order[bounds[code]:bounds[code + 1]]],
+                'events': event_groups.get(code, []),
+                'metadata': {}
             }
-            turns.append(turn)
-            
-            # Extract events if present
-            if 'event_type' in df.columns and pd.notna(row.get('event_type')):
-                event = {
-                    'event_type': row['event_type'],
-                    'event_label': row.get('event_label', None),
-                    'turn_id': row['turn_id']
-                }
-                events.append(event)
-        
-        return {
-            'transcript_id': transcript_id,
-            'turns': turns,
-            'events': events,
-            'metadata': {}
-        }
     
     def _load_txt(self, file_path: Path) -> Dict[str, Any]:
         """Load simple text format transcript"""
@@ -130,33 +215,219 @@ class TranscriptLoader:
     
     def load_batch(self, directory: str, pattern: str = "*.json") -> List[Dict[str, Any]]:
         """Load multiple transcripts from a directory"""
-        directory = Path(directory)
-        transcripts = []
+        return list(self.iter_transcripts(str(Path(directory) / pattern)))
+    
+    def iter_transcripts(
+        self,
+        inputs: Union[str, List[str]],
+        workers: int = 1,
+        chunk_size: int = 256
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream transcripts from files, directories or glob patterns.
+        
+        JSON Lines files are read one line at a time and CSV files in row
+        chunks, so neither is loaded in full (plain JSON lists still are). With workers > 1, files are
+        decompressed and parsed in worker processes and handed back in
+        chunks; transcripts of a file stay in order, but files interleave.
+        Unreadable files and lines are reported and skipped.
+        
+        Args:
+            inputs: File, directory, glob pattern (e.g. "data/raw/*.jsonl.gz"),
+                or a list of them
+            workers: Number of parsing processes
+            chunk_size: Transcripts per chunk sent back by a worker
+        
+        Yields:
+            Normalized transcript dictionaries
+        """
+        paths = self.expand_inputs(inputs)
+        
+        if workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                yield from self._iter_file_safe(path)
+            return
         
-        for file_path in directory.glob(pattern):
+        yield from self._iter_parallel(paths, workers, chunk_size)
+    
+    def expand_inputs(self, inputs: Union[str, List[str]]) -> List[Path]:
+        """
+        Resolve files, directories and glob patterns to supported files, in
+        sorted order.
+        
+        Directories and patterns skip files whose names start with '_' or
+        '.' (manifests and other side files of sharded exports).
+        """
+        if isinstance(inputs, (str, Path)):
+            inputs = [inputs]
+        
+        paths = []
+        seen = set()
+        for item in inputs:
+            item = str(item)
+            if glob.has_magic(item):
+                matches = [Path(match) for match in sorted(glob.glob(item, recursive=True))]
+            elif Path(item).is_dir():
+                matches = sorted(Path(item).iterdir())
+            elif Path(item).exists():
+                # Explicit files are taken as given
+                matches = [Path(item)]
+            else:
+                print(f"Transcript input not found: {item}")
+                continue
+            
+            for path in matches:
+                if path in seen or not path.is_file():
+                    continue
+                if path.name.startswith(('_', '.')) and str(path) != item:
+                    continue
+                if transcript_format(path) in self.supported_formats:
+                    seen.add(path)
+                    paths.append(path)
+        
+        return paths
+    
+    def iter_file(self, file_path: Path) -> Iterator[Dict[str, Any]]:
+        """Stream every transcript of one file"""
+        file_format = transcript_format(file_path)
+        
+        if file_format in JSONL_FORMATS:
+            yield from self._iter_jsonl(file_path)
+        elif file_format == '.csv':
+            yield from self._iter_csv(file_path)
+        elif file_format == '.json':
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                yield from self._iter_json_list(data, file_path)
+            else:
+                yield normalize_transcript(data, file_path.stem)
+        else:
+            yield self.load_transcript(str(file_path))
+    
+    def _iter_file_safe(self, file_path: Path) -> Iterator[Dict[str, Any]]:
+        """Stream a file, reporting rather than raising read errors"""
+        try:
+            yield from self.iter_file(file_path)
+        except Exception as e:
+            print(f"Error loading {file_path}: {e}")
+    
+    def _iter_json_list(self, data: List[Any], file_path: Path) -> Iterator[Dict[str, Any]]:
+        """Transcripts of a JSON list"""
+        for i, item in enumerate(data):
+            if isinstance(item, dict):
+                yield normalize_transcript(item, f"{file_path.stem}_{i}")
+    
+    def _iter_jsonl(self, file_path: Path) -> Iterator[Dict[str, Any]]:
+        """Stream the transcripts of a JSON Lines file, one line at a time"""
+        stem = file_path.name.split('.')[0]
+        
+        with self._open_text(file_path) as f:
+            for line_number, line in enumerate(f):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Error parsing line {line_number + 1} of {file_path}: {e}")
+                    continue
+                if isinstance(data, dict):
+                    yield normalize_transcript(data, f"{stem}_{line_number}")
+    
+    def _open_text(self, file_path: Path) -> TextIO:
+        """Open a possibly compressed text file for streaming"""
+        file_format = transcript_format(file_path)
+        
+        if file_format.endswith('.gz'):
+            return gzip.open(file_path, 'rt', encoding='utf-8')
+        
+        if file_format.endswith('.zst'):
             try:
-                # Check if file contains a list of transcripts
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                import zstandard
+            except ImportError:
+                raise ImportError("Reading .zst transcripts requires the zstandard package")
+            raw = open(file_path, 'rb')
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+            return io.TextIOWrapper(reader, encoding='utf-8')
+        
+        return open(file_path, 'r', encoding='utf-8')
+    
+    def _iter_parallel(
+        self,
+        paths: List[Path],
+        workers: int,
+        chunk_size: int
+    ) -> Iterator[Dict[str, Any]]:
+        """Parse files in worker processes and yield their chunks as they arrive"""
+        context = multiprocessing.get_context()
+        tasks = context.Queue()
+        # Bounded, so workers pause while the consumer is busy
+        results = context.Queue(maxsize=workers * 4)
+        
+        for path in paths:
+            tasks.put(str(path))
+        processes = [
+            context.Process(target=_parse_worker, args=(tasks, results, chunk_size), daemon=True)
+            for _ in range(min(workers, len(paths)))
+        ]
+        for process in processes:
+            tasks.put(None)
+            process.start()
+        
+        try:
+            finished = 0
+            while finished < len(processes):
+                try:
+                    kind, payload = results.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
+                        print("Transcript parsing workers exited unexpectedly")
+                        break
+                    continue
                 
-                if isinstance(data, list):
-                    # File contains list of transcripts
-                    for item in data:
-                        if isinstance(item, dict):
-                            transcript = {
-                                'transcript_id': item.get('transcript_id', f"{file_path.stem}_{len(transcripts)}"),
-                                'turns': item.get('turns', []),
-                                'events': item.get('events', []),
-                                'metadata': item.get('metadata', {})
-                            }
-                            transcripts.append(transcript)
+                if kind == 'chunk':
+                    yield from payload
+                elif kind == 'error':
+                    print(payload)
                 else:
-                    # Single transcript in file
-                    transcript = self.load_transcript(str(file_path))
-                    transcripts.append(transcript)
-            except Exception as e:
-                print(f"Error loading {file_path}: {e}")
-                continue
-        
-        return transcripts
+                    finished += 1
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
 
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame rows as dictionaries of Python values, missing values as None"""
+    columns = []
+    for name in df.columns:
+        values = df[name].astype(object)
+        columns.append(values.where(values.notna(), None).tolist())
+    keys = list(df.columns)
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+def _parse_worker(tasks, results, chunk_size: int):
+    """Worker process: stream assigned files and send back transcript chunks"""
+    loader = TranscriptLoader()
+    
+    while True:
+        path = tasks.get()
+        if path is None:
+            break
+        
+        chunk = []
+        try:
+            for transcript in loader.iter_file(Path(path)):
+                chunk.append(transcript)
+                if len(chunk) >= chunk_size:
+                    results.put(('chunk', chunk))
+                    chunk = []
+        except Exception as e:
+            results.put(('error', f"Error loading {path}: {e}"))
+        
+        if chunk:
+            results.put(('chunk', chunk))
+    
+    results.put(('done', None))
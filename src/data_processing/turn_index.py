@@ -0,0 +1,251 @@
+"""
+Persistent transcript-level turn index for constant-time event window lookup
+"""
+
+import json
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from pathlib import Path
+
+
+class TurnIndex:
+    """
+    Index of preprocessed turns keyed by transcript.
+    
+    Turns live in a SQLite table keyed by (transcript_id, turn_index), so an
+    event window is one primary-key range read straight from storage and
+    nothing is loaded into memory up front. A turn_id -> position index and
+    the transcript's events are stored next to them. Added transcripts are
+    written in one transaction that save() commits, so persisting only
+    writes the new rows.
+    
+    Args:
+        index_path: SQLite database file (None keeps the index in memory)
+    """
+    
+    def __init__(self, index_path: Optional[str] = None):
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        
+        if index_path:
+            Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self.conn = sqlite3.connect(
+            index_path or ":memory:",
+            check_same_thread=False,
+            timeout=30.0
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                transcript_id TEXT PRIMARY KEY,
+                num_turns INTEGER NOT NULL,
+                events TEXT NOT NULL DEFAULT '[]'
+            );
+            CREATE TABLE IF NOT EXISTS turns (
+                transcript_id TEXT NOT NULL,
+                turn_index INTEGER NOT NULL,
+                turn_id TEXT NOT NULL,
+                turn_key TEXT NOT NULL,
+                speaker TEXT,
+                text TEXT,
+                timestamp,
+                PRIMARY KEY (transcript_id, turn_index)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_turns_turn_key
+                ON turns (transcript_id, turn_key);
+        """)
+        self.conn.commit()
+    
+    def __contains__(self, transcript_id: str) -> bool:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM transcripts WHERE transcript_id = ?",
+                (transcript_id,)
+            ).fetchone()
+        return row is not None
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+    
+    def add_transcript(
+        self,
+        transcript_id: str,
+        turns: List[Dict[str, Any]],
+        events: Optional[List[Dict[str, Any]]] = None
+    ):
+        """
+        Add (or replace) the turns of a preprocessed transcript.
+        
+        Args:
+            transcript_id: Unique identifier for the transcript
+            turns: Preprocessed turn dictionaries, in dialogue order
+            events: Optional normalized events for the transcript
+        """
+        rows = []
+        for i, turn in enumerate(turns):
+            turn_id = turn.get('turn_id', i)
+            rows.append((
+                transcript_id,
+                i,
+                json.dumps(turn_id),
+                str(turn_id),
+                turn.get('speaker', 'unknown'),
+                turn.get('text', ''),
+                turn.get('timestamp')
+            ))
+        
+        with self._lock:
+            # Re-indexing a transcript replaces all of its turns
+            self.conn.execute("DELETE FROM turns WHERE transcript_id = ?", (transcript_id,))
+            self.conn.executemany(
+                "INSERT INTO turns (transcript_id, turn_index, turn_id, turn_key, speaker, text, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO transcripts (transcript_id, num_turns, events) VALUES (?, ?, ?)",
+                (transcript_id, len(rows), json.dumps(list(events or []), ensure_ascii=False))
+            )
+    
+    def get_turns(
+        self,
+        transcript_id: str,
+        start_index: int = 0,
+        end_index: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Slice turns of a transcript by turn index (end exclusive).
+        
+        Returns:
+            List of turn dictionaries, empty if the transcript is not indexed
+        """
+        start_index = max(0, start_index)
+        if end_index is not None and start_index >= end_index:
+            return []
+        
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT turn_index, turn_id, speaker, text, timestamp FROM turns "
+                "WHERE transcript_id = ? AND turn_index >= ? AND turn_index < ? "
+                "ORDER BY turn_index",
+                (transcript_id, start_index, end_index if end_index is not None else 2 ** 62)
+            ).fetchall()
+        
+        return [
+            {
+                'turn_id': json.loads(turn_id),
+                'speaker': speaker,
+                'text': text,
+                'timestamp': timestamp,
+                'turn_index': turn_index
+            }
+            for turn_index, turn_id, speaker, text, timestamp in rows
+        ]
+    
+    def get_turn_position(self, transcript_id: str, turn_id: Any) -> Optional[int]:
+        """Get the turn index of a turn_id within its transcript"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT turn_index FROM turns WHERE transcript_id = ? AND turn_key = ? "
+                "ORDER BY turn_index DESC LIMIT 1",
+                (transcript_id, str(turn_id))
+            ).fetchone()
+        return row[0] if row else None
+    
+    def get_event_window(
+        self,
+        transcript_id: str,
+        event: Dict[str, Any],
+        window_before: int = 10,
+        window_after: int = 5
+    ) -> Tuple[Optional[int], int, List[Dict[str, Any]]]:
+        """
+        Get the turns surrounding an event.
+        
+        Args:
+            transcript_id: Transcript the event belongs to
+            event: Event dictionary with turn_index or turn_id
+            window_before: Number of turns to include before event
+            window_after: Number of turns to include after event
+        
+        Returns:
+            Tuple of (event turn index, window start index, window turns).
+            The event turn index is None if the event cannot be located.
+        """
+        if 'turn_index' in event:
+            event_turn_index = event['turn_index']
+        elif 'turn_id' in event:
+            event_turn_index = self.get_turn_position(transcript_id, event['turn_id'])
+        else:
+            event_turn_index = None
+        
+        if event_turn_index is None:
+            return None, 0, []
+        
+        start_index = max(0, event_turn_index - window_before)
+        turns = self.get_turns(
+            transcript_id,
+            start_index,
+            event_turn_index + window_after + 1
+        )
+        
+        return event_turn_index, start_index, turns
+    
+    def get_events(
+        self,
+        transcript_id: str,
+        event_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get events of a transcript, optionally filtered by event type"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT events FROM transcripts WHERE transcript_id = ?",
+                (transcript_id,)
+            ).fetchone()
+        
+        events = json.loads(row[0]) if row else []
+        if event_type is None:
+            return events
+        
+        return [
+            e for e in events
+            if e.get('event_type', '').lower() == event_type.lower()
+        ]
+    
+    def save(self):
+        """Commit the transcripts added since the last save"""
+        with self._lock:
+            self.conn.commit()
+    
+    def import_json(self, json_path: str):
+        """
+        Add the transcripts of a JSON turn index written by earlier versions.
+        
+        Args:
+            json_path: turn_index.json with turns, offsets and events
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        turns = data.get('turns', [])
+        events = data.get('events', {})
+        for transcript_id, (start, end) in data.get('offsets', {}).items():
+            self.add_transcript(transcript_id, turns[start:end], events.get(transcript_id))
+        self.save()
+    
+    def clear(self):
+        """Remove all indexed transcripts"""
+        with self._lock:
+            self.conn.execute("DELETE FROM turns")
+            self.conn.execute("DELETE FROM transcripts")
+            self.conn.commit()
+    
+    def close(self):
+        """Commit pending writes and close the database"""
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
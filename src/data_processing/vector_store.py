@@ -3,13 +3,21 @@ Vector database integration for transcript storage and retrieval
 """
 
 import os
+import json
+import heapq
+import threading
 import warnings
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Optional, Collection
 from pathlib import Path
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from .event_index import EventIndex
+from .bm25_index import BM25Index
+from .sharding import ShardRouter
 
 # Suppress ChromaDB telemetry warnings
 warnings.filterwarnings("ignore", message=".*telemetry.*")
@@ -18,24 +26,88 @@ warnings.filterwarnings("ignore", message=".*telemetry.*")
 class VectorStore:
     """Manage vector database for transcript storage and retrieval"""
     
+    # Most span IDs pushed down to the database in one $in filter; larger
+    # candidate sets are searched in batches
+    MAX_ID_FILTER = 900
+    
+    # Over-fetch factor used when keyword results are filtered on metadata
+    ID_FILTER_OVERFETCH = 5
+    
+    COLLECTION_NAME = "transcript_spans"
+    
+    # Spans re-embedded per batch when migrating a Chroma collection
+    MIGRATION_BATCH_SIZE = 1000
+    
+    # Model of Chroma's default embedding function, which collections
+    # indexed before the embedding_model marker was written were embedded with
+    CHROMA_DEFAULT_MODEL = "all-MiniLM-L6-v2"
+    
     def __init__(
         self,
         db_type: str = "chromadb",
         db_path: Optional[str] = None,
-        embedding_model: str = "all-MiniLM-L6-v2"
+        embedding_model: str = "all-MiniLM-L6-v2",
+        index_type: str = "hnsw",
+        nprobe: int = 16,
+        ef_search: int = 64,
+        index_options: Optional[Dict[str, Any]] = None,
+        sharding: Optional[str] = None,
+        num_shards: int = 8,
+        max_active_shards: Optional[int] = None,
+        max_workers: int = 8,
+        shard_options: Optional[Dict[str, Any]] = None,
+        reembed: bool = False,
+        keyword_index: bool = False
     ):
         self.db_type = db_type
         self.db_path = db_path or "./data/processed/vector_db"
         self.embedding_model_name = embedding_model
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.index_options = index_options or {}
+        # Re-embed Chroma collections holding another model's vectors when
+        # they are opened (an offline step, see reembed_collections)
+        self.reembed = reembed
         
         # Initialize embedding model
         self.embedding_model = SentenceTransformer(embedding_model)
         
+        # Optional sharding: one collection / FAISS index per shard
+        self.shard_router = ShardRouter(
+            strategy=sharding,
+            num_shards=num_shards,
+            **(shard_options or {})
+        ) if sharding else None
+        self.max_active_shards = max_active_shards
+        self.max_workers = max_workers
+        self.shards: Dict[str, Any] = {}
+        self.shard_keys: List[str] = []
+        self._shard_lock = threading.Lock()
+        # Created up front: searches may run concurrently (threads start on first use)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if self.shard_router is not None else None
+        
         # Initialize vector database
         if db_type == "chromadb":
             self._init_chromadb()
+        elif db_type == "faiss":
+            self._init_faiss()
         else:
             raise ValueError(f"Unsupported database type: {db_type}")
+        
+        if self.shard_router is not None:
+            self._load_shard_manifest()
+        
+        # Event posting lists are stored next to the vector database
+        self.event_index = EventIndex(
+            index_path=str(Path(self.db_path) / "event_index.json")
+        )
+        
+        # Keyword index for hybrid retrieval, built alongside the embeddings
+        # (only kept when hybrid retrieval is enabled)
+        self.bm25_index = BM25Index(
+            index_path=str(Path(self.db_path) / "bm25_index.json")
+        ) if keyword_index else None
     
     def _init_chromadb(self):
         """Initialize ChromaDB"""
@@ -49,17 +121,199 @@ class VectorStore:
             settings=Settings(anonymized_telemetry=False)
         )
         
-        # Create or get collection
-        self.collection = self.client.get_or_create_collection(
-            name="transcript_spans",
-            metadata={"description": "Dialogue spans from transcripts"}
+        # Create or get collection (shard collections are opened on demand)
+        if self.shard_router is None:
+            self.collection = self._open_collection(
+                self.COLLECTION_NAME,
+                "Dialogue spans from transcripts"
+            )
+    
+    def _open_collection(
+        self,
+        name: str,
+        description: str,
+        unmarked_model: Optional[str] = None
+    ):
+        """
+        Open (or create) a Chroma collection embedded with our embedding model.
+        
+        Spans and queries are embedded with self.embedding_model, never with
+        Chroma's embedding function, and the model is recorded in the
+        collection metadata. An unmarked collection embedded with the same
+        model is only marked. A non-empty collection embedded with another
+        model is re-embedded when reembed is set, and refused otherwise.
+        
+        Args:
+            name: Collection name
+            description: Collection description
+            unmarked_model: Model an existing collection without the
+                embedding_model marker was embedded with (default: Chroma's default)
+        
+        Raises:
+            ValueError: If the collection holds another model's vectors and
+                reembed is not set
+        """
+        metadata = {"description": description, "embedding_model": self.embedding_model_name}
+        collection = self.client.get_or_create_collection(name=name, metadata=metadata)
+        
+        marker = (collection.metadata or {}).get('embedding_model')
+        embedded_with = marker or unmarked_model or self.CHROMA_DEFAULT_MODEL
+        if embedded_with == self.embedding_model_name or collection.count() == 0:
+            if marker != self.embedding_model_name:
+                collection.modify(metadata=metadata)
+            return collection
+        
+        if not self.reembed:
+            raise ValueError(
+                f"Collection {name} was embedded with {embedded_with}, not {self.embedding_model_name}; "
+                f"re-embed it with scripts/process_data.py --reembed"
+            )
+        
+        return self._migrate_collection(collection, name, metadata)
+    
+    def _migrate_collection(self, collection: Any, name: str, metadata: Dict[str, Any]):
+        """Re-embed every span of a collection with the configured model"""
+        print(f"Re-embedding collection {name} with {self.embedding_model_name}...")
+        
+        # Build the new collection next to the old one, so an interrupted
+        # migration leaves the original intact
+        tmp_name = f"{name}_migrating"
+        try:
+            self.client.delete_collection(name=tmp_name)
+        except Exception:
+            pass
+        migrated = self.client.create_collection(name=tmp_name, metadata=metadata)
+        
+        total = collection.count()
+        for offset in range(0, total, self.MIGRATION_BATCH_SIZE):
+            batch = collection.get(
+                limit=self.MIGRATION_BATCH_SIZE,
+                offset=offset,
+                include=['documents', 'metadatas']
+            )
+            if not batch['ids']:
+                break
+            migrated.add(
+                ids=batch['ids'],
+                documents=batch['documents'],
+                metadatas=batch['metadatas'],
+                embeddings=self._embed(batch['documents']).tolist()
+            )
+        
+        self.client.delete_collection(name=name)
+        migrated.modify(name=name)
+        print(f"Re-embedded {total} spans")
+        return migrated
+    
+    def reembed_collections(self):
+        """
+        Re-embed every Chroma collection with the configured model.
+        
+        Needs reembed=True: the unsharded collection is migrated when the
+        store is opened, shard collections when they are opened here. Run it
+        from a single offline process (scripts/process_data.py --reembed),
+        never while API workers have the store open.
+        """
+        if not self.reembed:
+            raise ValueError("Re-embedding requires a VectorStore opened with reembed=True")
+        
+        if self.db_type == "chromadb" and self.shard_router is not None:
+            for shard_key in list(self.shard_keys):
+                self._get_shard(shard_key)
+    
+    def _init_faiss(self):
+        """Initialize FAISS index with SQLite metadata sidecar"""
+        if self.shard_router is None:
+            self.faiss_store = self._open_faiss(self.db_path)
+    
+    def _open_faiss(self, path: str):
+        """Open (or create) a FAISS store at a path"""
+        from .faiss_store import FaissStore
+        
+        return FaissStore(
+            db_path=path,
+            dimension=self.embedding_model.get_sentence_embedding_dimension(),
+            index_type=self.index_type,
+            nprobe=self.nprobe,
+            ef_search=self.ef_search,
+            **self.index_options
         )
     
+    @property
+    def _manifest_path(self) -> Path:
+        return Path(self.db_path) / "shards.json"
+    
+    def _load_shard_manifest(self):
+        """Load the list of known shards"""
+        if self._manifest_path.exists():
+            with open(self._manifest_path, 'r', encoding='utf-8') as f:
+                self.shard_keys = json.load(f).get('shards', [])
+    
+    def _save_shard_manifest(self):
+        """Persist the list of known shards"""
+        self._manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        data = {
+            'strategy': self.shard_router.strategy,
+            'shards': self.shard_keys
+        }
+        
+        tmp_path = Path(str(self._manifest_path) + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        tmp_path.replace(self._manifest_path)
+    
+    def _get_shard(self, shard_key: str):
+        """Get a shard's collection or FAISS store, opening it on first use"""
+        shard = self.shards.get(shard_key)
+        if shard is not None:
+            return shard
+        
+        with self._shard_lock:
+            if shard_key not in self.shards:
+                if self.db_type == "faiss":
+                    self.shards[shard_key] = self._open_faiss(
+                        str(Path(self.db_path) / "shards" / shard_key)
+                    )
+                else:
+                    # Shards were always embedded with the configured model
+                    self.shards[shard_key] = self._open_collection(
+                        f"{self.COLLECTION_NAME}_{shard_key}",
+                        f"Dialogue spans from transcripts (shard {shard_key})",
+                        unmarked_model=self.embedding_model_name
+                    )
+                
+                if shard_key not in self.shard_keys:
+                    self.shard_keys.append(shard_key)
+        
+        return self.shards[shard_key]
+    
+    def _select_shards(self, filter_dict: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Get the shards a query has to visit"""
+        selected = self.shard_router.select_shards(self.shard_keys, filter_dict)
+        
+        # Without a filter that pins shards, only the active shards are searched
+        if self.max_active_shards and self.shard_router.pinned_shards(filter_dict) is None:
+            selected = self.shard_router.recent_shards(selected, self.max_active_shards)
+        
+        return selected
+    
+    def _map_shards(self, func, shard_keys: List[str]) -> List[Any]:
+        """Run a function over shards in parallel, preserving order"""
+        if len(shard_keys) == 1:
+            return [func(self._get_shard(shard_keys[0]))]
+        
+        return list(self._executor.map(
+            lambda shard_key: func(self._get_shard(shard_key)),
+            shard_keys
+        ))
+    
     def add_transcript_spans(
         self,
         transcript_id: str,
         spans: List[Dict[str, Any]],
-        events: Optional[List[Dict[str, Any]]] = None
+        events: Optional[List[Dict[str, Any]]] = None,
+        transcript_metadata: Optional[Dict[str, Any]] = None
     ):
         """
         Add dialogue spans from a transcript to the vector database.
@@ -68,10 +322,15 @@ class VectorStore:
             transcript_id: Unique identifier for the transcript
             spans: List of dialogue span dictionaries
             events: List of events associated with the transcript
+            transcript_metadata: Transcript-level metadata used for shard routing
         """
         if not spans:
             return
         
+        shard_key = None
+        if self.shard_router is not None:
+            shard_key = self.shard_router.shard_for(transcript_id, transcript_metadata)
+        
         # Prepare documents and metadata
         documents = []
         metadatas = []
@@ -94,43 +353,63 @@ class VectorStore:
                 'end_turn_index': span.get('end_turn_index', -1),
                 'turn_ids': str(span.get('turn_ids', [])),
                 'speakers': ','.join(span.get('speakers', [])),
-                'window_size': span.get('metadata', {}).get('window_size', 5)
+                'window_size': span.get('metadata', {}).get('window_size', 5),
+                'granularity': span.get('metadata', {}).get('granularity', 'fine')
             }
             
+            if shard_key is not None:
+                metadata['shard'] = shard_key
+                if self.shard_router.strategy == 'tenant':
+                    metadata[self.shard_router.tenant_field] = shard_key
+            
             # Add event information if available
+            span_event_types = []
             if events:
-                # Find events that occur in or after this span
-                span_events = [
-                    e for e in events
-                    if e.get('turn_id') and e.get('turn_id') in span.get('turn_ids', [])
-                ]
-                if span_events:
-                    metadata['has_event'] = True
-                    metadata['event_types'] = ','.join([e.get('event_type', '') for e in span_events])
-                else:
-                    metadata['has_event'] = False
-                    metadata['event_types'] = ''
-            else:
-                metadata['has_event'] = False
-                metadata['event_types'] = ''
+                span_event_types = self.event_index.add_span(
+                    {**span, 'span_id': span_id},
+                    events
+                )
+            
+            metadata['has_event'] = bool(span_event_types)
+            metadata['event_types'] = ','.join(span_event_types)
             
             documents.append(text)
             metadatas.append(metadata)
             ids.append(span_id)
+            
+            if self.bm25_index is not None:
+                self.bm25_index.add(span_id, text)
         
         # Add to collection
         if documents:
-            self.collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
+            if shard_key is not None:
+                shard = self._get_shard(shard_key)
+            else:
+                shard = self.faiss_store if self.db_type == "faiss" else self.collection
+            
+            if self.db_type == "faiss":
+                shard.add(
+                    ids=ids,
+                    embeddings=self._embed(documents),
+                    documents=documents,
+                    metadatas=metadatas
+                )
+            else:
+                # Embed with our model, so precomputed query vectors match
+                shard.add(
+                    documents=documents,
+                    metadatas=metadatas,
+                    ids=ids,
+                    embeddings=self._embed(documents).tolist()
+                )
     
     def search(
         self,
         query: str,
         n_results: int = 10,
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        span_ids: Optional[Collection[str]] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for relevant dialogue spans.
@@ -139,18 +418,235 @@ class VectorStore:
             query: Search query text
             n_results: Number of results to return
             filter_dict: Optional metadata filters
+            span_ids: Optional set of span IDs to restrict results to
+            query_embedding: Optional precomputed normalized query vector
+                (from the same embedding model) used instead of encoding query
         
         Returns:
             List of search results with metadata
         """
-        # Build where clause for filtering
-        where = None
-        if filter_dict:
-            where = filter_dict
+        if span_ids is not None and not span_ids:
+            return []
+        
+        if query_embedding is not None:
+            query_embedding = np.asarray(query_embedding, dtype=np.float32)
+        
+        if self.shard_router is None:
+            shard = self.faiss_store if self.db_type == "faiss" else self.collection
+            return self._search_shard(shard, query, query_embedding, n_results, filter_dict, span_ids)
+        
+        shard_keys = self._select_shards(filter_dict)
+        if not shard_keys:
+            return []
+        
+        # Encode once and fan out; each shard returns results by distance
+        if query_embedding is None:
+            query_embedding = self._embed([query])[0]
+        shard_results = self._map_shards(
+            lambda shard: self._search_shard(
+                shard, query, query_embedding, n_results, filter_dict, span_ids
+            ),
+            shard_keys
+        )
+        
+        merged = heapq.merge(
+            *shard_results,
+            key=lambda r: r['distance'] if r.get('distance') is not None else float('inf')
+        )
+        return list(islice(merged, n_results))
+    
+    def _search_shard(
+        self,
+        shard: Any,
+        query: str,
+        query_embedding: Optional[np.ndarray],
+        n_results: int,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        span_ids: Optional[Collection[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Search a single collection or FAISS store"""
+        # FAISS restricts candidates with an ID selector inside the index
+        if self.db_type == "faiss":
+            if query_embedding is None:
+                query_embedding = self._embed([query])[0]
+            return shard.search(
+                query_embedding,
+                n_results=n_results,
+                where=filter_dict,
+                span_ids=span_ids
+            )
+        
+        if span_ids is None:
+            return self._query(shard, query, query_embedding, n_results, filter_dict)
+        
+        # Candidate sets are pushed down as ID filters of at most
+        # MAX_ID_FILTER IDs; each batch returns its nearest spans and the
+        # batches are merged by distance
+        if query_embedding is None:
+            query_embedding = self._embed([query])[0]
+        
+        candidates = list(span_ids)
+        batch_results = []
+        for start in range(0, len(candidates), self.MAX_ID_FILTER):
+            batch = candidates[start:start + self.MAX_ID_FILTER]
+            id_filter = {'span_id': {'$in': batch}}
+            batch_results.append(self._query(
+                shard,
+                query,
+                query_embedding,
+                min(n_results, len(batch)),
+                {'$and': [filter_dict, id_filter]} if filter_dict else id_filter
+            ))
+        
+        if len(batch_results) == 1:
+            return batch_results[0]
+        
+        merged = heapq.merge(
+            *batch_results,
+            key=lambda r: r['distance'] if r.get('distance') is not None else float('inf')
+        )
+        return list(islice(merged, n_results))
+    
+    def keyword_search(
+        self,
+        query: str,
+        n_results: int = 10,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        span_ids: Optional[Collection[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for dialogue spans with BM25 keyword scoring.
+        
+        Args:
+            query: Search query text
+            n_results: Number of results to return
+            filter_dict: Optional metadata filters
+            span_ids: Optional set of span IDs to restrict results to
+        
+        Returns:
+            List of search results with metadata and bm25_score
+        
+        Raises:
+            ValueError: If the store was opened without a keyword index
+        """
+        if self.bm25_index is None:
+            raise ValueError("Keyword search requires a VectorStore opened with keyword_index=True")
+        
+        if span_ids is not None and not span_ids:
+            return []
+        
+        if span_ids is not None and not isinstance(span_ids, (set, frozenset)):
+            span_ids = set(span_ids)
+        
+        # Metadata filters are applied after scoring, so over-fetch
+        fetch_k = n_results * self.ID_FILTER_OVERFETCH if filter_dict else n_results
+        hits = self.bm25_index.search(query, n_results=fetch_k, span_ids=span_ids)
+        if not hits:
+            return []
+        
+        spans = {
+            span['span_id']: span
+            for span in self.get_spans([span_id for span_id, _ in hits], filter_dict)
+        }
+        
+        results = []
+        for span_id, score in hits:
+            if span_id in spans:
+                results.append({**spans[span_id], 'bm25_score': score})
+        
+        return results[:n_results]
+    
+    def get_spans(
+        self,
+        span_ids: List[str],
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch stored spans by span ID, optionally filtered on metadata"""
+        if not span_ids:
+            return []
+        
+        if self.shard_router is None:
+            shard = self.faiss_store if self.db_type == "faiss" else self.collection
+            return self._get_shard_spans(shard, span_ids, filter_dict)
+        
+        shard_results = self._map_shards(
+            lambda shard: self._get_shard_spans(shard, span_ids, filter_dict),
+            self._select_shards(filter_dict)
+        )
+        return [span for spans in shard_results for span in spans]
+    
+    def _get_shard_spans(
+        self,
+        shard: Any,
+        span_ids: List[str],
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch spans by ID from a single collection or FAISS store"""
+        if self.db_type == "faiss":
+            return shard.get(span_ids, where=filter_dict)
+        
+        results = shard.get(
+            ids=span_ids,
+            where=filter_dict,
+            include=['documents', 'metadatas']
+        )
+        
+        return [
+            {
+                'span_id': span_id,
+                'text': results['documents'][i],
+                'metadata': results['metadatas'][i]
+            }
+            for i, span_id in enumerate(results['ids'])
+        ]
+    
+    def get_span_vectors(self, span_ids: List[str]) -> Dict[str, tuple]:
+        """
+        Fetch stored (document, embedding) pairs by span ID.
+        
+        Returns:
+            Dictionary of span_id -> (document text, embedding) for the
+            span IDs found in the store
+        """
+        if not span_ids:
+            return {}
+        
+        if self.shard_router is None:
+            shards = [self.faiss_store if self.db_type == "faiss" else self.collection]
+        else:
+            shards = [self._get_shard(shard_key) for shard_key in self._select_shards()]
+        
+        vectors = {}
+        for shard in shards:
+            if self.db_type == "faiss":
+                vectors.update(shard.get_vectors(span_ids))
+                continue
+            
+            results = shard.get(ids=span_ids, include=['documents', 'embeddings'])
+            for i, span_id in enumerate(results['ids']):
+                vectors[span_id] = (
+                    results['documents'][i],
+                    np.asarray(results['embeddings'][i], dtype=np.float32)
+                )
+        
+        return vectors
+    
+    def _query(
+        self,
+        collection: Any,
+        query: str,
+        query_embedding: Optional[np.ndarray],
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Run a query against a collection and format the results"""
+        # Collections hold our model's vectors, so queries are embedded here too
+        if query_embedding is None:
+            query_embedding = self._embed([query])[0]
         
         # Perform search
-        results = self.collection.query(
-            query_texts=[query],
+        results = collection.query(
+            query_embeddings=[query_embedding.tolist()],
             n_results=n_results,
             where=where
         )
@@ -173,11 +669,64 @@ class VectorStore:
         """Get embeddings for a list of texts"""
         return self.embedding_model.encode(texts, show_progress_bar=False)
     
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Get L2-normalized float32 embeddings for indexing and search"""
+        return self.embedding_model.encode(
+            texts,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        ).astype(np.float32)
+    
+    def set_search_params(
+        self,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ):
+        """Tune FAISS nprobe / efSearch for subsequent searches"""
+        if self.db_type != "faiss":
+            return
+        
+        self.nprobe = nprobe if nprobe is not None else self.nprobe
+        self.ef_search = ef_search if ef_search is not None else self.ef_search
+        
+        stores = [self.faiss_store] if self.shard_router is None else list(self.shards.values())
+        for store in stores:
+            store.set_search_params(nprobe=nprobe, ef_search=ef_search)
+    
+    def persist(self):
+        """Persist the index and the auxiliary indexes stored next to it"""
+        if self.db_type == "faiss":
+            stores = [self.faiss_store] if self.shard_router is None else list(self.shards.values())
+            for store in stores:
+                store.persist()
+        if self.shard_router is not None:
+            self._save_shard_manifest()
+        self.event_index.save()
+        if self.bm25_index is not None:
+            self.bm25_index.save()
+    
     def clear_collection(self):
         """Clear all data from the collection"""
-        self.client.delete_collection(name="transcript_spans")
-        self.collection = self.client.get_or_create_collection(
-            name="transcript_spans",
-            metadata={"description": "Dialogue spans from transcripts"}
-        )
-
+        if self.shard_router is not None:
+            for shard_key in list(self.shard_keys):
+                if self.db_type == "faiss":
+                    self._get_shard(shard_key).reset()
+                else:
+                    self.client.delete_collection(name=f"{self.COLLECTION_NAME}_{shard_key}")
+            self.shards = {}
+            self.shard_keys = []
+            self._save_shard_manifest()
+        elif self.db_type == "faiss":
+            self.faiss_store.reset()
+        else:
+            self.client.delete_collection(name=self.COLLECTION_NAME)
+            self.collection = self._open_collection(
+                self.COLLECTION_NAME,
+                "Dialogue spans from transcripts"
+            )
+        self.event_index.clear()
+        self.event_index.save()
+        if self.bm25_index is not None:
+            self.bm25_index.clear()
+            self.bm25_index.save()
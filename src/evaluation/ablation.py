@@ -0,0 +1,208 @@
+"""
+Staged ablation engine that reuses shared pipeline stage outputs
+"""
+
+import threading
+from functools import partial
+from typing import List, Dict, Any, Optional
+from .parallel_runner import ParallelRunner, fingerprint
+from ..explanation_generation.llm_generator import LLMGenerator
+from ..explanation_generation.llm_client import CompletionCache
+from ..system import System
+
+
+class AblationEngine:
+    """
+    Run ablation variants of the system from cached stage outputs.
+    
+    Each query's stages run once: query parsing, first-stage candidates
+    (ANN search and fusion), the reranked list and the causally analyzed
+    spans. Every variant is assembled from those intermediates:
+        - full_system: analyzed spans
+        - without_retrieval: no evidence
+        - without_reranking: analyzed first-stage candidates
+        - without_causal_analysis: reranked spans as retrieved
+        - without_llm: evidence listed without generation
+    
+    Only explanation generation runs per variant, through a completion
+    cache, so variants that end up with identical prompts cost one call.
+    """
+    
+    SUPPORTED_COMPONENTS = ['retrieval', 'reranking', 'causal_analysis', 'llm']
+    
+    def __init__(
+        self,
+        system: System,
+        completion_cache: Optional[CompletionCache] = None,
+        top_k: int = 20,
+        rerank_top_k: int = 10
+    ):
+        self.system = system
+        self.retrieval_pipeline = system.retrieval_pipeline
+        self.causal_analyzer = system.causal_analyzer
+        self.query_parser = system.task1_processor.query_parser
+        self.top_k = top_k
+        self.rerank_top_k = rerank_top_k
+        
+        # Same provider, model and packing as the system, plus the completion cache
+        generator = system.explanation_generator.llm_generator
+        self.completion_cache = completion_cache or CompletionCache()
+        self.llm_generator = LLMGenerator(
+            provider=generator.provider,
+            model=generator.model,
+            prompt_packer=generator.prompt_packer,
+            completion_cache=self.completion_cache
+        )
+        
+        self.stage_cache: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def get_stages(self, query: str) -> Dict[str, Any]:
+        """Compute (or get cached) stage outputs of a query"""
+        with self._lock:
+            if query in self.stage_cache:
+                return self.stage_cache[query]
+        
+        parsed_query = self.query_parser.parse_query(query)
+        event_type = parsed_query.get('event_type')
+        
+        candidates = self.retrieval_pipeline.retrieve_candidates(query=query, top_k=self.top_k)
+        reranked = self.retrieval_pipeline.rerank_candidates(query, candidates, self.rerank_top_k)
+        analyzed = self.causal_analyzer.analyze_causal_spans(
+            spans=reranked,
+            query=query,
+            event_type=event_type,
+            top_k=self.rerank_top_k
+        )
+        
+        stages = {
+            'parsed_query': parsed_query,
+            'candidates': candidates,
+            'reranked': reranked,
+            'analyzed': analyzed
+        }
+        with self._lock:
+            self.stage_cache[query] = stages
+        return stages
+    
+    def get_variant_evidence(self, query: str, component: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the evidence a variant explains from.
+        
+        Args:
+            query: Query text
+            component: Ablated component (None for the full system)
+        
+        Returns:
+            Evidence spans of the variant
+        """
+        stages = self.get_stages(query)
+        
+        if component == 'retrieval':
+            return []
+        if component == 'causal_analysis':
+            return stages['reranked']
+        if component == 'reranking':
+            with self._lock:
+                unreranked = stages.get('analyzed_unreranked')
+            if unreranked is None:
+                unreranked = self.causal_analyzer.analyze_causal_spans(
+                    spans=stages['candidates'][:self.rerank_top_k],
+                    query=query,
+                    event_type=stages['parsed_query'].get('event_type'),
+                    top_k=self.rerank_top_k
+                )
+                with self._lock:
+                    stages['analyzed_unreranked'] = unreranked
+            return unreranked
+        return stages['analyzed']
+    
+    def run_query(self, query: str, components: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Run the full system and every ablated variant for one query"""
+        variants = {'full_system': None}
+        variants.update({f'without_{component}': component for component in components})
+        
+        results = {}
+        for name, component in variants.items():
+            evidence = self.get_variant_evidence(query, component)
+            
+            if component == 'llm':
+                response = self._format_evidence_response(evidence)
+            else:
+                response = self.llm_generator.generate_with_citations(
+                    query=query,
+                    evidence=evidence
+                )['explanation']
+            
+            results[name] = {
+                'query': query,
+                'response': response,
+                'evidence_count': len(evidence)
+            }
+        
+        return results
+    
+    def run(
+        self,
+        queries: List[str],
+        components: List[str],
+        max_workers: int = 4,
+        checkpoint_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the ablation over a set of queries.
+        
+        Args:
+            queries: Test queries
+            components: Components to ablate
+            max_workers: Number of queries processed concurrently
+            checkpoint_path: Optional JSON Lines file for resuming
+        
+        Returns:
+            Dictionary with per-variant results and stage/LLM cache statistics
+        """
+        unsupported = [c for c in components if c not in self.SUPPORTED_COMPONENTS]
+        if unsupported:
+            raise ValueError(f"Unsupported ablation components: {unsupported}")
+        
+        runner = ParallelRunner(
+            max_workers=max_workers,
+            checkpoint_path=checkpoint_path,
+            run_params={
+                'task': 'ablation',
+                'components': list(components),
+                'top_k': self.top_k,
+                'rerank_top_k': self.rerank_top_k
+            }
+        )
+        jobs = [
+            (f"ablation:{i}:{fingerprint(query)}", partial(self.run_query, query, components))
+            for i, query in enumerate(queries)
+        ]
+        query_results = runner.run(jobs, description="ablation queries")
+        
+        ablation_results = {'full_system': []}
+        ablation_results.update({f'without_{component}': [] for component in components})
+        for variants in query_results.values():
+            for name, row in variants.items():
+                ablation_results[name].append(row)
+        
+        return {
+            'ablation_results': ablation_results,
+            'stats': {
+                'queries_staged': len(self.stage_cache),
+                'completion_cache': self.completion_cache.get_stats()
+            }
+        }
+    
+    def _format_evidence_response(self, evidence: List[Dict[str, Any]]) -> str:
+        """Evidence-only response used when the LLM is ablated"""
+        if not evidence:
+            return "No relevant information found."
+        
+        response_parts = []
+        for i, span in enumerate(evidence[:5], 1):
+            text = span.get('text', '')
+            response_parts.append(f"[Evidence {i}] {text[:200]}...")
+        
+        return "Based on the following evidence:\n\n" + "\n\n".join(response_parts)
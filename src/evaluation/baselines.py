@@ -4,7 +4,8 @@ Baseline implementations for comparison
 
 from typing import List, Dict, Any, Optional
 import re
-from collections import Counter
+import numpy as np
+from .corpus_index import get_corpus_index, normalize_rows
 
 
 class KeywordSearchBaseline:
@@ -20,25 +21,13 @@ class KeywordSearchBaseline:
         top_k: int = 10
     ) -> List[Dict[str, Any]]:
         """Search using keyword matching"""
-        query_words = set(query.lower().split())
-        
-        scored_spans = []
-        for span in spans:
-            text = span.get('text', '').lower()
-            text_words = set(text.split())
-            
-            # Calculate keyword overlap
-            overlap = len(query_words.intersection(text_words))
-            score = overlap / len(query_words) if query_words else 0.0
-            
-            span_copy = span.copy()
-            span_copy['score'] = score
-            scored_spans.append(span_copy)
-        
-        # Sort by score
-        scored_spans.sort(key=lambda x: x.get('score', 0.0), reverse=True)
-        
-        return scored_spans[:top_k]
+        index = get_corpus_index(spans)
+        overlap, num_query_words = index.keyword_overlap(query)
+        
+        # Calculate keyword overlap
+        scores = overlap / num_query_words if num_query_words else np.zeros(len(index))
+        
+        return index.top_k(scores, top_k)
     
     def generate_response(
         self,
@@ -67,12 +56,8 @@ class SimpleRAGBaseline:
     
     def __init__(self, embedding_model: str = "all-MiniLM-L6-v2"):
         from sentence_transformers import SentenceTransformer
-        from sklearn.metrics.pairwise import cosine_similarity
-        import numpy as np
         
         self.embedding_model = SentenceTransformer(embedding_model)
-        self.cosine_similarity = cosine_similarity
-        self.np = np
     
     def search(
         self,
@@ -84,37 +69,20 @@ class SimpleRAGBaseline:
         if not spans:
             return []
         
-        # Get embeddings
+        # Span embeddings are encoded once per corpus and reused across queries
+        index = get_corpus_index(spans)
+        span_embeddings = index.embeddings(self.embedding_model)
+        
         query_embedding = self.embedding_model.encode(
             query,
             convert_to_numpy=True,
             show_progress_bar=False
         )
         
-        span_texts = [span.get('text', '') for span in spans]
-        span_embeddings = self.embedding_model.encode(
-            span_texts,
-            convert_to_numpy=True,
-            show_progress_bar=False
-        )
-        
-        # Calculate similarities
-        similarities = self.cosine_similarity(
-            query_embedding.reshape(1, -1),
-            span_embeddings
-        )[0]
-        
-        # Add scores to spans
-        scored_spans = []
-        for i, span in enumerate(spans):
-            span_copy = span.copy()
-            span_copy['score'] = float(similarities[i])
-            scored_spans.append(span_copy)
+        # Cosine similarity of normalized vectors
+        similarities = span_embeddings @ normalize_rows(np.asarray(query_embedding, dtype=np.float32))
         
-        # Sort by score
-        scored_spans.sort(key=lambda x: x.get('score', 0.0), reverse=True)
-        
-        return scored_spans[:top_k]
+        return index.top_k(similarities, top_k)
     
     def generate_response(
         self,
@@ -158,6 +126,19 @@ class RuleBasedBaseline:
                 r'terminate', r'close.*service'
             ]
         }
+        
+        self.compiled_patterns = {
+            event: [re.compile(pattern) for pattern in patterns]
+            for event, patterns in self.event_patterns.items()
+        }
+    
+    def detect_event_type(self, query: str) -> Optional[str]:
+        """Get the first event type whose patterns match the query"""
+        query_lower = query.lower()
+        for event, patterns in self.compiled_patterns.items():
+            if any(pattern.search(query_lower) for pattern in patterns):
+                return event
+        return None
     
     def search(
         self,
@@ -167,41 +148,25 @@ class RuleBasedBaseline:
         top_k: int = 10
     ) -> List[Dict[str, Any]]:
         """Search using rule-based patterns"""
-        query_lower = query.lower()
-        
         # Determine event type if not provided
         if not event_type:
-            for event, patterns in self.event_patterns.items():
-                if any(re.search(pattern, query_lower) for pattern in patterns):
-                    event_type = event
-                    break
-        
-        # Score spans based on patterns
-        scored_spans = []
-        for span in spans:
-            text = span.get('text', '').lower()
-            score = 0.0
-            
-            # Match event-specific patterns
-            if event_type and event_type in self.event_patterns:
-                patterns = self.event_patterns[event_type]
-                matches = sum(1 for pattern in patterns if re.search(pattern, text))
-                score += matches / len(patterns) if patterns else 0.0
-            
-            # Match query keywords
-            query_words = set(query_lower.split())
-            text_words = set(text.split())
-            keyword_overlap = len(query_words.intersection(text_words))
-            score += keyword_overlap / len(query_words) if query_words else 0.0
-            
-            span_copy = span.copy()
-            span_copy['score'] = score
-            scored_spans.append(span_copy)
-        
-        # Sort by score
-        scored_spans.sort(key=lambda x: x.get('score', 0.0), reverse=True)
-        
-        return scored_spans[:top_k]
+            event_type = self.detect_event_type(query)
+        
+        index = get_corpus_index(spans)
+        scores = np.zeros(len(index))
+        
+        # Match event-specific patterns
+        if event_type and event_type in self.event_patterns:
+            patterns = self.event_patterns[event_type]
+            if patterns:
+                scores += index.pattern_hits(patterns).sum(axis=1) / len(patterns)
+        
+        # Match query keywords
+        overlap, num_query_words = index.keyword_overlap(query)
+        if num_query_words:
+            scores += overlap / num_query_words
+        
+        return index.top_k(scores, top_k)
     
     def generate_response(
         self,
@@ -210,12 +175,7 @@ class RuleBasedBaseline:
     ) -> str:
         """Generate rule-based response"""
         # Extract event type from query
-        event_type = None
-        query_lower = query.lower()
-        for event, patterns in self.event_patterns.items():
-            if any(re.search(pattern, query_lower) for pattern in patterns):
-                event_type = event
-                break
+        event_type = self.detect_event_type(query)
         
         top_spans = self.search(query, spans, event_type=event_type, top_k=5)
         
@@ -0,0 +1,143 @@
+"""
+Shared precomputed representation of a span corpus for baseline search
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple
+import numpy as np
+from scipy import sparse
+
+
+class CorpusIndex:
+    """
+    Vectorized view of a list of spans.
+    
+    Built once per corpus and shared by the baselines:
+        - term_matrix: binary CSR matrix (spans x vocabulary) of the
+          lowercased whitespace tokens of each span
+        - pattern hit matrices: boolean (spans x patterns) matrices of regex
+          matches, one per pattern set
+        - embedding matrices: normalized span embeddings, one per model
+    
+    Query-time scoring is then a sparse or dense matrix-vector product.
+    """
+    
+    def __init__(self, spans: List[Dict[str, Any]]):
+        self.spans = spans
+        self.texts = [span.get('text', '').lower() for span in spans]
+        
+        # Binary term matrix over the same tokens the baselines always used
+        self.vocabulary: Dict[str, int] = {}
+        indices = []
+        indptr = [0]
+        for text in self.texts:
+            columns = {
+                self.vocabulary.setdefault(word, len(self.vocabulary))
+                for word in text.split()
+            }
+            indices.extend(sorted(columns))
+            indptr.append(len(indices))
+        
+        self.term_matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr),
+            shape=(len(self.texts), len(self.vocabulary))
+        )
+        
+        self._pattern_hits: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._embeddings: Dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.spans)
+    
+    def keyword_overlap(self, query: str) -> Tuple[np.ndarray, int]:
+        """
+        Count the distinct query words each span contains.
+        
+        Returns:
+            Tuple of (overlap count per span, number of distinct query words)
+        """
+        query_words = set(query.lower().split())
+        columns = [self.vocabulary[word] for word in query_words if word in self.vocabulary]
+        
+        query_vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        query_vector[columns] = 1.0
+        return self.term_matrix @ query_vector, len(query_words)
+    
+    def pattern_hits(self, patterns: List[str]) -> np.ndarray:
+        """Get the (spans x patterns) regex match matrix, computed once per pattern set"""
+        key = tuple(patterns)
+        with self._lock:
+            if key not in self._pattern_hits:
+                compiled = [re.compile(pattern) for pattern in patterns]
+                hits = np.zeros((len(self.texts), len(compiled)), dtype=bool)
+                for j, pattern in enumerate(compiled):
+                    hits[:, j] = [pattern.search(text) is not None for text in self.texts]
+                self._pattern_hits[key] = hits
+            return self._pattern_hits[key]
+    
+    def embeddings(self, embedding_model: Any) -> np.ndarray:
+        """Get normalized span embeddings for a model, encoding the corpus once"""
+        key = id(embedding_model)
+        with self._lock:
+            if key not in self._embeddings:
+                embeddings = embedding_model.encode(
+                    [span.get('text', '') for span in self.spans],
+                    convert_to_numpy=True,
+                    show_progress_bar=False
+                )
+                self._embeddings[key] = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+            return self._embeddings[key]
+    
+    def top_k(self, scores: np.ndarray, top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get copies of the best-scoring spans with their `score`.
+        
+        Ties keep corpus order, as the per-span loops did.
+        """
+        order = np.argsort(-scores, kind='stable')[:top_k]
+        
+        results = []
+        for i in order:
+            span_copy = self.spans[i].copy()
+            span_copy['score'] = float(scores[i])
+            results.append(span_copy)
+        return results
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale each row to unit L2 norm (zero rows stay zero)"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+_indexes: Dict[int, CorpusIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+# Number of corpora whose indexes are kept
+MAX_CACHED_INDEXES = 8
+
+
+def get_corpus_index(spans: List[Dict[str, Any]]) -> CorpusIndex:
+    """
+    Get the shared index of a span list, building it on first use.
+    
+    Indexes are cached by list identity, so every baseline searching the
+    same list reuses one index; the list should not be modified afterwards.
+    """
+    key = id(spans)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        # The index holds the list, so a live entry's id cannot be reused
+        if index is not None and index.spans is spans and len(index) == len(spans):
+            _indexes.move_to_end(key)
+            return index
+        
+        index = CorpusIndex(spans)
+        _indexes[key] = index
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+        return index
@@ -4,9 +4,10 @@ Dataset generation for queries and system outputs
 
 from typing import List, Dict, Any, Optional
 import pandas as pd
-import json
+from functools import partial
 from pathlib import Path
 from .query_simulator import QuerySimulator
+from .parallel_runner import ParallelRunner, fingerprint
 from .query_categorizer import QueryCategorizer
 from ..system import System
 
@@ -29,122 +30,61 @@ class DatasetGenerator:
         event_types: List[str],
         num_queries_per_type: int = 10,
         include_followups: bool = True,
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        max_workers: int = 4,
+        checkpoint_path: Optional[str] = None
     ) -> pd.DataFrame:
         """
         Generate a complete query dataset with system outputs.
         
+        Each initial query opens its own conversation; conversations run in
+        parallel while follow-ups stay in order within their conversation.
+        
         Args:
             event_types: List of event types
             num_queries_per_type: Number of queries per event type
             include_followups: Whether to include follow-up queries
             output_path: Optional path to save dataset
+            max_workers: Number of conversations processed concurrently
+            checkpoint_path: Optional JSON Lines file of finished work; an
+                interrupted run resumes from it
         
         Returns:
             DataFrame with queries and system outputs
         """
-        # Generate initial queries
-        initial_queries = self.query_simulator.generate_queries(
-            event_types=event_types,
-            num_queries_per_type=num_queries_per_type
+        runner = ParallelRunner(
+            max_workers=max_workers,
+            checkpoint_path=checkpoint_path,
+            run_params={
+                'task': 'generate_dataset',
+                'event_types': list(event_types),
+                'num_queries_per_type': num_queries_per_type,
+                'include_followups': include_followups
+            }
         )
         
-        # Categorize queries
-        categorized_queries = self.categorizer.categorize_batch(initial_queries)
-        
-        # Generate system outputs
-        dataset_rows = []
-        conversation_id = None
-        
-        for query_dict in categorized_queries:
-            query = query_dict['query']
-            query_id = query_dict.get('query_id', f"query_{len(dataset_rows)}")
-            
-            # Process query with system
-            try:
-                result = self.system.process_query(
-                    query=query,
-                    conversation_id=conversation_id
+        # Generated queries are checkpointed too, so a resumed run evaluates the same ones
+        categorized_queries = runner.get_or_run(
+            'queries',
+            lambda: self.categorizer.categorize_batch(
+                self.query_simulator.generate_queries(
+                    event_types=event_types,
+                    num_queries_per_type=num_queries_per_type
                 )
-                
-                # Extract conversation ID
-                conversation_id = result.get('metadata', {}).get('conversation_id', conversation_id)
-                
-                # Format output
-                system_output = result.get('response', '')
-                
-                # Create dataset row
-                row = {
-                    'Query_Id': query_id,
-                    'Query': query,
-                    'Query_Category': self._format_category(query_dict),
-                    'System_Output': system_output,
-                    'Remarks': self._generate_remarks(query_dict, result),
-                    'Task': query_dict.get('task', 'task1'),
-                    'Difficulty': query_dict.get('difficulty', 'simple'),
-                    'Use_Case': query_dict.get('use_case', 'general'),
-                    'Event_Type': query_dict.get('event_type', 'unknown'),
-                    'Is_Followup': query_dict.get('is_followup', False),
-                    'Evidence_Count': result.get('metadata', {}).get('evidence_count', 0)
-                }
-                
-                dataset_rows.append(row)
-                
-                # Generate follow-ups if requested
-                if include_followups and not query_dict.get('is_followup', False):
-                    followups = self.query_simulator.generate_followup_queries(
-                        initial_query=query,
-                        initial_response=system_output,
-                        num_followups=2
-                    )
-                    
-                    for followup in followups:
-                        try:
-                            followup_result = self.system.process_followup(
-                                query=followup['query'],
-                                conversation_id=conversation_id
-                            )
-                            
-                            followup_row = {
-                                'Query_Id': followup.get('query_id', f"followup_{len(dataset_rows)}"),
-                                'Query': followup['query'],
-                                'Query_Category': self._format_category(followup),
-                                'System_Output': followup_result.get('explanation', ''),
-                                'Remarks': self._generate_remarks(followup, followup_result),
-                                'Task': 'task2',
-                                'Difficulty': self.categorizer.categorize_query(followup['query'], is_followup=True).get('difficulty', 'simple'),
-                                'Use_Case': self.categorizer.categorize_query(followup['query'], is_followup=True).get('use_case', 'general'),
-                                'Event_Type': query_dict.get('event_type', 'unknown'),
-                                'Is_Followup': True,
-                                'Evidence_Count': followup_result.get('evidence_count', 0)
-                            }
-                            
-                            dataset_rows.append(followup_row)
-                        except Exception as e:
-                            print(f"Error processing follow-up: {e}")
-                            continue
-            
-            except Exception as e:
-                print(f"Error processing query {query_id}: {e}")
-                # Add row with error
-                row = {
-                    'Query_Id': query_id,
-                    'Query': query,
-                    'Query_Category': self._format_category(query_dict),
-                    'System_Output': f"Error: {str(e)}",
-                    'Remarks': f"Failed to process query: {str(e)}",
-                    'Task': query_dict.get('task', 'task1'),
-                    'Difficulty': query_dict.get('difficulty', 'simple'),
-                    'Use_Case': query_dict.get('use_case', 'general'),
-                    'Event_Type': query_dict.get('event_type', 'unknown'),
-                    'Is_Followup': False,
-                    'Evidence_Count': 0
-                }
-                dataset_rows.append(row)
-                continue
+            )
+        )
+        
+        jobs = [
+            (
+                f"conversation:{i}:{query_dict.get('query_id', i)}:{fingerprint(query_dict.get('query'))}",
+                partial(self._process_conversation, query_dict, f"query_{i}", include_followups)
+            )
+            for i, query_dict in enumerate(categorized_queries)
+        ]
+        conversations = runner.run(jobs, description="conversations")
         
         # Create DataFrame
-        df = pd.DataFrame(dataset_rows)
+        df = pd.DataFrame([row for rows in conversations.values() for row in rows])
         
         # Save if path provided
         if output_path:
@@ -154,6 +94,103 @@ class DatasetGenerator:
         
         return df
     
+    def _process_conversation(
+        self,
+        query_dict: Dict[str, Any],
+        default_query_id: str,
+        include_followups: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Process an initial query and its follow-ups in a new conversation"""
+        query = query_dict['query']
+        query_id = query_dict.get('query_id', default_query_id)
+        dataset_rows = []
+        
+        # Process query with system
+        try:
+            result = self.system.process_query(query=query)
+            
+            # Extract conversation ID
+            conversation_id = result.get('metadata', {}).get('conversation_id')
+            
+            # Format output
+            system_output = result.get('response', '')
+            
+            # Create dataset row
+            row = {
+                'Query_Id': query_id,
+                'Query': query,
+                'Query_Category': self._format_category(query_dict),
+                'System_Output': system_output,
+                'Remarks': self._generate_remarks(query_dict, result),
+                'Task': query_dict.get('task', 'task1'),
+                'Difficulty': query_dict.get('difficulty', 'simple'),
+                'Use_Case': query_dict.get('use_case', 'general'),
+                'Event_Type': query_dict.get('event_type', 'unknown'),
+                'Is_Followup': query_dict.get('is_followup', False),
+                'Evidence_Count': result.get('metadata', {}).get('evidence_count', 0)
+            }
+            
+            dataset_rows.append(row)
+            
+            # Generate follow-ups if requested
+            if include_followups and not query_dict.get('is_followup', False):
+                followups = self.query_simulator.generate_followup_queries(
+                    initial_query=query,
+                    initial_response=system_output,
+                    num_followups=2
+                )
+                
+                for followup in followups:
+                    try:
+                        followup_result = self.system.process_followup(
+                            query=followup['query'],
+                            conversation_id=conversation_id
+                        )
+                        
+                        followup_category = self.categorizer.categorize_query(
+                            followup['query'],
+                            is_followup=True
+                        )
+                        
+                        followup_row = {
+                            'Query_Id': followup.get('query_id', f"{query_id}_followup_{len(dataset_rows)}"),
+                            'Query': followup['query'],
+                            'Query_Category': self._format_category(followup),
+                            'System_Output': followup_result.get('explanation', ''),
+                            'Remarks': self._generate_remarks(followup, followup_result),
+                            'Task': 'task2',
+                            'Difficulty': followup_category.get('difficulty', 'simple'),
+                            'Use_Case': followup_category.get('use_case', 'general'),
+                            'Event_Type': query_dict.get('event_type', 'unknown'),
+                            'Is_Followup': True,
+                            'Evidence_Count': followup_result.get('evidence_count', 0)
+                        }
+                        
+                        dataset_rows.append(followup_row)
+                    except Exception as e:
+                        print(f"Error processing follow-up: {e}")
+                        continue
+        
+        except Exception as e:
+            print(f"Error processing query {query_id}: {e}")
+            # Add row with error
+            row = {
+                'Query_Id': query_id,
+                'Query': query,
+                'Query_Category': self._format_category(query_dict),
+                'System_Output': f"Error: {str(e)}",
+                'Remarks': f"Failed to process query: {str(e)}",
+                'Task': query_dict.get('task', 'task1'),
+                'Difficulty': query_dict.get('difficulty', 'simple'),
+                'Use_Case': query_dict.get('use_case', 'general'),
+                'Event_Type': query_dict.get('event_type', 'unknown'),
+                'Is_Followup': False,
+                'Evidence_Count': 0
+            }
+            dataset_rows.append(row)
+        
+        return dataset_rows
+    
     def _format_category(self, query_dict: Dict[str, Any]) -> str:
         """Format category string for query"""
         parts = []
@@ -3,10 +3,14 @@ Main evaluation framework
 """
 
 from typing import List, Dict, Any, Optional
+from functools import partial
 import pandas as pd
 from .metrics import EvaluationMetrics
+from .parallel_runner import ParallelRunner, fingerprint
+from .ablation import AblationEngine
 from .baselines import KeywordSearchBaseline, SimpleRAGBaseline, RuleBasedBaseline
 from ..system import System
+from ..explanation_generation.llm_client import CompletionCache
 
 
 class Evaluator:
@@ -36,50 +40,25 @@ class Evaluator:
         Returns:
             Dictionary with evaluation results
         """
+        queries = dataset['Query']
+        outputs = dataset['System_Output']
+        query_ids = dataset['Query_Id'] if 'Query_Id' in dataset else 'unknown'
+        
+        # Evidence is not part of the dataset; would need to retrieve from system
+        evidence_lists = [[] for _ in range(len(dataset))]
+        
+        # Metrics are computed column-wise over the whole dataset
+        keys = pd.DataFrame({'query_id': query_ids, 'query': queries}, index=dataset.index)
         results = {
-            'response_quality': [],
-            'evidence_quality': [],
-            'explanation_quality': [],
-            'conversational_coherence': []
+            'response_quality': pd.concat([keys, self.metrics.evaluate_responses(outputs)], axis=1),
+            'evidence_quality': pd.DataFrame(),
+            'explanation_quality': pd.concat(
+                [keys, self.metrics.evaluate_explanations(outputs, queries, evidence_lists)],
+                axis=1
+            ),
+            'conversational_coherence': pd.DataFrame()
         }
         
-        for _, row in dataset.iterrows():
-            query = row['Query']
-            system_output = row['System_Output']
-            query_id = row.get('Query_Id', 'unknown')
-            
-            # Get evidence if available
-            evidence = []  # Would need to retrieve from system
-            
-            # Evaluate response quality
-            response_metrics = self.metrics.evaluate_response_quality(system_output)
-            results['response_quality'].append({
-                'query_id': query_id,
-                'query': query,
-                **response_metrics
-            })
-            
-            # Evaluate evidence quality
-            if evidence:
-                evidence_metrics = self.metrics.evaluate_evidence_quality(evidence, query)
-                results['evidence_quality'].append({
-                    'query_id': query_id,
-                    'query': query,
-                    **evidence_metrics
-                })
-            
-            # Evaluate explanation quality
-            explanation_metrics = self.metrics.evaluate_causal_explanation_quality(
-                system_output,
-                evidence,
-                query
-            )
-            results['explanation_quality'].append({
-                'query_id': query_id,
-                'query': query,
-                **explanation_metrics
-            })
-        
         # Aggregate results
         aggregated = self._aggregate_results(results)
         
@@ -93,153 +72,165 @@ class Evaluator:
         self,
         queries: List[str],
         spans: List[Dict[str, Any]],
-        event_types: Optional[List[str]] = None
+        event_types: Optional[List[str]] = None,
+        max_workers: int = 4,
+        checkpoint_path: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Compare system with baseline methods.
         
+        Every (method, query) pair is an independent job on a worker pool.
+        
         Args:
             queries: List of test queries
             spans: List of dialogue spans
             event_types: Optional list of event types
+            max_workers: Number of queries evaluated concurrently
+            checkpoint_path: Optional JSON Lines file of finished queries; an
+                interrupted comparison resumes from it
         
         Returns:
             Dictionary with comparison results
         """
-        comparison_results = {}
+        event_type = event_types[0] if event_types else None
+        runner = ParallelRunner(
+            max_workers=max_workers,
+            checkpoint_path=checkpoint_path,
+            run_params={
+                'task': 'compare_with_baselines',
+                'baselines': list(self.baselines),
+                'event_type': event_type,
+                'spans': fingerprint([[span.get('span_id'), span.get('text')] for span in spans])
+            }
+        )
         
-        # Evaluate each baseline
+        # Job IDs carry the query text hash, so a changed query list never reuses results
+        query_keys = [f"{i}:{fingerprint(query)}" for i, query in enumerate(queries)]
+        
+        jobs = []
         for baseline_name, baseline in self.baselines.items():
-            baseline_results = []
-            
-            for query in queries:
-                # Get baseline results
-                if baseline_name == 'rule_based':
-                    event_type = event_types[0] if event_types else None
-                    baseline_spans = baseline.search(query, spans, event_type=event_type)
-                else:
-                    baseline_spans = baseline.search(query, spans)
-                
-                baseline_response = baseline.generate_response(query, baseline_spans)
-                
-                # Evaluate baseline
-                response_metrics = self.metrics.evaluate_response_quality(baseline_response)
-                evidence_metrics = self.metrics.evaluate_evidence_quality(baseline_spans, query)
-                
-                baseline_results.append({
-                    'query': query,
-                    'response': baseline_response,
-                    **response_metrics,
-                    **evidence_metrics
-                })
-            
-            comparison_results[baseline_name] = baseline_results
-        
-        # Evaluate system
-        system_results = []
-        for query in queries:
-            try:
-                result = self.system.process_query(query)
-                system_response = result.get('response', '')
-                system_evidence = result.get('evidence', [])
-                
-                response_metrics = self.metrics.evaluate_response_quality(system_response)
-                evidence_metrics = self.metrics.evaluate_evidence_quality(system_evidence, query)
-                
-                system_results.append({
-                    'query': query,
-                    'response': system_response,
-                    **response_metrics,
-                    **evidence_metrics
-                })
-            except Exception as e:
-                print(f"Error evaluating system for query: {e}")
-                continue
+            for query_key, query in zip(query_keys, queries):
+                jobs.append((
+                    f"{baseline_name}:{query_key}",
+                    partial(self._evaluate_baseline_query, baseline_name, baseline, query, spans, event_type)
+                ))
+        for query_key, query in zip(query_keys, queries):
+            jobs.append((f"system:{query_key}", partial(self._evaluate_system_query, query)))
+        
+        results = runner.run(jobs, description="comparison queries")
         
-        comparison_results['system'] = system_results
+        # Group results by method, keeping query order
+        comparison_results = {name: [] for name in list(self.baselines) + ['system']}
+        for job_id, result in results.items():
+            comparison_results[job_id.split(':', 1)[0]].append(result)
         
         # Aggregate comparison
         aggregated = self._aggregate_comparison(comparison_results)
         
         return aggregated
     
+    def _evaluate_baseline_query(
+        self,
+        baseline_name: str,
+        baseline: Any,
+        query: str,
+        spans: List[Dict[str, Any]],
+        event_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run and score one baseline on one query"""
+        if baseline_name == 'rule_based':
+            baseline_spans = baseline.search(query, spans, event_type=event_type)
+        else:
+            baseline_spans = baseline.search(query, spans)
+        
+        baseline_response = baseline.generate_response(query, baseline_spans)
+        
+        # Evaluate baseline
+        response_metrics = self.metrics.evaluate_response_quality(baseline_response)
+        evidence_metrics = self.metrics.evaluate_evidence_quality(baseline_spans, query)
+        
+        return {
+            'query': query,
+            'response': baseline_response,
+            **response_metrics,
+            **evidence_metrics
+        }
+    
+    def _evaluate_system_query(self, query: str) -> Dict[str, Any]:
+        """Run and score the system on one query"""
+        result = self.system.process_query(query)
+        system_response = result.get('response', '')
+        system_evidence = result.get('evidence', [])
+        
+        response_metrics = self.metrics.evaluate_response_quality(system_response)
+        evidence_metrics = self.metrics.evaluate_evidence_quality(system_evidence, query)
+        
+        return {
+            'query': query,
+            'response': system_response,
+            **response_metrics,
+            **evidence_metrics
+        }
+    
     def ablation_study(
         self,
         queries: List[str],
-        components: List[str] = ['retrieval', 'reranking', 'causal_analysis', 'llm']
+        components: List[str] = ['retrieval', 'reranking', 'causal_analysis', 'llm'],
+        max_workers: int = 4,
+        checkpoint_path: Optional[str] = None,
+        completion_cache_path: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Perform ablation study by removing components.
         
+        Retrieval, reranking and causal analysis run once per query; each
+        variant is assembled from those shared stage outputs and only its
+        explanation is generated, through a completion cache.
+        
         Args:
             queries: List of test queries
             components: List of components to ablate
+            max_workers: Number of queries processed concurrently
+            checkpoint_path: Optional JSON Lines file for resuming the study
+            completion_cache_path: Optional JSON Lines file persisting LLM
+                completions across runs
         
         Returns:
             Dictionary with ablation study results
         """
-        ablation_results = {}
-        
-        # Full system
-        full_results = []
-        for query in queries:
-            try:
-                result = self.system.process_query(query)
-                full_results.append({
-                    'query': query,
-                    'response': result.get('response', ''),
-                    'evidence_count': len(result.get('evidence', []))
-                })
-            except Exception as e:
-                print(f"Error in full system: {e}")
-                continue
-        
-        ablation_results['full_system'] = full_results
-        
-        # Ablate each component
-        for component in components:
-            # Create system without component
-            ablated_system = self._create_ablated_system(component)
-            
-            ablated_results = []
-            for query in queries:
-                try:
-                    result = ablated_system.process_query(query)
-                    ablated_results.append({
-                        'query': query,
-                        'response': result.get('response', ''),
-                        'evidence_count': len(result.get('evidence', []))
-                    })
-                except Exception as e:
-                    print(f"Error in ablated system ({component}): {e}")
-                    continue
-            
-            ablation_results[f'without_{component}'] = ablated_results
+        engine = AblationEngine(
+            self.system,
+            completion_cache=CompletionCache(completion_cache_path)
+        )
+        study = engine.run(
+            queries,
+            components,
+            max_workers=max_workers,
+            checkpoint_path=checkpoint_path
+        )
         
         # Compare results
-        comparison = self._compare_ablation_results(ablation_results)
+        comparison = self._compare_ablation_results(study['ablation_results'])
         
         return {
-            'ablation_results': ablation_results,
-            'comparison': comparison
+            'ablation_results': study['ablation_results'],
+            'comparison': comparison,
+            'stats': study['stats']
         }
     
-    def _aggregate_results(self, results: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
-        """Aggregate evaluation results"""
+    def _aggregate_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Aggregate evaluation results (DataFrames or lists of metric dictionaries)"""
         aggregated = {}
         
         for metric_type, metric_list in results.items():
-            if not metric_list:
+            if len(metric_list) == 0:
                 continue
             
             # Calculate averages
-            df = pd.DataFrame(metric_list)
-            aggregated[metric_type] = {
-                'mean': df.mean().to_dict(),
-                'std': df.std().to_dict(),
-                'min': df.min().to_dict(),
-                'max': df.max().to_dict()
-            }
+            aggregated[metric_type] = self._summarize(
+                pd.DataFrame(metric_list),
+                ['mean', 'std', 'min', 'max']
+            )
         
         return aggregated
     
@@ -251,19 +242,17 @@ class Evaluator:
             if not results:
                 continue
             
-            df = pd.DataFrame(results)
-            aggregated[method] = {
-                'mean': df.mean().to_dict(),
-                'std': df.std().to_dict()
-            }
+            aggregated[method] = self._summarize(pd.DataFrame(results), ['mean', 'std'])
         
         return aggregated
     
-    def _create_ablated_system(self, component: str) -> System:
-        """Create system with component ablated"""
-        # This would require modifying system initialization
-        # For now, return full system (would need implementation)
-        return self.system
+    @staticmethod
+    def _summarize(df: pd.DataFrame, statistics: List[str]) -> Dict[str, Dict[str, float]]:
+        """Column-wise statistics of the numeric (and boolean) metric columns"""
+        metrics = df.drop(columns=['query_id'], errors='ignore')
+        numeric = metrics.select_dtypes(include=['number', 'bool']).astype(float)
+        summary = numeric.agg(statistics)
+        return {statistic: summary.loc[statistic].to_dict() for statistic in statistics}
     
     def _compare_ablation_results(self, ablation_results: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
         """Compare ablation study results"""
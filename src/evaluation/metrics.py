@@ -2,11 +2,38 @@
 Evaluation metrics for system performance
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, Sequence
 import numpy as np
+import pandas as pd
+from scipy import sparse
 from sklearn.metrics import precision_score, recall_score, f1_score
 import re
 
+CITATION_PATTERN = re.compile(
+    r'\[Evidence\s+\d+\]|\[Citation\s+\d+\]|\(Evidence\s+\d+\)',
+    re.IGNORECASE
+)
+
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'[.!?]+')
+
+TRANSITION_WORDS = frozenset([
+    'because', 'therefore', 'thus', 'hence', 'consequently',
+    'furthermore', 'moreover', 'additionally', 'however', 'although'
+])
+
+# Byte lookup table of the sentence boundary characters
+SENTENCE_BOUNDARY_BYTES = np.zeros(256, dtype=bool)
+SENTENCE_BOUNDARY_BYTES[[ord('.'), ord('!'), ord('?')]] = True
+
+CAUSAL_INDICATORS = [
+    'because', 'due to', 'as a result', 'led to', 'caused',
+    'resulted in', 'therefore', 'thus', 'hence', 'consequently'
+]
+
+CAUSAL_INDICATOR_PATTERN = re.compile('|'.join(re.escape(indicator) for indicator in CAUSAL_INDICATORS))
+
+TextColumn = Union[pd.Series, Sequence[str]]
+
 
 class EvaluationMetrics:
     """Evaluation metrics for causal explanation quality"""
@@ -32,7 +59,7 @@ class EvaluationMetrics:
         metrics = {
             'length': len(response),
             'word_count': len(response.split()),
-            'sentence_count': len(re.split(r'[.!?]+', response)),
+            'sentence_count': len(SENTENCE_BOUNDARY_PATTERN.split(response)),
             'has_citations': self._has_citations(response),
             'citation_count': self._count_citations(response),
             'coherence_score': self._calculate_coherence(response)
@@ -156,26 +183,142 @@ class EvaluationMetrics:
         
         return metrics
     
+    def evaluate_responses(self, responses: TextColumn) -> pd.DataFrame:
+        """
+        Batch version of evaluate_response_quality.
+        
+        Args:
+            responses: Response texts (Series or sequence)
+        
+        Returns:
+            DataFrame with one row of quality metrics per response
+        """
+        texts = _as_text_series(responses)
+        
+        # One tokenization per text for word and transition word counts
+        word_count = np.empty(len(texts), dtype=np.int64)
+        transition_count = np.empty(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts.str.lower()):
+            words = text.split()
+            word_count[i] = len(words)
+            transition_count[i] = sum(map(TRANSITION_WORDS.__contains__, words))
+        
+        citation_count = np.array([len(CITATION_PATTERN.findall(text)) for text in texts], dtype=np.int64)
+        boundary_count = _count_sentence_boundaries(texts)
+        
+        return pd.DataFrame({
+            'length': texts.str.len(),
+            'word_count': word_count,
+            'sentence_count': boundary_count + 1,
+            'has_citations': citation_count > 0,
+            'citation_count': citation_count,
+            'coherence_score': np.minimum(transition_count / np.maximum(word_count, 1) * 10, 1.0)
+        }, index=texts.index)
+    
+    def evaluate_explanations(
+        self,
+        explanations: TextColumn,
+        queries: TextColumn,
+        evidence_lists: Optional[Sequence[List[Dict[str, Any]]]] = None
+    ) -> pd.DataFrame:
+        """
+        Batch version of evaluate_causal_explanation_quality.
+        
+        Args:
+            explanations: Explanation texts
+            queries: Query of each explanation
+            evidence_lists: Optional evidence spans of each explanation
+        
+        Returns:
+            DataFrame with one row of explanation and evidence metrics per explanation
+        """
+        texts = _as_text_series(explanations)
+        queries = _as_text_series(queries)
+        lowered = texts.str.lower()
+        if evidence_lists is None:
+            evidence_lists = [[] for _ in range(len(texts))]
+        
+        causal_indicator_count = np.array([
+            sum(1 for indicator in CAUSAL_INDICATORS if indicator in text)
+            for text in lowered
+        ])
+        
+        # Citations plus explanations quoting the opening of an evidence span
+        reference_count = np.array([len(CITATION_PATTERN.findall(text)) for text in texts], dtype=np.int64)
+        if any(evidence_lists):
+            reference_count += [
+                sum(1 for span in evidence[:5] if span.get('text', '')[:50].lower() in text)
+                for text, evidence in zip(lowered, evidence_lists)
+            ]
+        
+        # Share of distinct query words that appear as words of the explanation;
+        # with words joined by double spaces, a word is exactly a ' word ' substring
+        completeness = []
+        for query, text in zip(queries.str.lower(), lowered):
+            query_words = set(query.split())
+            padded = ' ' + '  '.join(text.split()) + ' '
+            hits = sum(1 for word in query_words if f' {word} ' in padded)
+            completeness.append(hits / len(query_words) if query_words else 0.0)
+        
+        metrics = pd.DataFrame({
+            'explanation_length': texts.str.len(),
+            'has_causal_language': causal_indicator_count > 0,
+            'causal_indicator_count': causal_indicator_count,
+            'evidence_reference_count': reference_count,
+            'explanation_completeness': completeness
+        }, index=texts.index)
+        
+        evidence_metrics = self.evaluate_evidence_batch(evidence_lists)
+        evidence_metrics.index = texts.index
+        return pd.concat([metrics, evidence_metrics], axis=1)
+    
+    def evaluate_evidence_batch(self, evidence_lists: Sequence[List[Dict[str, Any]]]) -> pd.DataFrame:
+        """
+        Batch version of evaluate_evidence_quality.
+        
+        Metrics that evaluate_evidence_quality omits for empty evidence are
+        NaN, so column means match averaging the per-query dictionaries.
+        
+        Args:
+            evidence_lists: Evidence spans of each query
+        
+        Returns:
+            DataFrame with one row of evidence metrics per evidence list
+        """
+        rows = []
+        for evidence in evidence_lists:
+            if not evidence:
+                rows.append((0, 0.0, np.nan, np.nan, 0.0, np.nan))
+                continue
+            
+            scores = np.array([span.get('evidence_score', 0.0) for span in evidence], dtype=float)
+            rows.append((
+                len(evidence),
+                scores.mean(),
+                scores.max(),
+                scores.min(),
+                self._calculate_evidence_coverage(evidence),
+                self._calculate_evidence_diversity(evidence)
+            ))
+        
+        return pd.DataFrame(rows, columns=[
+            'evidence_count', 'avg_evidence_score', 'max_evidence_score',
+            'min_evidence_score', 'evidence_coverage', 'evidence_diversity'
+        ])
+    
     def _has_citations(self, text: str) -> bool:
         """Check if text contains citations"""
-        pattern = r'\[Evidence\s+\d+\]|\[Citation\s+\d+\]|\(Evidence\s+\d+\)'
-        return bool(re.search(pattern, text, re.IGNORECASE))
+        return CITATION_PATTERN.search(text) is not None
     
     def _count_citations(self, text: str) -> int:
         """Count citations in text"""
-        pattern = r'\[Evidence\s+\d+\]|\[Citation\s+\d+\]|\(Evidence\s+\d+\)'
-        return len(re.findall(pattern, text, re.IGNORECASE))
+        return len(CITATION_PATTERN.findall(text))
     
     def _calculate_coherence(self, text: str) -> float:
         """Calculate text coherence score"""
         # Simple coherence: check for transition words and logical flow
-        transition_words = [
-            'because', 'therefore', 'thus', 'hence', 'consequently',
-            'furthermore', 'moreover', 'additionally', 'however', 'although'
-        ]
-        
         words = text.lower().split()
-        transition_count = sum(1 for word in words if word in transition_words)
+        transition_count = sum(1 for word in words if word in TRANSITION_WORDS)
         
         # Normalize by text length
         coherence = min(transition_count / max(len(words), 1) * 10, 1.0)
@@ -215,40 +358,18 @@ class EvaluationMetrics:
         if not evidence or len(evidence) < 2:
             return 0.0
         
-        # Calculate diversity based on text similarity
+        # Diversity is inverse of average pairwise similarity
         texts = [span.get('text', '') for span in evidence]
-        similarities = []
-        
-        for i in range(len(texts)):
-            for j in range(i + 1, len(texts)):
-                sim = self._calculate_similarity(texts[i], texts[j])
-                similarities.append(sim)
-        
-        # Diversity is inverse of average similarity
-        avg_similarity = np.mean(similarities) if similarities else 0.0
-        diversity = 1.0 - avg_similarity
-        
-        return diversity
+        return 1.0 - float(np.mean(pairwise_jaccard(texts)))
     
     def _has_causal_language(self, text: str) -> bool:
         """Check if text contains causal language"""
-        causal_indicators = [
-            'because', 'due to', 'as a result', 'led to', 'caused',
-            'resulted in', 'therefore', 'thus', 'hence', 'consequently'
-        ]
-        
-        text_lower = text.lower()
-        return any(indicator in text_lower for indicator in causal_indicators)
+        return CAUSAL_INDICATOR_PATTERN.search(text.lower()) is not None
     
     def _count_causal_indicators(self, text: str) -> int:
         """Count causal indicators in text"""
-        causal_indicators = [
-            'because', 'due to', 'as a result', 'led to', 'caused',
-            'resulted in', 'therefore', 'thus', 'hence', 'consequently'
-        ]
-        
         text_lower = text.lower()
-        count = sum(1 for indicator in causal_indicators if indicator in text_lower)
+        count = sum(1 for indicator in CAUSAL_INDICATORS if indicator in text_lower)
         
         return count
     
@@ -351,3 +472,60 @@ class EvaluationMetrics:
         
         return relevance
 
+
+def pairwise_jaccard(texts: List[str]) -> np.ndarray:
+    """
+    Jaccard similarity of the lowercased word sets of every pair of texts.
+    
+    All intersections come from one sparse product of the binary
+    (texts x vocabulary) matrix with its transpose.
+    
+    Returns:
+        Similarities of the pairs (i, j), i < j, in row-major order
+    """
+    vocabulary: Dict[str, int] = {}
+    indices = []
+    indptr = [0]
+    for text in texts:
+        indices.extend({vocabulary.setdefault(word, len(vocabulary)) for word in text.lower().split()})
+        indptr.append(len(indices))
+    
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), indices, indptr),
+        shape=(len(texts), max(len(vocabulary), 1))
+    )
+    intersections = (matrix @ matrix.T).toarray()
+    sizes = np.diff(indptr)
+    
+    rows, cols = np.triu_indices(len(texts), k=1)
+    intersection = intersections[rows, cols]
+    union = sizes[rows] + sizes[cols] - intersection
+    return np.divide(intersection, union, out=np.zeros(len(rows)), where=union > 0)
+
+
+def _as_text_series(texts: TextColumn) -> pd.Series:
+    """Texts as a string Series (missing values become empty strings)"""
+    series = texts if isinstance(texts, pd.Series) else pd.Series(list(texts), dtype=object)
+    return series.fillna('').astype(str)
+
+
+def _count_sentence_boundaries(texts: pd.Series) -> np.ndarray:
+    """
+    Count the [.!?]+ runs of each text in one numpy pass.
+    
+    The texts are concatenated as UTF-8 bytes with a space after each
+    (multi-byte characters never contain ASCII bytes, and the separator
+    keeps runs from crossing texts); a run starts at a boundary byte not
+    preceded by one.
+    """
+    encoded = [text.encode('utf-8') + b' ' for text in texts]
+    if not encoded:
+        return np.zeros(0, dtype=np.int64)
+    
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    offsets = np.cumsum([0] + [len(text) for text in encoded])[:-1]
+    
+    boundary = SENTENCE_BOUNDARY_BYTES[buffer]
+    starts = boundary.copy()
+    starts[1:] &= ~boundary[:-1]
+    return np.add.reduceat(starts.astype(np.int64), offsets)
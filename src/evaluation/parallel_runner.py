@@ -0,0 +1,149 @@
+"""
+Concurrent evaluation runner with checkpoint and resume
+"""
+
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+
+class ParallelRunner:
+    """
+    Run independent evaluation jobs on a thread pool.
+    
+    Each job is a (job_id, function) pair; a job is the unit of ordering,
+    so work that must stay sequential (a query and its follow-ups in one
+    conversation) belongs in a single job. Completed results are appended
+    to a JSON Lines checkpoint as they finish, and a rerun with the same
+    checkpoint skips every job already recorded there.
+    
+    Jobs that raise are reported and left out of the results (and the
+    checkpoint), so a resumed run retries them.
+    
+    Job IDs should identify their inputs (see fingerprint), and run_params
+    holds everything else the results depend on. The parameters are
+    written at the head of the checkpoint, and resuming with different
+    ones is refused rather than returning stale results.
+    
+    Args:
+        max_workers: Number of concurrent jobs
+        checkpoint_path: Optional JSON Lines checkpoint file
+        run_params: Parameters the job results depend on
+    """
+    
+    PARAMS_JOB_ID = '__run_params__'
+    
+    def __init__(
+        self,
+        max_workers: int = 4,
+        checkpoint_path: Optional[str] = None,
+        run_params: Optional[Dict[str, Any]] = None
+    ):
+        self.max_workers = max(1, max_workers)
+        self.checkpoint_path = checkpoint_path
+        self.run_params = json.loads(json.dumps(run_params or {}, sort_keys=True, default=_to_json))
+        self.completed: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        
+        if checkpoint_path and Path(checkpoint_path).exists() and Path(checkpoint_path).stat().st_size:
+            self._load_checkpoint()
+        elif checkpoint_path:
+            Path(checkpoint_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(checkpoint_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'job_id': self.PARAMS_JOB_ID, 'result': self.run_params}, ensure_ascii=False) + '\n')
+    
+    def _load_checkpoint(self):
+        """Read completed job results, ignoring a truncated final line"""
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.completed[record['job_id']] = record['result']
+        
+        stored_params = self.completed.pop(self.PARAMS_JOB_ID, None)
+        if stored_params != self.run_params:
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} was written with different run parameters "
+                f"({stored_params} != {self.run_params}); use a new checkpoint path"
+            )
+        
+        if self.completed:
+            print(f"Resuming from {self.checkpoint_path}: {len(self.completed)} jobs done")
+    
+    def _record(self, job_id: str, result: Any):
+        """Store a job result and append it to the checkpoint"""
+        with self._lock:
+            self.completed[job_id] = result
+            if not self.checkpoint_path:
+                return
+            
+            Path(self.checkpoint_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'job_id': job_id, 'result': result}, ensure_ascii=False, default=_to_json) + '\n')
+    
+    def get_or_run(self, job_id: str, fn: Callable[[], Any]) -> Any:
+        """Run a single job in the calling thread unless it is checkpointed"""
+        if job_id in self.completed:
+            return self.completed[job_id]
+        
+        result = fn()
+        self._record(job_id, result)
+        return result
+    
+    def run(
+        self,
+        jobs: List[Tuple[str, Callable[[], Any]]],
+        description: str = "jobs"
+    ) -> Dict[str, Any]:
+        """
+        Run jobs concurrently.
+        
+        Args:
+            jobs: (job_id, function) pairs; job IDs must be stable across runs
+            description: Label for progress messages
+        
+        Returns:
+            Results of the successful jobs by job ID, in job order
+        """
+        pending = [(job_id, fn) for job_id, fn in jobs if job_id not in self.completed]
+        if len(pending) < len(jobs):
+            print(f"Skipping {len(jobs) - len(pending)} checkpointed {description}")
+        
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(fn): job_id for job_id, fn in pending}
+            
+            for future in as_completed(futures):
+                job_id = futures[future]
+                try:
+                    self._record(job_id, future.result())
+                except Exception as e:
+                    print(f"Error in {description} job {job_id}: {e}")
+                    continue
+                
+                done += 1
+                if done % 10 == 0 or done == len(pending):
+                    print(f"Completed {done}/{len(pending)} {description}")
+        
+        return {
+            job_id: self.completed[job_id]
+            for job_id, _ in jobs if job_id in self.completed
+        }
+
+
+def fingerprint(value: Any) -> str:
+    """Short stable hash of a JSON-serializable value, for job IDs and run parameters"""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=_to_json)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _to_json(value: Any) -> Any:
+    """JSON fallback for numpy scalars and arrays (anything else becomes a string)"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
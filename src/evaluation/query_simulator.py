@@ -4,15 +4,15 @@ Query simulation framework for generating test queries
 
 from typing import List, Dict, Any, Optional
 import os
-from openai import OpenAI
-from anthropic import Anthropic
-import google.generativeai as genai
 import json
+from ..explanation_generation.llm_client import get_llm_client
 
 
 class QuerySimulator:
     """Generate simulated queries using LLMs"""
     
+    SYSTEM_PROMPT = "You are a helpful assistant that generates realistic queries for customer service analytics."
+    
     def __init__(
         self,
         provider: Optional[str] = None,
@@ -35,25 +35,7 @@ class QuerySimulator:
         self.provider = provider
         self.model = model
         
-        # Initialize client
-        if provider == "openai":
-            api_key = api_key or os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                raise ValueError("OpenAI API key not provided")
-            self.client = OpenAI(api_key=api_key)
-        elif provider == "anthropic":
-            api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
-            if not api_key:
-                raise ValueError("Anthropic API key not provided")
-            self.client = Anthropic(api_key=api_key)
-        elif provider == "gemini":
-            api_key = api_key or os.getenv("GEMINI_API_KEY")
-            if not api_key:
-                raise ValueError("Gemini API key not provided")
-            genai.configure(api_key=api_key)
-            self.client = genai
-        else:
-            raise ValueError(f"Unsupported provider: {provider}")
+        self.client = get_llm_client(provider, model, api_key=api_key)
     
     def generate_queries(
         self,
@@ -72,17 +54,13 @@ class QuerySimulator:
         Returns:
             List of generated queries with metadata
         """
-        all_queries = []
-        
+        # All (event type, category) prompts go out together, paced by the
+        # client's rate limit instead of one request at a time
+        jobs = []
         for event_type in event_types:
-            queries = self._generate_queries_for_event(
-                event_type=event_type,
-                num_queries=num_queries_per_type,
-                categories=query_categories
-            )
-            all_queries.extend(queries)
+            jobs.extend(self._category_jobs(event_type, num_queries_per_type, query_categories))
         
-        return all_queries
+        return self._run_category_jobs(jobs)
     
     def _generate_queries_for_event(
         self,
@@ -91,6 +69,15 @@ class QuerySimulator:
         categories: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """Generate queries for a specific event type"""
+        return self._run_category_jobs(self._category_jobs(event_type, num_queries, categories))
+    
+    def _category_jobs(
+        self,
+        event_type: str,
+        num_queries: int = 10,
+        categories: Optional[List[str]] = None
+    ) -> List[tuple]:
+        """Split an event type's query budget into (event_type, category, count) jobs"""
         if categories is None:
             categories = [
                 'causal_inquiry',
@@ -100,16 +87,20 @@ class QuerySimulator:
                 'product_feedback'
             ]
         
-        queries = []
         queries_per_category = num_queries // len(categories)
+        return [(event_type, category, queries_per_category) for category in categories]
+    
+    def _run_category_jobs(self, jobs: List[tuple]) -> List[Dict[str, Any]]:
+        """Generate and parse the queries of several category jobs concurrently"""
+        prompts = [
+            self._build_query_generation_prompt(event_type, category, num_queries)
+            for event_type, category, num_queries in jobs
+        ]
+        responses = self._generate_batch(prompts)
         
-        for category in categories:
-            category_queries = self._generate_category_queries(
-                event_type=event_type,
-                category=category,
-                num_queries=queries_per_category
-            )
-            queries.extend(category_queries)
+        queries = []
+        for (event_type, category, _), response in zip(jobs, responses):
+            queries.extend(self._parse_query_response(response, event_type, category))
         
         return queries
     
@@ -168,41 +159,21 @@ Queries:"""
     
     def _generate(self, prompt: str) -> str:
         """Generate response from LLM"""
-        if self.provider == "openai":
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that generates realistic queries for customer service analytics."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=1000
-            )
-            return response.choices[0].message.content
-        elif self.provider == "anthropic":
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            return response.content[0].text
-        elif self.provider == "gemini":
-            # Build full prompt with system message
-            full_prompt = "You are a helpful assistant that generates realistic queries for customer service analytics.\n\n" + prompt
-            
-            model = self.client.GenerativeModel(self.model)
-            response = model.generate_content(
-                full_prompt,
-                generation_config={
-                    "temperature": 0.8,
-                    "max_output_tokens": 1000,
-                }
-            )
-            return response.text
-        else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
+        return self.client.generate(
+            prompt,
+            system=self.SYSTEM_PROMPT,
+            temperature=0.8,
+            max_tokens=1000
+        )
+    
+    def _generate_batch(self, prompts: List[str]) -> List[str]:
+        """Generate responses for several prompts concurrently"""
+        return self.client.generate_many(
+            prompts,
+            system=self.SYSTEM_PROMPT,
+            temperature=0.8,
+            max_tokens=1000
+        )
     
     def _parse_query_response(
         self,
@@ -0,0 +1,440 @@
+"""
+Record/replay harness for deterministic end-to-end benchmarking
+"""
+
+import functools
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable
+import numpy as np
+from .parallel_runner import _to_json
+from ..explanation_generation.llm_client import LLMClient, get_llm_client
+from ..retrieval.retrieval_pipeline import RetrievalPipeline
+from ..system import System
+
+
+class Cassette:
+    """
+    Recorded external interactions, keyed by request.
+    
+    In record mode every interaction is appended to a JSON Lines file as it
+    happens (an existing cassette is replaced); in replay mode the file is
+    loaded and interactions are served from it. A request recorded several
+    times (e.g. a sampled LLM prompt) replays its responses in recorded
+    order, repeating the last one.
+    
+    Args:
+        path: Cassette file
+        mode: 'record' or 'replay'
+    """
+    
+    SUPPORTED_MODES = ['record', 'replay']
+    
+    def __init__(self, path: str, mode: str = 'replay'):
+        if mode not in self.SUPPORTED_MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        
+        self.path = Path(path)
+        self.mode = mode
+        self.interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        
+        if mode == 'replay':
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text('', encoding='utf-8')
+    
+    def _load(self):
+        """Read recorded interactions, ignoring a truncated final line"""
+        if not self.path.exists():
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.interactions.setdefault(record['key'], []).append(record)
+        
+        print(f"Loaded {sum(len(v) for v in self.interactions.values())} interactions from {self.path}")
+    
+    @staticmethod
+    def key(kind: str, request: Any) -> str:
+        """Hash an interaction kind and request into a cassette key"""
+        payload = json.dumps([kind, request], sort_keys=True, default=_to_json)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def record(self, kind: str, request: Any, response: Any, elapsed: float) -> Any:
+        """
+        Append an interaction.
+        
+        Returns:
+            The response as it will replay (after the JSON round trip)
+        """
+        record = {
+            'key': self.key(kind, request),
+            'kind': kind,
+            'elapsed': elapsed,
+            'response': response
+        }
+        line = json.dumps(record, ensure_ascii=False, default=_to_json)
+        
+        with self._lock:
+            # Store the JSON round trip so recording and replay return the same values
+            stored = json.loads(line)
+            self.interactions.setdefault(record['key'], []).append(stored)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        return stored['response']
+    
+    def lookup(self, kind: str, request: Any, fn: Callable[[], Any]) -> Any:
+        """
+        Record or replay a deterministic local lookup.
+        
+        Unlike external calls, a lookup is recorded only the first time a
+        request is seen, so repeated reads do not grow the cassette.
+        """
+        if self.mode == 'replay':
+            return self.replay(kind, request)['response']
+        
+        with self._lock:
+            records = self.interactions.get(self.key(kind, request))
+        if records:
+            return records[0]['response']
+        
+        start = time.perf_counter()
+        result = fn()
+        if isinstance(result, (set, frozenset)):
+            result = sorted(result)
+        return self.record(kind, request, result, time.perf_counter() - start)
+    
+    def replay(self, kind: str, request: Any) -> Dict[str, Any]:
+        """
+        Get the next recorded interaction for a request.
+        
+        Raises:
+            KeyError: If the request was never recorded
+        """
+        key = self.key(kind, request)
+        with self._lock:
+            records = self.interactions.get(key)
+            if not records:
+                raise KeyError(f"No recorded {kind} interaction for this request in {self.path}")
+            
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+            return records[min(served, len(records) - 1)]
+
+
+class CassetteBackend:
+    """
+    LLM backend that records through another backend or replays a cassette.
+    
+    Args:
+        harness: Replay harness owning the cassette and timings
+        backend: Backend to record through (unused when replaying)
+    """
+    
+    def __init__(self, harness: "ReplayHarness", backend: Optional[Any] = None):
+        self.harness = harness
+        self.backend = backend
+    
+    async def complete(self, model, prompt, system, temperature, max_tokens) -> str:
+        request = {
+            'model': model,
+            'prompt': prompt,
+            'system': system,
+            'temperature': temperature,
+            'max_tokens': max_tokens
+        }
+        
+        start = time.perf_counter()
+        if self.harness.cassette.mode == 'replay':
+            text = self.harness.cassette.replay('llm', request)['response']
+        else:
+            text = await self.backend.complete(model, prompt, system, temperature, max_tokens)
+            self.harness.cassette.record('llm', request, text, time.perf_counter() - start)
+        
+        self.harness.add_timing('llm', time.perf_counter() - start)
+        return text
+
+
+class CassetteIndex:
+    """
+    Stand-in for a local index whose reads go through the cassette.
+    
+    Wraps the turn index or event index of a running system: while
+    recording, every lookup is served by the wrapped index and recorded;
+    when replaying, lookups come from the cassette, so replay does not need
+    the on-disk indexes the recording ran against. Results pass through
+    JSON, so DECODERS restore the types callers rely on.
+    
+    Args:
+        harness: Replay harness owning the cassette
+        index: Wrapped index
+        kind: Cassette interaction kind of the lookups
+    """
+    
+    DECODERS = {'get_span_ids': set}
+    
+    def __init__(self, harness: "ReplayHarness", index: Any, kind: str):
+        self._harness = harness
+        self._index = index
+        self._kind = kind
+    
+    def _lookup(self, method: str, *args, **kwargs) -> Any:
+        """Call a method of the wrapped index through the cassette"""
+        result = self._harness.cassette.lookup(
+            self._kind,
+            [method, list(args), kwargs],
+            lambda: getattr(self._index, method)(*args, **kwargs)
+        )
+        decode = self.DECODERS.get(method)
+        return decode(result) if decode else result
+    
+    def __contains__(self, key: Any) -> bool:
+        return self._lookup('__contains__', key)
+    
+    def __len__(self) -> int:
+        return self._lookup('__len__')
+    
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._index, name)
+        if not callable(attr):
+            return attr
+        
+        @functools.wraps(attr)
+        def lookup(*args, **kwargs):
+            return self._lookup(name, *args, **kwargs)
+        
+        return lookup
+
+
+class ReplayHarness:
+    """
+    Record or replay the external calls of a running system.
+    
+    Intercepted calls:
+        - llm: every LLM completion (prompt, settings and text)
+        - ann_search / keyword_search: vector store results
+        - rerank: cross-encoder score of every (query, span text) pair
+        - turn_index / event_index / span_vectors: local index lookups
+          (span merging, fine windows, event postings, pool embeddings)
+    
+    Recording captures them while the system runs normally; replaying
+    serves them from the cassette, so the pipeline runs offline and
+    deterministically, without the on-disk indexes, while the local stages
+    (fusion, span merging, causal analysis, prompt packing) still execute. Wall-clock time of
+    each stage is collected in both modes as a latency baseline.
+    
+    Args:
+        cassette_path: Cassette file (JSON Lines)
+        mode: 'record' or 'replay'
+    """
+    
+    def __init__(self, cassette_path: str, mode: str = 'replay'):
+        self.cassette = Cassette(cassette_path, mode=mode)
+        self.mode = mode
+        self.timings: Dict[str, List[float]] = {}
+        self._timings_lock = threading.Lock()
+        self._indexes: Dict[int, CassetteIndex] = {}
+    
+    def add_timing(self, stage: str, seconds: float):
+        """Record the duration of one stage call"""
+        with self._timings_lock:
+            self.timings.setdefault(stage, []).append(seconds)
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block of code as one call of a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(name, time.perf_counter() - start)
+    
+    def install(self, system: System):
+        """Intercept the LLM and retrieval calls of a system and time its stages"""
+        generator = system.explanation_generator.llm_generator
+        self.install_llm(generator.provider, generator.model)
+        self.install_retrieval(system.retrieval_pipeline)
+        
+        system.turn_index = self.wrap_index(system.turn_index, 'turn_index')
+        span_extractor = system.causal_analyzer.span_extractor
+        span_extractor.turn_index = self.wrap_index(span_extractor.turn_index, 'turn_index')
+        
+        self._time_method(system.causal_analyzer, 'analyze_causal_spans', 'causal_analysis')
+        self._time_method(system.explanation_generator, 'generate_explanation', 'explanation')
+    
+    def install_llm(self, provider: str, model: str, api_key: Optional[str] = None) -> LLMClient:
+        """
+        Route the shared client of a provider and model through the cassette.
+        
+        When replaying, call this before building the System: the client is
+        then created on the cassette, so no API key or network is needed.
+        
+        Returns:
+            The shared LLMClient
+        """
+        if self.mode == 'replay':
+            client = get_llm_client(
+                provider,
+                model,
+                api_key=api_key,
+                backend=CassetteBackend(self),
+                rate_limited=False
+            )
+            client.rate_limited = False
+        else:
+            client = get_llm_client(provider, model, api_key=api_key)
+        
+        if not isinstance(client.backend, CassetteBackend):
+            client.backend = CassetteBackend(self, client.backend)
+        return client
+    
+    def install_retrieval(self, retrieval_pipeline: RetrievalPipeline):
+        """Intercept vector store searches, local index lookups and reranker scoring"""
+        self._time_method(retrieval_pipeline, 'retrieve_candidates', 'retrieval')
+        
+        retrieval_pipeline.turn_index = self.wrap_index(retrieval_pipeline.turn_index, 'turn_index')
+        span_extractor = retrieval_pipeline.span_extractor
+        span_extractor.turn_index = self.wrap_index(span_extractor.turn_index, 'turn_index')
+        
+        vector_store = retrieval_pipeline.vector_store
+        if vector_store is not None:
+            self._intercept_search(vector_store, 'search', 'ann_search')
+            self._intercept_search(vector_store, 'keyword_search', 'keyword_search')
+            self._intercept_span_vectors(vector_store)
+            vector_store.event_index = self.wrap_index(vector_store.event_index, 'event_index')
+        
+        reranker = retrieval_pipeline.reranker
+        if reranker is not None:
+            self._intercept_scores(reranker.model)
+            self._time_method(reranker, 'rerank', 'rerank')
+    
+    def wrap_index(self, index: Any, kind: str) -> Any:
+        """Route the lookups of a local index through the cassette (one wrapper per index)"""
+        if index is None or isinstance(index, CassetteIndex):
+            return index
+        
+        if id(index) not in self._indexes:
+            self._indexes[id(index)] = CassetteIndex(self, index, kind)
+        return self._indexes[id(index)]
+    
+    def get_timings(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage call count and latency statistics (milliseconds)"""
+        with self._timings_lock:
+            timings = {stage: list(values) for stage, values in self.timings.items()}
+        
+        summary = {}
+        for stage, values in sorted(timings.items()):
+            ms = np.array(values) * 1000.0
+            summary[stage] = {
+                'calls': len(values),
+                'total_ms': float(ms.sum()),
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p95_ms': float(np.percentile(ms, 95))
+            }
+        return summary
+    
+    def save_timings(self, output_path: str):
+        """Write the stage timing summary as JSON"""
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({'mode': self.mode, 'stages': self.get_timings()}, f, indent=2)
+    
+    def _time_method(self, obj: Any, method_name: str, stage: str):
+        """Wrap an instance method so each call is timed as a stage"""
+        method = getattr(obj, method_name)
+        if getattr(method, '_replay_stage', None):
+            return
+        
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            with self.stage(stage):
+                return method(*args, **kwargs)
+        
+        timed._replay_stage = stage
+        setattr(obj, method_name, timed)
+    
+    def _intercept_search(self, vector_store: Any, method_name: str, kind: str):
+        """Record or replay a vector store search method"""
+        method = getattr(vector_store, method_name)
+        if getattr(method, '_replay_stage', None):
+            return
+        
+        @functools.wraps(method)
+        def search(query: str, n_results: int = 10, filter_dict=None, span_ids=None, **kwargs):
+            request = {
+                'query': query,
+                'n_results': n_results,
+                'filter_dict': filter_dict,
+                'span_ids': sorted(span_ids) if span_ids is not None else None
+            }
+            query_embedding = kwargs.get('query_embedding')
+            if query_embedding is not None:
+                # Context-blended query vectors change results for the same text
+                request['query_embedding'] = np.round(np.asarray(query_embedding, dtype=np.float64), 5)
+            
+            start = time.perf_counter()
+            if self.mode == 'replay':
+                results = self.cassette.replay(kind, request)['response']
+            else:
+                results = method(query, n_results=n_results, filter_dict=filter_dict, span_ids=span_ids, **kwargs)
+                results = self.cassette.record(kind, request, results, time.perf_counter() - start)
+            
+            self.add_timing(kind, time.perf_counter() - start)
+            return results
+        
+        search._replay_stage = kind
+        setattr(vector_store, method_name, search)
+    
+    def _intercept_span_vectors(self, vector_store: Any):
+        """Record or replay stored span vectors (reused for follow-up evidence pools)"""
+        method = vector_store.get_span_vectors
+        if getattr(method, '_replay_stage', None):
+            return
+        
+        @functools.wraps(method)
+        def get_span_vectors(span_ids):
+            stored = self.cassette.lookup('span_vectors', list(span_ids), lambda: method(span_ids))
+            return {
+                span_id: (document, np.asarray(vector, dtype=np.float32))
+                for span_id, (document, vector) in stored.items()
+            }
+        
+        get_span_vectors._replay_stage = 'span_vectors'
+        vector_store.get_span_vectors = get_span_vectors
+    
+    def _intercept_scores(self, model: Any):
+        """Record or replay cross-encoder scores one (query, text) pair at a time"""
+        predict = model.predict
+        if getattr(predict, '_replay_stage', None):
+            return
+        
+        @functools.wraps(predict)
+        def scored_predict(pairs, *args, **kwargs):
+            pairs = [list(pair) for pair in pairs]
+            
+            if self.mode == 'replay':
+                return np.array([
+                    self.cassette.replay('rerank', pair)['response'] for pair in pairs
+                ], dtype=np.float32)
+            
+            start = time.perf_counter()
+            scores = predict(pairs, *args, **kwargs)
+            elapsed = (time.perf_counter() - start) / max(len(pairs), 1)
+            for pair, score in zip(pairs, scores):
+                self.cassette.record('rerank', pair, float(score), elapsed)
+            return scores
+        
+        scored_predict._replay_stage = 'rerank'
+        model.predict = scored_predict
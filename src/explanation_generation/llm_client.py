@@ -0,0 +1,500 @@
+"""
+Shared asynchronous LLM client layer
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+SUPPORTED_PROVIDERS = ['openai', 'anthropic', 'gemini', 'fake']
+
+# Default request budgets per provider (requests per minute, 0 = unlimited)
+DEFAULT_REQUESTS_PER_MINUTE = {
+    'openai': 500,
+    'anthropic': 50,
+    'gemini': 60,
+    'fake': 0
+}
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+# HTTP statuses worth retrying (timeouts, conflicts, rate limits, server errors)
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Exception class name fragments the provider SDKs use for transient failures
+RETRYABLE_ERROR_NAMES = (
+    'RateLimit', 'Timeout', 'Connection', 'Overloaded',
+    'ResourceExhausted', 'ServiceUnavailable', 'InternalServerError', 'DeadlineExceeded'
+)
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+    
+    Only used from the client event loop, so no lock is needed: the
+    refill-and-take step never awaits.
+    """
+    
+    def __init__(self, requests_per_minute: float, burst: Optional[int] = None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst or max(1, int(self.rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    async def acquire(self) -> float:
+        """
+        Take one token, waiting for a refill if the bucket is empty.
+        
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            
+            delay = (1 - self.tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+class _ProviderLimits:
+    """Rate limit and concurrency bound shared by all clients of a provider"""
+    
+    def __init__(self, requests_per_minute: float, max_concurrency: int):
+        self.bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+
+class _EventLoopThread:
+    """Background event loop that runs all LLM requests of the process"""
+    
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-client-loop", daemon=True)
+        self.thread.start()
+    
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_loop_thread: Optional[_EventLoopThread] = None
+_provider_limits: Dict[str, _ProviderLimits] = {}
+_backends: Dict[Tuple[str, str], Any] = {}
+_clients: Dict[Tuple[str, str, str], "LLMClient"] = {}
+_registry_lock = threading.Lock()
+
+
+def _get_loop_thread() -> _EventLoopThread:
+    global _loop_thread
+    with _registry_lock:
+        if _loop_thread is None:
+            _loop_thread = _EventLoopThread()
+        return _loop_thread
+
+
+class _OpenAIBackend:
+    def __init__(self, api_key: str, timeout: float):
+        from openai import AsyncOpenAI
+        # Retries are handled by LLMClient so they respect the shared rate limit
+        self.client = AsyncOpenAI(api_key=api_key, max_retries=0, timeout=timeout)
+    
+    async def complete(self, model, prompt, system, temperature, max_tokens) -> str:
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+
+
+class _AnthropicBackend:
+    def __init__(self, api_key: str, timeout: float):
+        from anthropic import AsyncAnthropic
+        self.client = AsyncAnthropic(api_key=api_key, max_retries=0, timeout=timeout)
+    
+    async def complete(self, model, prompt, system, temperature, max_tokens) -> str:
+        kwargs = {"system": system} if system else {}
+        response = await self.client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=[{"role": "user", "content": prompt}],
+            **kwargs
+        )
+        return response.content[0].text
+
+
+class _GeminiBackend:
+    def __init__(self, api_key: str, timeout: float):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.genai = genai
+        self.timeout = timeout
+        self.models = {}
+    
+    async def complete(self, model, prompt, system, temperature, max_tokens) -> str:
+        # GenerativeModel objects are built once per model name and reused
+        if model not in self.models:
+            self.models[model] = self.genai.GenerativeModel(model)
+        
+        full_prompt = f"{system}\n\n{prompt}" if system else prompt
+        response = await self.models[model].generate_content_async(
+            full_prompt,
+            generation_config={
+                "temperature": temperature,
+                "max_output_tokens": max_tokens,
+            },
+            request_options={"timeout": self.timeout}
+        )
+        return response.text
+
+
+class FakeBackend:
+    """
+    Local provider for tests and dry runs; no network access.
+    
+    Args:
+        latency: Simulated seconds per request
+        responder: Optional function mapping a prompt to the response text
+    """
+    
+    def __init__(self, latency: float = 0.0, responder: Optional[Callable[[str], str]] = None):
+        self.latency = latency
+        self.responder = responder
+        self.calls = 0
+    
+    async def complete(self, model, prompt, system, temperature, max_tokens) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.responder is not None:
+            return self.responder(prompt)
+        return f"[{model}] {prompt[-200:]}"
+
+
+API_KEY_ENV_VARS = {
+    'openai': ('OPENAI_API_KEY', 'OpenAI'),
+    'anthropic': ('ANTHROPIC_API_KEY', 'Anthropic'),
+    'gemini': ('GEMINI_API_KEY', 'Gemini')
+}
+
+BACKENDS = {
+    'openai': _OpenAIBackend,
+    'anthropic': _AnthropicBackend,
+    'gemini': _GeminiBackend
+}
+
+
+def _get_backend(provider: str, api_key: Optional[str], timeout: float) -> Any:
+    """Get the pooled SDK client of a provider and API key"""
+    if provider == 'fake':
+        return FakeBackend()
+    
+    env_var, name = API_KEY_ENV_VARS[provider]
+    api_key = api_key or os.getenv(env_var)
+    if not api_key:
+        raise ValueError(f"{name} API key not provided")
+    
+    with _registry_lock:
+        key = (provider, api_key)
+        if key not in _backends:
+            _backends[key] = BACKENDS[provider](api_key, timeout)
+        return _backends[key]
+
+
+def _get_provider_limits(provider: str) -> _ProviderLimits:
+    with _registry_lock:
+        if provider not in _provider_limits:
+            rpm = os.getenv("LLM_REQUESTS_PER_MINUTE")
+            concurrency = os.getenv("LLM_MAX_CONCURRENCY")
+            _provider_limits[provider] = _ProviderLimits(
+                float(rpm) if rpm else DEFAULT_REQUESTS_PER_MINUTE[provider],
+                int(concurrency) if concurrency else DEFAULT_MAX_CONCURRENCY
+            )
+        return _provider_limits[provider]
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is a transient provider failure worth retrying"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+        return True
+    
+    name = type(error).__name__
+    return any(fragment in name for fragment in RETRYABLE_ERROR_NAMES)
+
+
+class LLMClient:
+    """
+    Provider-agnostic LLM client.
+    
+    All requests run on one background event loop, so SDK connection
+    pools are reused across calls and callers. Every request takes a token
+    from its provider's bucket and a slot from its provider's concurrency
+    bound; transient failures are retried with jittered exponential backoff.
+    
+    Use get_llm_client() rather than constructing clients directly.
+    """
+    
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        api_key: Optional[str] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        timeout: float = 60.0,
+        backend: Optional[Any] = None,
+        rate_limited: bool = True
+    ):
+        if provider not in SUPPORTED_PROVIDERS:
+            raise ValueError(f"Unsupported provider: {provider}")
+        
+        self.provider = provider
+        self.model = model
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.backend = backend or _get_backend(provider, api_key, timeout)
+        # Local backends (e.g. cassette replay) skip the provider request budget
+        self.rate_limited = rate_limited
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'rate_limit_wait': 0.0}
+    
+    async def _complete(
+        self,
+        prompt: str,
+        system: Optional[str],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Run one request with rate limiting and retries (on the client loop)"""
+        limits = _get_provider_limits(self.provider)
+        
+        for attempt in range(self.max_retries + 1):
+            async with limits.semaphore:
+                if limits.bucket is not None and self.rate_limited:
+                    self.stats['rate_limit_wait'] += await limits.bucket.acquire()
+                
+                self.stats['requests'] += 1
+                try:
+                    return await self.backend.complete(self.model, prompt, system, temperature, max_tokens)
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        self.stats['failures'] += 1
+                        raise
+            
+            # Back off outside the semaphore so other requests can proceed
+            self.stats['retries'] += 1
+            delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+            await asyncio.sleep(random.uniform(0, delay))
+    
+    async def agenerate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> str:
+        """
+        Generate a completion from an async caller.
+        
+        Args:
+            prompt: User prompt
+            system: Optional system instruction
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+        
+        Returns:
+            Generated text
+        """
+        loop_thread = _get_loop_thread()
+        coro = self._complete(prompt, system, temperature, max_tokens)
+        
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        
+        if running is loop_thread.loop:
+            return await coro
+        return await asyncio.wrap_future(loop_thread.submit(coro))
+    
+    def generate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        cache: Optional["CompletionCache"] = None
+    ) -> str:
+        """
+        Generate a completion from synchronous code (blocks until done).
+        
+        With a completion cache, an identical earlier request is answered
+        from the cache without calling the provider.
+        """
+        if cache is not None:
+            key = cache.key(self.provider, self.model, prompt, system, temperature, max_tokens)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        
+        future = _get_loop_thread().submit(
+            self._complete(prompt, system, temperature, max_tokens)
+        )
+        text = future.result()
+        
+        if cache is not None:
+            cache.put(key, text)
+        return text
+    
+    async def agenerate_many(
+        self,
+        prompts: List[str],
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> List[str]:
+        """Generate completions for several prompts concurrently (in prompt order)"""
+        return await asyncio.gather(*[
+            self.agenerate(prompt, system, temperature, max_tokens)
+            for prompt in prompts
+        ])
+    
+    def generate_many(
+        self,
+        prompts: List[str],
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> List[str]:
+        """
+        Generate completions for several prompts from synchronous code.
+        
+        Requests are issued concurrently and paced by the provider's rate
+        limit and concurrency bound.
+        """
+        async def run_all():
+            return await asyncio.gather(*[
+                self._complete(prompt, system, temperature, max_tokens)
+                for prompt in prompts
+            ])
+        
+        return _get_loop_thread().submit(run_all()).result()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request, retry and failure counts"""
+        return {'provider': self.provider, 'model': self.model, **self.stats}
+
+
+class CompletionCache:
+    """
+    Completions keyed by the full request, optionally persisted.
+    
+    Args:
+        path: Optional JSON Lines file; existing entries are loaded and new
+            completions appended, so reruns reuse earlier completions
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entries: Dict[str, str] = {}
+        self.stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        
+        if path and Path(path).exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[record['key']] = record['text']
+    
+    @staticmethod
+    def key(
+        provider: str,
+        model: str,
+        prompt: str,
+        system: Optional[str],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Hash a request into a cache key"""
+        request = json.dumps([provider, model, system, prompt, temperature, max_tokens])
+        return hashlib.sha256(request.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached completion"""
+        with self._lock:
+            text = self.entries.get(key)
+            self.stats['hits' if text is not None else 'misses'] += 1
+            return text
+    
+    def put(self, key: str, text: str):
+        """Store a completion"""
+        with self._lock:
+            self.entries[key] = text
+            if self.path:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'key': key, 'text': text}, ensure_ascii=False) + '\n')
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counts"""
+        with self._lock:
+            return {'entries': len(self.entries), **self.stats}
+
+
+def get_llm_client(
+    provider: str,
+    model: str,
+    api_key: Optional[str] = None,
+    **options
+) -> LLMClient:
+    """
+    Get the shared client for a provider, model and API key.
+    
+    Args:
+        provider: LLM provider (openai, anthropic, gemini or fake)
+        model: Model name
+        api_key: Optional API key (defaults to the provider's env var)
+        **options: LLMClient options, used when the client is first created
+    
+    Returns:
+        LLMClient instance
+    """
+    if provider not in SUPPORTED_PROVIDERS:
+        raise ValueError(f"Unsupported provider: {provider}")
+    
+    key = (provider, model, api_key or '')
+    with _registry_lock:
+        client = _clients.get(key)
+    if client is not None:
+        return client
+    
+    client = LLMClient(provider, model, api_key=api_key, **options)
+    with _registry_lock:
+        return _clients.setdefault(key, client)
@@ -4,42 +4,36 @@ LLM-based explanation generation
 
 from typing import List, Dict, Any, Optional
 import os
-from openai import OpenAI
-from anthropic import Anthropic
-import google.generativeai as genai
+from .llm_client import get_llm_client, CompletionCache
+from .prompt_packer import PromptPacker
 
 
 class LLMGenerator:
     """Generate explanations using LLMs"""
     
+    SYSTEM_PROMPT = "You are a helpful assistant that provides evidence-based causal explanations."
+    
     def __init__(
         self,
         provider: str = "openai",
         model: str = "gpt-4",
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        max_evidence_tokens: Optional[int] = None,
+        prompt_packer: Optional[PromptPacker] = None,
+        completion_cache: Optional[CompletionCache] = None
     ):
         self.provider = provider
         self.model = model
         
-        # Initialize client
-        if provider == "openai":
-            api_key = api_key or os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                raise ValueError("OpenAI API key not provided")
-            self.client = OpenAI(api_key=api_key)
-        elif provider == "anthropic":
-            api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
-            if not api_key:
-                raise ValueError("Anthropic API key not provided")
-            self.client = Anthropic(api_key=api_key)
-        elif provider == "gemini":
-            api_key = api_key or os.getenv("GEMINI_API_KEY")
-            if not api_key:
-                raise ValueError("Gemini API key not provided")
-            genai.configure(api_key=api_key)
-            self.client = genai
-        else:
-            raise ValueError(f"Unsupported provider: {provider}")
+        # Shared client: pooled connections, per-provider rate limit and retries
+        self.client = get_llm_client(provider, model, api_key=api_key)
+        
+        if prompt_packer is None:
+            if max_evidence_tokens is None:
+                max_evidence_tokens = int(os.getenv("MAX_EVIDENCE_TOKENS", "2000"))
+            prompt_packer = PromptPacker(max_evidence_tokens=max_evidence_tokens)
+        self.prompt_packer = prompt_packer
+        self.completion_cache = completion_cache
     
     def generate_explanation(
         self,
@@ -58,8 +52,33 @@ class LLMGenerator:
         Returns:
             Generated explanation text
         """
+        return self._explain(query, self.pack_evidence(evidence), context)
+    
+    def pack_evidence(self, evidence: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Deduplicate and trim evidence spans to the prompt token budget.
+        
+        Args:
+            evidence: Ranked evidence spans
+        
+        Returns:
+            Packed spans, in the order they are numbered in the prompt
+        """
+        header_tokens = [
+            self.prompt_packer.count_tokens(self._format_span(i, span, text=""))
+            for i, span in enumerate(evidence, 1)
+        ]
+        return self.prompt_packer.pack(evidence, header_tokens=header_tokens)
+    
+    def _explain(
+        self,
+        query: str,
+        packed_evidence: List[Dict[str, Any]],
+        context: Optional[str] = None
+    ) -> str:
+        """Generate an explanation from already packed evidence"""
         # Format evidence
-        evidence_text = self._format_evidence(evidence)
+        evidence_text = self._format_evidence(packed_evidence)
         
         # Build prompt
         prompt = self._build_explanation_prompt(query, evidence_text, context)
@@ -70,28 +89,30 @@ class LLMGenerator:
         return response
     
     def _format_evidence(self, evidence: List[Dict[str, Any]]) -> str:
-        """Format evidence spans for prompt"""
-        formatted = []
-        
-        for i, span in enumerate(evidence[:10], 1):  # Limit to top 10
+        """Format packed evidence spans for prompt"""
+        return "\n".join(
+            self._format_span(i, span) for i, span in enumerate(evidence, 1)
+        )
+    
+    def _format_span(self, number: int, span: Dict[str, Any], text: Optional[str] = None) -> str:
+        """Format one evidence span (text overrides the span text, e.g. to cost the header)"""
+        if text is None:
             text = span.get('text', '')
-            metadata = span.get('metadata', {})
-            transcript_id = metadata.get('transcript_id', 'unknown')
-            turn_ids = span.get('turn_ids', [])
-            
-            evidence_entry = f"[Evidence {i}]\n"
-            evidence_entry += f"Transcript: {transcript_id}\n"
-            if turn_ids:
-                evidence_entry += f"Turns: {turn_ids[0]}-{turn_ids[-1]}\n"
-            evidence_entry += f"Text: {text}\n"
-            
-            # Add scores if available
-            if 'evidence_score' in span:
-                evidence_entry += f"Relevance Score: {span['evidence_score']:.2f}\n"
-            
-            formatted.append(evidence_entry)
-        
-        return "\n".join(formatted)
+        metadata = span.get('metadata', {})
+        transcript_id = metadata.get('transcript_id', 'unknown')
+        turn_ids = span.get('turn_ids', [])
+        
+        evidence_entry = f"[Evidence {number}]\n"
+        evidence_entry += f"Transcript: {transcript_id}\n"
+        if turn_ids:
+            evidence_entry += f"Turns: {turn_ids[0]}-{turn_ids[-1]}\n"
+        evidence_entry += f"Text: {text}\n"
+        
+        # Add scores if available
+        if 'evidence_score' in span:
+            evidence_entry += f"Relevance Score: {span['evidence_score']:.2f}\n"
+        
+        return evidence_entry
     
     def _build_explanation_prompt(
         self,
@@ -128,41 +149,13 @@ Instructions:
     
     def _generate(self, prompt: str) -> str:
         """Generate response from LLM"""
-        if self.provider == "openai":
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that provides evidence-based causal explanations."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
-            return response.choices[0].message.content
-        elif self.provider == "anthropic":
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            return response.content[0].text
-        elif self.provider == "gemini":
-            # Build full prompt with system message
-            full_prompt = "You are a helpful assistant that provides evidence-based causal explanations.\n\n" + prompt
-            
-            model = self.client.GenerativeModel(self.model)
-            response = model.generate_content(
-                full_prompt,
-                generation_config={
-                    "temperature": 0.7,
-                    "max_output_tokens": 1000,
-                }
-            )
-            return response.text
-        else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
+        return self.client.generate(
+            prompt,
+            system=self.SYSTEM_PROMPT,
+            temperature=0.7,
+            max_tokens=1000,
+            cache=self.completion_cache
+        )
     
     def generate_with_citations(
         self,
@@ -181,10 +174,12 @@ Instructions:
         Returns:
             Dictionary with explanation and citations
         """
-        explanation = self.generate_explanation(query, evidence, context)
+        # Citations are numbered over the packed evidence shown in the prompt
+        packed_evidence = self.pack_evidence(evidence)
+        explanation = self._explain(query, packed_evidence, context)
         
         # Extract citations from explanation
-        citations = self._extract_citations(explanation, evidence)
+        citations = self._extract_citations(explanation, packed_evidence)
         
         return {
             'explanation': explanation,
@@ -0,0 +1,230 @@
+"""
+Token-budgeted packing of evidence spans into LLM prompts
+"""
+
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from ..retrieval.span_extractor import span_turn_range
+
+# Regex approximation of subword tokens, used when no tokenizer is available
+FALLBACK_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+TRUNCATION_MARKER = " ..."
+
+
+class PromptPacker:
+    """
+    Select and trim evidence spans to fit a prompt token budget.
+    
+    Packing runs in three steps:
+        1. near-duplicate removal: a span whose turn range overlaps an
+           already kept span of the same transcript by more than
+           `overlap_threshold` (e.g. consecutive sliding windows sharing
+           4 of 5 turns) is dropped; spans without turn ranges are
+           compared by token overlap instead
+        2. budget allocation: the evidence budget is split in proportion to
+           `evidence_score`, with budget left unused by short spans handed
+           on to the longer ones
+        3. truncation of each span text to its budget
+    
+    Input order (the ranking) is preserved, so the packed list can be
+    numbered directly as [Evidence N].
+    """
+    
+    def __init__(
+        self,
+        max_evidence_tokens: int = 2000,
+        max_spans: int = 10,
+        min_span_tokens: int = 32,
+        overlap_threshold: float = 0.6,
+        tokenizer: Optional[Any] = "gpt2"
+    ):
+        self.max_evidence_tokens = max_evidence_tokens
+        self.max_spans = max_spans
+        self.min_span_tokens = min_span_tokens
+        self.overlap_threshold = overlap_threshold
+        self._tokenizer_source = tokenizer
+        self._tokenizer = None
+        self._tokenizer_loaded = False
+    
+    @property
+    def tokenizer(self) -> Optional[Any]:
+        """Local tokenizer, loaded on first use (None means regex fallback)"""
+        if not self._tokenizer_loaded:
+            self._tokenizer_loaded = True
+            source = self._tokenizer_source
+            if isinstance(source, str):
+                try:
+                    from transformers import AutoTokenizer
+                    self._tokenizer = AutoTokenizer.from_pretrained(source)
+                except Exception as e:
+                    print(f"Tokenizer {source} unavailable, approximating token counts: {e}")
+            else:
+                self._tokenizer = source
+        return self._tokenizer
+    
+    def _token_ends(self, text: str) -> List[int]:
+        """Character offset at which each token of a text ends"""
+        tokenizer = self.tokenizer
+        if tokenizer is not None:
+            try:
+                encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+                return [end for _, end in encoding['offset_mapping']]
+            except (NotImplementedError, KeyError, TypeError):
+                # Slow tokenizers have no offsets; count tokens, cut by characters
+                num_tokens = len(tokenizer.encode(text, add_special_tokens=False))
+                step = len(text) / num_tokens if num_tokens else 0
+                return [round(step * (i + 1)) for i in range(num_tokens)]
+        return [match.end() for match in FALLBACK_TOKEN_PATTERN.finditer(text)]
+    
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens of a text"""
+        return len(self._token_ends(text)) if text else 0
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Trim a text to at most max_tokens tokens"""
+        ends = self._token_ends(text)
+        if len(ends) <= max_tokens:
+            return text
+        
+        # The marker counts against the allowance too
+        keep = max_tokens - self.count_tokens(TRUNCATION_MARKER)
+        if keep <= 0:
+            return ""
+        return text[:ends[keep - 1]].rstrip() + TRUNCATION_MARKER
+    
+    def deduplicate(self, evidence: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop spans that mostly repeat a higher-ranked span"""
+        kept = []
+        kept_ranges = []
+        kept_tokens = []
+        
+        for span in evidence:
+            turn_range = span_turn_range(span)
+            
+            if turn_range is not None:
+                if any(self._range_overlap(turn_range, other) > self.overlap_threshold
+                       for other in kept_ranges if other is not None):
+                    continue
+                tokens = None
+            else:
+                tokens = set(FALLBACK_TOKEN_PATTERN.findall(span.get('text', '').lower()))
+                if any(self._token_overlap(tokens, other) > self.overlap_threshold
+                       for other in kept_tokens if other is not None):
+                    continue
+            
+            kept.append(span)
+            kept_ranges.append(turn_range)
+            kept_tokens.append(tokens)
+        
+        return kept
+    
+    def allocate(self, needs: List[int], weights: List[float], budget: int) -> List[int]:
+        """
+        Split a token budget in proportion to weights, capped at each need.
+        
+        Each span is guaranteed min_span_tokens (or its whole text if
+        shorter); only the rest of the budget is split by weight.
+        
+        Args:
+            needs: Tokens each span would use untrimmed
+            weights: Relative weights (evidence scores)
+            budget: Total tokens available
+        
+        Returns:
+            Token allowance of each span
+        """
+        # Every span is first guaranteed the minimum (or its full text if shorter)
+        allowances = [min(need, self.min_span_tokens) for need in needs]
+        extra_needs = [need - base for need, base in zip(needs, allowances)]
+        open_spans = [i for i, extra in enumerate(extra_needs) if extra > 0]
+        remaining = budget - sum(allowances)
+        
+        # Water-filling: spans that fit in their share take only what they need
+        while open_spans and remaining > 0:
+            total_weight = sum(weights[i] for i in open_spans)
+            satisfied = [
+                i for i in open_spans
+                if extra_needs[i] <= remaining * weights[i] / total_weight
+            ]
+            if not satisfied:
+                for i in open_spans:
+                    allowances[i] += int(remaining * weights[i] / total_weight)
+                break
+            
+            for i in satisfied:
+                allowances[i] += extra_needs[i]
+                remaining -= extra_needs[i]
+            open_spans = [i for i in open_spans if i not in satisfied]
+        
+        return allowances
+    
+    def pack(
+        self,
+        evidence: List[Dict[str, Any]],
+        header_tokens: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Pack evidence spans into the token budget.
+        
+        Args:
+            evidence: Ranked evidence spans
+            header_tokens: Optional per-span token cost of the formatting
+                around each text (citation label, transcript, turns)
+        
+        Returns:
+            Copies of the selected spans with trimmed text; each has
+            `packed_tokens` (tokens of its text) and `truncated`
+        """
+        if header_tokens is not None:
+            header_cost = {id(span): cost for span, cost in zip(evidence, header_tokens)}
+        else:
+            header_cost = {}
+        
+        spans = self.deduplicate(evidence)[:self.max_spans]
+        
+        # Drop the lowest-ranked spans until every span gets at least the minimum
+        while spans:
+            overhead = sum(header_cost.get(id(span), 0) for span in spans)
+            text_budget = self.max_evidence_tokens - overhead
+            if text_budget >= self.min_span_tokens * len(spans):
+                break
+            spans = spans[:-1]
+        
+        if not spans:
+            return []
+        
+        needs = [self.count_tokens(span.get('text', '')) for span in spans]
+        weights = [
+            max(float(span.get('evidence_score', span.get('relevance_score', 0.0)) or 0.0), 0.0) + 1e-3
+            for span in spans
+        ]
+        allowances = self.allocate(needs, weights, text_budget)
+        
+        packed = []
+        for span, need, allowance in zip(spans, needs, allowances):
+            packed_span = dict(span)
+            if need > allowance:
+                packed_span['text'] = self.truncate(span.get('text', ''), allowance)
+            packed_span['packed_tokens'] = min(need, allowance)
+            packed_span['truncated'] = need > allowance
+            packed.append(packed_span)
+        
+        return packed
+    
+    @staticmethod
+    def _range_overlap(a: Tuple[str, int, int], b: Tuple[str, int, int]) -> float:
+        """Shared turns of two ranges relative to the shorter one"""
+        if a[0] != b[0]:
+            return 0.0
+        shared = min(a[2], b[2]) - max(a[1], b[1]) + 1
+        if shared <= 0:
+            return 0.0
+        return shared / min(a[2] - a[1] + 1, b[2] - b[1] + 1)
+    
+    @staticmethod
+    def _token_overlap(a: set, b: set) -> float:
+        """Shared tokens of two token sets relative to the smaller one"""
+        if not a or not b:
+            return 0.0
+        return len(a & b) / min(len(a), len(b))
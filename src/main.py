@@ -50,7 +50,8 @@ async def root():
         "endpoints": {
             "/query": "Process a query (Task 1 or Task 2)",
             "/query/follow-up": "Process a follow-up query (Task 2)",
-            "/health": "Health check"
+            "/health": "Health check",
+            "/stats": "Conversation store statistics"
         }
     }
 
@@ -60,6 +61,13 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/stats")
+async def stats():
+    """Conversation store size and eviction counters"""
+    system = get_system()
+    return {"conversations": system.context_manager.get_stats()}
+
+
 @app.post("/query", response_model=QueryResponse)
 async def process_query(request: QueryRequest):
     """
@@ -39,19 +39,26 @@ class Task2Processor:
         Returns:
             Dictionary with response and evidence
         """
-        # Get or create conversation
+        # Get or create conversation (the only store read of the request)
         if conversation_id is None:
-            conversation_id = self.context_manager.get_or_create_conversation().conversation_id
+            conversation = self.context_manager.get_or_create_conversation()
+            conversation_id = conversation.conversation_id
+        else:
+            conversation = self.context_manager.get_context(conversation_id)
         
-        # Check if this is a follow-up
-        is_followup = self.context_manager.is_followup(query, conversation_id)
+        # Check if this is a follow-up (a conversation without turns never is)
+        is_followup = conversation is not None and self.context_manager.is_followup(
+            query, conversation_id, conversation=conversation
+        )
         
-        if is_followup and (context or self.context_manager.get_context(conversation_id)):
+        if is_followup:
             # Process as follow-up (Task 2)
             result = self.followup_processor.process_followup(
                 query=query,
                 conversation_id=conversation_id,
-                context=context
+                context=context,
+                is_followup=is_followup,
+                conversation=conversation
             )
             
             # Format response
@@ -75,6 +82,13 @@ class Task2Processor:
                 }
             )
             
+            # Keep the evidence for follow-ups on this conversation
+            self.followup_processor.cache_evidence(
+                conversation_id,
+                result['evidence'],
+                event_type=result['parsed_query'].get('event_type')
+            )
+            
             # Add metadata
             formatted['metadata']['conversation_id'] = conversation_id
             formatted['metadata']['is_followup'] = False
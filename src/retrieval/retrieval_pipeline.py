@@ -2,35 +2,66 @@
 Main retrieval pipeline combining semantic search, reranking, and span extraction
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
+from collections import OrderedDict
+import threading
+import numpy as np
 from .semantic_search import SemanticSearch
 from .reranker import Reranker
 from .span_extractor import SpanExtractor
 from ..data_processing.vector_store import VectorStore
+from ..data_processing.turn_index import TurnIndex
 
 
 class RetrievalPipeline:
     """End-to-end retrieval pipeline"""
     
+    SUPPORTED_RETRIEVAL_MODES = ['dense', 'hybrid']
+    
+    # Number of query embeddings kept so context turns are never re-encoded
+    QUERY_EMBEDDING_CACHE_SIZE = 4096
+    
     def __init__(
         self,
         vector_store: Optional[VectorStore] = None,
         embedding_model: str = "all-MiniLM-L6-v2",
         reranker_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
-        use_reranking: bool = True
+        use_reranking: bool = True,
+        turn_index: Optional[TurnIndex] = None,
+        retrieval_mode: str = "dense",
+        rrf_k: int = 60,
+        merge_spans: bool = True,
+        max_merged_turns: Optional[int] = 15,
+        fine_window_size: int = 5,
+        fine_stride: int = 1
     ):
+        if retrieval_mode not in self.SUPPORTED_RETRIEVAL_MODES:
+            raise ValueError(f"Unsupported retrieval mode: {retrieval_mode}")
+        
         self.vector_store = vector_store
         self.semantic_search = SemanticSearch(embedding_model=embedding_model)
         self.reranker = Reranker(model_name=reranker_model) if use_reranking else None
-        self.span_extractor = SpanExtractor()
+        self.turn_index = turn_index
+        self.span_extractor = SpanExtractor(turn_index=turn_index)
         self.use_reranking = use_reranking
+        self.retrieval_mode = retrieval_mode
+        self.rrf_k = rrf_k
+        self.merge_spans = merge_spans
+        self.max_merged_turns = max_merged_turns
+        self.fine_window_size = fine_window_size
+        self.fine_stride = fine_stride
+        
+        self._query_embeddings: Dict[str, np.ndarray] = OrderedDict()
+        self._query_embeddings_lock = threading.Lock()
     
     def retrieve(
         self,
         query: str,
         top_k: int = 20,
         rerank_top_k: int = 10,
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        span_ids: Optional[Set[str]] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant dialogue spans for a query.
@@ -40,16 +71,52 @@ class RetrievalPipeline:
             top_k: Number of initial results to retrieve
             rerank_top_k: Number of results after reranking
             filter_dict: Optional metadata filters
+            span_ids: Optional set of candidate span IDs to restrict results to
+            query_embedding: Optional precomputed query vector for dense search
         
         Returns:
             List of retrieved and reranked dialogue spans
         """
+        spans = self.retrieve_candidates(
+            query=query,
+            top_k=top_k,
+            filter_dict=filter_dict,
+            span_ids=span_ids,
+            query_embedding=query_embedding
+        )
+        
+        return self.rerank_candidates(query, spans, rerank_top_k)
+    
+    def retrieve_candidates(
+        self,
+        query: str,
+        top_k: int = 20,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        span_ids: Optional[Set[str]] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get first-stage candidates (ANN search, keyword fusion, span
+        consolidation) before reranking.
+        
+        Args:
+            query: Search query text
+            top_k: Number of initial results to retrieve
+            filter_dict: Optional metadata filters
+            span_ids: Optional set of candidate span IDs to restrict results to
+            query_embedding: Optional precomputed query vector for dense search
+        
+        Returns:
+            Candidate spans in first-stage order
+        """
         # Retrieve from vector store if available
         if self.vector_store:
             results = self.vector_store.search(
                 query=query,
                 n_results=top_k,
-                filter_dict=filter_dict
+                filter_dict=filter_dict,
+                span_ids=span_ids,
+                query_embedding=query_embedding
             )
             
             # Convert to span format
@@ -62,10 +129,52 @@ class RetrievalPipeline:
                 }
                 for r in results
             ]
+            
+            # Hybrid mode: fuse with BM25 keyword results before reranking
+            if self.retrieval_mode == 'hybrid':
+                keyword_results = self.vector_store.keyword_search(
+                    query=query,
+                    n_results=top_k,
+                    filter_dict=filter_dict,
+                    span_ids=span_ids
+                )
+                
+                keyword_spans = [
+                    {
+                        'text': r['text'],
+                        'span_id': r['span_id'],
+                        'metadata': r['metadata'],
+                        'similarity_score': 0.0,
+                        'bm25_score': r['bm25_score']
+                    }
+                    for r in keyword_results
+                ]
+                
+                spans = self._reciprocal_rank_fusion([spans, keyword_spans])[:top_k]
         else:
             # Fallback: return empty if no vector store
             spans = []
         
+        # Consolidate overlapping windows so each turn range is scored once
+        if self.merge_spans and spans:
+            spans = self.span_extractor.merge_spans(spans, max_turns=self.max_merged_turns)
+        
+        # Multi-granularity indexes return coarse windows; rerank their fine windows
+        spans = self.span_extractor.expand_fine_spans(
+            spans,
+            window_size=self.fine_window_size,
+            stride=self.fine_stride
+        )
+        
+        return spans
+    
+    def rerank_candidates(
+        self,
+        query: str,
+        spans: List[Dict[str, Any]],
+        rerank_top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Rerank first-stage candidates (or truncate them when reranking is off)"""
         # Rerank if enabled
         if self.use_reranking and self.reranker and spans:
             reranked = self.reranker.rerank(
@@ -78,6 +187,38 @@ class RetrievalPipeline:
         # Return top-k if no reranking
         return spans[:rerank_top_k]
     
+    def _reciprocal_rank_fusion(
+        self,
+        ranked_lists: List[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Merge ranked span lists with reciprocal rank fusion.
+        
+        Each span scores sum(1 / (rrf_k + rank)) over the lists it appears
+        in, so spans found by both retrievers rise to the top regardless of
+        how their raw scores compare.
+        
+        Args:
+            ranked_lists: Span lists, each ordered best first
+        
+        Returns:
+            Deduplicated spans ordered by fusion_score
+        """
+        fused = {}
+        for ranked in ranked_lists:
+            for rank, span in enumerate(ranked, 1):
+                span_id = span['span_id']
+                if span_id in fused:
+                    # Keep scores from every retriever that found the span
+                    for key, value in span.items():
+                        if key.endswith('_score') and value:
+                            fused[span_id][key] = value
+                else:
+                    fused[span_id] = dict(span, fusion_score=0.0)
+                fused[span_id]['fusion_score'] += 1.0 / (self.rrf_k + rank)
+        
+        return sorted(fused.values(), key=lambda x: x['fusion_score'], reverse=True)
+    
     def retrieve_for_event(
         self,
         query: str,
@@ -99,19 +240,43 @@ class RetrievalPipeline:
         Returns:
             List of retrieved spans relevant to the event type
         """
-        # Filter by event type if vector store supports it
-        filter_dict = None
-        if self.vector_store:
-            filter_dict = {'event_types': {'$contains': event_type}}
+        # Restrict candidates to the event's posting list, if one was built
+        span_ids = None
+        event_index = self.vector_store.event_index if self.vector_store else None
+        if event_index is not None and len(event_index) > 0:
+            span_ids = event_index.get_span_ids(event_type)
         
         # Retrieve spans
         spans = self.retrieve(
             query=query,
             top_k=top_k,
             rerank_top_k=rerank_top_k,
-            filter_dict=filter_dict
+            span_ids=span_ids
         )
         
+        # Annotate where the event occurs inside each span
+        if span_ids is not None:
+            for span in spans:
+                member_ids = (
+                    span.get('parent_span_ids') or
+                    span.get('merged_span_ids') or
+                    [span.get('span_id', '')]
+                )
+                turn_indices = {
+                    turn_index
+                    for member_id in member_ids
+                    for turn_index in event_index.get_event_turn_indices(event_type, member_id)
+                }
+                
+                # Fine windows only report events inside their own turn range
+                if 'parent_span_id' in span:
+                    metadata = span.get('metadata', {})
+                    turn_indices = {
+                        i for i in turn_indices
+                        if metadata.get('start_turn_index', 0) <= i <= metadata.get('end_turn_index', -1)
+                    }
+                span['event_turn_indices'] = sorted(turn_indices)
+        
         # If transcript provided, also extract event-specific spans
         if transcript:
             event_spans = self.span_extractor.extract_event_specific_spans(
@@ -119,7 +284,27 @@ class RetrievalPipeline:
                 event_type=event_type,
                 window_before=10
             )
+        elif self.turn_index is not None:
+            # Anchor on the events of the transcripts that were retrieved,
+            # slicing their windows straight from the turn index
+            transcript_ids = []
+            for span in spans:
+                transcript_id = span.get('metadata', {}).get('transcript_id')
+                if transcript_id and transcript_id not in transcript_ids:
+                    transcript_ids.append(transcript_id)
             
+            event_spans = []
+            for transcript_id in transcript_ids:
+                event_spans.extend(self.span_extractor.extract_event_specific_spans(
+                    transcript=None,
+                    event_type=event_type,
+                    window_before=10,
+                    transcript_id=transcript_id
+                ))
+        else:
+            event_spans = []
+        
+        if event_spans:
             # Combine and deduplicate
             all_spans = spans + event_spans
             seen_texts = set()
@@ -138,40 +323,201 @@ class RetrievalPipeline:
         
         return spans
     
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Get L2-normalized embeddings for a list of texts"""
+        return self.semantic_search.embedding_model.encode(
+            texts,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+    
+    def embed_spans(
+        self,
+        spans: List[Dict[str, Any]],
+        known: Optional[Dict[str, np.ndarray]] = None
+    ) -> np.ndarray:
+        """
+        Get L2-normalized embeddings of spans, encoding as few as possible.
+        
+        Vectors come from `known` (span_id -> vector), then from the vector
+        store for spans whose text is the stored document (merged or fine
+        spans have text of their own), and only the rest are encoded.
+        
+        Args:
+            spans: Spans to embed
+            known: Embeddings already computed for some span IDs
+        
+        Returns:
+            Embedding matrix, row-aligned with spans
+        """
+        known = known or {}
+        span_ids = [span.get('span_id', '') for span in spans]
+        embeddings: List[Optional[np.ndarray]] = [known.get(span_id) for span_id in span_ids]
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing and self.vector_store is not None and (
+            self.vector_store.embedding_model_name == self.semantic_search.embedding_model_name
+        ):
+            stored = self.vector_store.get_span_vectors([span_ids[i] for i in missing])
+            for i in missing:
+                document, vector = stored.get(span_ids[i], (None, None))
+                if vector is not None and document == spans[i].get('text', ''):
+                    # Reconstructed (e.g. product-quantized) vectors may drift from unit norm
+                    embeddings[i] = vector / (np.linalg.norm(vector) or 1.0)
+            missing = [i for i in missing if embeddings[i] is None]
+        
+        if missing:
+            encoded = self.embed_texts([spans[i].get('text', '') for i in missing])
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+        
+        return np.vstack(embeddings).astype(np.float32)
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Get the normalized embedding of a query, cached by query text"""
+        with self._query_embeddings_lock:
+            embedding = self._query_embeddings.get(query)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(query)
+                return embedding
+        
+        embedding = self.embed_texts([query])[0]
+        
+        with self._query_embeddings_lock:
+            self._query_embeddings[query] = embedding
+            while len(self._query_embeddings) > self.QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+        
+        return embedding
+    
+    def embed_with_context(
+        self,
+        query: str,
+        context: Optional[List[Dict[str, Any]]] = None,
+        context_weight: float = 0.3,
+        decay: float = 0.5,
+        max_context_turns: int = 3
+    ) -> np.ndarray:
+        """
+        Build a context-aware query vector.
+        
+        The current query embedding is averaged with the embeddings of
+        recent context queries, which are cached from when they were asked.
+        
+        Args:
+            query: Current query text
+            context: Previous turns, oldest first, with a 'query' field
+            context_weight: Total weight given to the context queries
+            decay: Weight ratio between each context turn and the next newer one
+            max_context_turns: Number of recent context turns to use
+        
+        Returns:
+            Normalized query vector
+        """
+        query_embedding = self.embed_query(query)
+        
+        context_queries = [
+            item.get('query', '') for item in (context or [])[-max_context_turns:]
+        ]
+        context_queries = [q for q in context_queries if q]
+        if not context_queries or context_weight <= 0:
+            return query_embedding
+        
+        # Newer turns weigh more: weights decay going back in time
+        weights = np.array([decay ** (len(context_queries) - 1 - i) for i in range(len(context_queries))])
+        weights = weights / weights.sum() * context_weight
+        
+        combined = (1.0 - context_weight) * query_embedding
+        for weight, context_query in zip(weights, context_queries):
+            combined = combined + weight * self.embed_query(context_query)
+        
+        norm = np.linalg.norm(combined)
+        return combined / norm if norm > 0 else query_embedding
+    
+    def retrieve_from_pool(
+        self,
+        query: str,
+        spans: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        rerank_top_k: int = 10,
+        min_similarity: float = 0.3,
+        min_coverage: int = 3,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Rank a cached pool of spans for a query without searching the index.
+        
+        Args:
+            query: Search query text (seen by the reranker)
+            spans: Candidate spans (e.g. the evidence of the previous turn)
+            embeddings: Normalized embeddings of the spans, row-aligned
+            rerank_top_k: Number of results after reranking
+            min_similarity: Cosine similarity for a span to count as relevant
+            min_coverage: Relevant spans needed to answer from the pool
+            query_embedding: Optional precomputed (e.g. context-aware) query vector
+        
+        Returns:
+            Reranked spans, or None if the pool does not cover the query
+        """
+        if not spans:
+            return None
+        
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        similarities = embeddings @ query_embedding
+        
+        candidates = [
+            dict(span, similarity_score=float(similarity))
+            for span, similarity in zip(spans, similarities)
+            if similarity >= min_similarity
+        ]
+        if len(candidates) < min_coverage:
+            return None
+        
+        candidates.sort(key=lambda x: x['similarity_score'], reverse=True)
+        
+        if self.use_reranking and self.reranker:
+            return self.reranker.rerank(query=query, spans=candidates, top_k=rerank_top_k)
+        
+        return candidates[:rerank_top_k]
+    
     def retrieve_with_context(
         self,
         query: str,
         context: Optional[List[Dict[str, Any]]] = None,
         top_k: int = 20,
-        rerank_top_k: int = 10
+        rerank_top_k: int = 10,
+        context_weight: float = 0.3,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve spans with context from previous conversation.
         
+        Context is folded into the query vector rather than the query text,
+        so the reranker and keyword search only see the short current query.
+        
         Args:
             query: Current query text
             context: List of previous queries/responses for context
             top_k: Number of initial results
             rerank_top_k: Number of results after reranking
+            context_weight: Weight of the context queries in the query vector
+            query_embedding: Optional precomputed context-aware query vector
         
         Returns:
             List of retrieved spans with context awareness
         """
-        # Enhance query with context if available
-        enhanced_query = query
-        if context:
-            # Extract relevant information from context
-            context_texts = [
-                item.get('query', '') or item.get('response', '')
-                for item in context
-            ]
-            context_summary = ' '.join(context_texts[-3:])  # Last 3 context items
-            enhanced_query = f"{context_summary} {query}"
+        if query_embedding is None and context:
+            query_embedding = self.embed_with_context(
+                query,
+                context,
+                context_weight=context_weight
+            )
         
-        # Retrieve with enhanced query
         return self.retrieve(
-            query=enhanced_query,
+            query=query,
             top_k=top_k,
-            rerank_top_k=rerank_top_k
+            rerank_top_k=rerank_top_k,
+            query_embedding=query_embedding
         )
-
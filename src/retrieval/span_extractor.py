@@ -2,35 +2,82 @@
 Dialogue span extraction utilities
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import re
+from ..data_processing.turn_index import TurnIndex
+from ..data_processing.preprocessor import SpanBuilder, window_starts
+
+
+def span_turn_range(span: Dict[str, Any]) -> Optional[Tuple[str, int, int]]:
+    """Get (transcript_id, start_turn_index, end_turn_index) of a span if known"""
+    metadata = span.get('metadata', {}) or {}
+    transcript_id = metadata.get('transcript_id', span.get('transcript_id'))
+    start = metadata.get('start_turn_index', span.get('start_turn_index'))
+    end = metadata.get('end_turn_index', span.get('end_turn_index'))
+    
+    if transcript_id is None or start is None or end is None:
+        return None
+    
+    start, end = int(start), int(end)
+    if start < 0 or end < start:
+        return None
+    return str(transcript_id), start, end
 
 
 class SpanExtractor:
     """Extract and rank dialogue spans for causal analysis"""
     
-    def __init__(self):
-        pass
+    def __init__(self, turn_index: Optional[TurnIndex] = None):
+        self.turn_index = turn_index
     
     def extract_causal_spans(
         self,
-        transcript: Dict[str, Any],
+        transcript: Optional[Dict[str, Any]],
         event: Dict[str, Any],
         window_before: int = 10,
-        window_after: int = 5
+        window_after: int = 5,
+        transcript_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Extract dialogue spans that precede and correlate with an event.
         
+        When a turn index is available and holds the transcript, the event
+        window is sliced straight from it and the transcript dict is optional.
+        
         Args:
-            transcript: Transcript dictionary with turns
+            transcript: Transcript dictionary with turns (optional with a turn index)
             event: Event dictionary with turn_id or turn_index
             window_before: Number of turns to include before event
             window_after: Number of turns to include after event
+            transcript_id: Transcript ID, used when no transcript dict is passed
         
         Returns:
             List of dialogue spans relevant to the event
         """
+        transcript = transcript or {}
+        transcript_id = (
+            transcript_id or
+            transcript.get('transcript_id') or
+            event.get('transcript_id', 'unknown')
+        )
+        
+        if self.turn_index is not None and transcript_id in self.turn_index:
+            event_turn_index, start_index, causal_turns = self.turn_index.get_event_window(
+                transcript_id,
+                event,
+                window_before=window_before,
+                window_after=window_after
+            )
+            
+            if event_turn_index is None:
+                return []
+            
+            return self._create_spans_from_turns(
+                causal_turns,
+                transcript_id=transcript_id,
+                start_index=start_index
+            )
+        
         turns = transcript.get('turns', [])
         if not turns:
             return []
@@ -58,7 +105,7 @@ class SpanExtractor:
         # Create spans from causal turns
         spans = self._create_spans_from_turns(
             causal_turns,
-            transcript_id=transcript.get('transcript_id', 'unknown'),
+            transcript_id=transcript_id,
             start_index=start_index
         )
         
@@ -104,26 +151,34 @@ class SpanExtractor:
     
     def extract_event_specific_spans(
         self,
-        transcript: Dict[str, Any],
+        transcript: Optional[Dict[str, Any]],
         event_type: str,
-        window_before: int = 10
+        window_before: int = 10,
+        transcript_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Extract spans for all events of a specific type.
         
         Args:
-            transcript: Transcript dictionary
+            transcript: Transcript dictionary (optional with a turn index)
             event_type: Type of event to extract spans for
             window_before: Number of turns to include before each event
+            transcript_id: Transcript ID, used when no transcript dict is passed
         
         Returns:
             List of dialogue spans for all events of the specified type
         """
-        events = transcript.get('events', [])
-        relevant_events = [
-            e for e in events
-            if e.get('event_type', '').lower() == event_type.lower()
-        ]
+        transcript = transcript or {}
+        transcript_id = transcript_id or transcript.get('transcript_id')
+        
+        if 'events' in transcript or self.turn_index is None:
+            events = transcript.get('events', [])
+            relevant_events = [
+                e for e in events
+                if e.get('event_type', '').lower() == event_type.lower()
+            ]
+        else:
+            relevant_events = self.turn_index.get_events(transcript_id, event_type)
         
         all_spans = []
         for event in relevant_events:
@@ -131,12 +186,199 @@ class SpanExtractor:
                 transcript,
                 event,
                 window_before=window_before,
-                window_after=0
+                window_after=0,
+                transcript_id=transcript_id
             )
             all_spans.extend(spans)
         
         return all_spans
     
+    def merge_spans(
+        self,
+        spans: List[Dict[str, Any]],
+        max_gap: int = 0,
+        max_turns: Optional[int] = 15
+    ) -> List[Dict[str, Any]]:
+        """
+        Merge overlapping or adjacent spans of the same transcript.
+        
+        Sliding windows retrieved together (e.g. turns 3-7, 4-8 and 5-9)
+        become one span covering the union of their turn ranges (3-9).
+        Merged text is rebuilt from the turn index; transcripts that are not
+        indexed keep only their best-ranked window of each group, with the
+        others folded into it. Spans without turn ranges pass through.
+        
+        Args:
+            spans: Ranked spans (best first)
+            max_gap: Largest number of turns between two ranges that still merge
+            max_turns: Optional cap on the turns of a merged span
+        
+        Returns:
+            Merged spans, ranked by their best member. Each merged span keeps
+            the span_id of its best member, the highest of each *_score of its
+            members and their IDs in `merged_span_ids`.
+        """
+        # Group ranked positions by transcript
+        groups: Dict[str, List[Tuple[int, int, int]]] = {}
+        passthrough = []
+        for rank, span in enumerate(spans):
+            turn_range = span_turn_range(span)
+            if turn_range is None:
+                passthrough.append(rank)
+                continue
+            transcript_id, start, end = turn_range
+            groups.setdefault(transcript_id, []).append((start, end, rank))
+        
+        merged = [(rank, spans[rank]) for rank in passthrough]
+        
+        for transcript_id, ranges in groups.items():
+            ranges.sort()
+            
+            cluster = [ranges[0]]
+            cluster_end = ranges[0][1]
+            for start, end, rank in ranges[1:]:
+                fits = max_turns is None or max(end, cluster_end) - cluster[0][0] + 1 <= max_turns
+                if start <= cluster_end + max_gap + 1 and fits:
+                    cluster.append((start, end, rank))
+                    cluster_end = max(cluster_end, end)
+                else:
+                    merged.append(self._merge_cluster(transcript_id, cluster, spans))
+                    cluster = [(start, end, rank)]
+                    cluster_end = end
+            merged.append(self._merge_cluster(transcript_id, cluster, spans))
+        
+        merged.sort(key=lambda x: x[0])
+        return [span for _, span in merged]
+    
+    def _merge_cluster(
+        self,
+        transcript_id: str,
+        cluster: List[Tuple[int, int, int]],
+        spans: List[Dict[str, Any]]
+    ) -> Tuple[int, Dict[str, Any]]:
+        """Merge a cluster of (start, end, rank) ranges into one span"""
+        best_rank = min(rank for _, _, rank in cluster)
+        best = spans[best_rank]
+        if len(cluster) == 1:
+            return best_rank, best
+        
+        members = [spans[rank] for _, _, rank in sorted(cluster, key=lambda x: x[2])]
+        merged = dict(best)
+        merged['merged_span_ids'] = [member.get('span_id') for member in members]
+        
+        # Keep the strongest signal of every retriever across the members
+        for member in members:
+            for key, value in member.items():
+                if key.endswith('_score') and isinstance(value, (int, float)):
+                    merged[key] = max(merged.get(key) or value, value)
+        
+        start = min(start for start, _, _ in cluster)
+        end = max(end for _, end, _ in cluster)
+        
+        turns = []
+        if self.turn_index is not None and transcript_id in self.turn_index:
+            turns = self.turn_index.get_turns(transcript_id, start, end + 1)
+        if len(turns) != end - start + 1:
+            # Cannot rebuild the union text; the best window stands for the group
+            return best_rank, merged
+        
+        turn_ids = [turn.get('turn_id', start + i) for i, turn in enumerate(turns)]
+        speakers = [turn.get('speaker', 'unknown') for turn in turns]
+        
+        merged['text'] = ' '.join(turn.get('text', '') for turn in turns)
+        merged['start_turn_index'] = start
+        merged['end_turn_index'] = end
+        merged['turn_ids'] = turn_ids
+        merged['speakers'] = speakers
+        
+        metadata = dict(merged.get('metadata', {}) or {})
+        if 'start_turn_index' in metadata or 'end_turn_index' in metadata:
+            metadata['start_turn_index'] = start
+            metadata['end_turn_index'] = end
+            metadata['turn_ids'] = str(turn_ids)
+            metadata['speakers'] = ','.join(speakers)
+            metadata['window_size'] = len(turns)
+        merged['metadata'] = metadata
+        
+        return best_rank, merged
+    
+    def expand_fine_spans(
+        self,
+        spans: List[Dict[str, Any]],
+        window_size: int = 5,
+        stride: int = 1
+    ) -> List[Dict[str, Any]]:
+        """
+        Cut coarse spans into fine windows for reranking.
+        
+        Coarse spans come from multi-granularity indexing; their fine
+        windows are built from the turn index and never embedded. Each fine
+        span carries its coarse span's scores, its `parent_span_id` and, for
+        merged coarse spans, all coarse IDs in `parent_span_ids`. Fine spans,
+        and coarse spans whose transcript is not in the turn index, pass
+        through unchanged.
+        
+        Args:
+            spans: Ranked spans (best first)
+            window_size: Number of turns per fine window
+            stride: Turns between the starts of consecutive fine windows
+        
+        Returns:
+            Fine spans, grouped in the rank order of their coarse spans
+        """
+        fine_spans = []
+        seen = set()
+        
+        for span in spans:
+            metadata = span.get('metadata', {}) or {}
+            turn_range = span_turn_range(span)
+            
+            if (metadata.get('granularity') != 'coarse' or turn_range is None or
+                    self.turn_index is None or turn_range[0] not in self.turn_index):
+                fine_spans.append(span)
+                continue
+            
+            transcript_id, start, end = turn_range
+            turns = self.turn_index.get_turns(transcript_id, start, end + 1)
+            fine_size = min(window_size, len(turns))
+            parent_ids = span.get('merged_span_ids') or [span.get('span_id')]
+            scores = {key: value for key, value in span.items() if key.endswith('_score')}
+            builder = SpanBuilder(turns)
+            
+            for i in window_starts(len(turns), fine_size, stride):
+                span_id = f"{transcript_id}_span_{start + i}"
+                if span_id in seen:
+                    continue
+                seen.add(span_id)
+                
+                window = turns[i:i + fine_size]
+                turn_ids = [turn.get('turn_id', start + i + j) for j, turn in enumerate(window)]
+                speakers = builder.speakers[i:i + fine_size]
+                
+                fine_metadata = dict(metadata)
+                fine_metadata.update({
+                    'span_id': span_id,
+                    'start_turn_index': start + i,
+                    'end_turn_index': start + i + fine_size - 1,
+                    'turn_ids': str(turn_ids),
+                    'speakers': ','.join(speakers),
+                    'window_size': fine_size,
+                    'granularity': 'fine'
+                })
+                
+                fine_spans.append({
+                    'span_id': span_id,
+                    'text': builder.text(i, i + fine_size),
+                    'turn_ids': turn_ids,
+                    'speakers': speakers,
+                    'metadata': fine_metadata,
+                    'parent_span_id': span.get('span_id'),
+                    'parent_span_ids': parent_ids,
+                    **scores
+                })
+        
+        return fine_spans
+    
     def rank_spans_by_temporal_proximity(
         self,
         spans: List[Dict[str, Any]],
@@ -3,7 +3,7 @@ System initialization and component wiring
 """
 
 import os
-from typing import Optional
+from typing import Optional, Dict, Any
 from .data_processing.pipeline import DataProcessingPipeline
 from .data_processing.vector_store import VectorStore
 from .retrieval.retrieval_pipeline import RetrievalPipeline
@@ -11,6 +11,7 @@ from .causal_analysis.causal_analyzer import CausalAnalyzer
 from .explanation_generation.explanation_generator import ExplanationGenerator
 from .query_processing.task1_processor import Task1Processor
 from .conversation_manager.context_manager import ContextManager
+from .conversation_manager.conversation_store import create_conversation_store
 from .conversation_manager.followup_processor import FollowUpProcessor
 from .query_processing.task2_processor import Task2Processor
 
@@ -24,27 +25,44 @@ class System:
         embedding_model: str = "all-MiniLM-L6-v2",
         reranker_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
         llm_provider: str = "openai",
-        llm_model: str = "gpt-4"
+        llm_model: str = "gpt-4",
+        vector_db_type: str = "chromadb",
+        vector_index_options: Optional[Dict[str, Any]] = None,
+        retrieval_mode: str = "dense",
+        context_manager_options: Optional[Dict[str, Any]] = None,
+        span_options: Optional[Dict[str, Any]] = None
     ):
         # Initialize data processing pipeline
         self.data_pipeline = DataProcessingPipeline(
             vector_db_path=vector_db_path or os.getenv("VECTOR_DB_PATH", "./data/processed/vector_db"),
-            embedding_model=embedding_model
+            embedding_model=embedding_model,
+            vector_db_type=vector_db_type,
+            # The BM25 index is only built and loaded for hybrid retrieval
+            vector_index_options={
+                **(vector_index_options or {}),
+                'keyword_index': retrieval_mode == 'hybrid'
+            },
+            **(span_options or {})
         )
         
-        # Get vector store
+        # Get vector store and turn index
         self.vector_store = self.data_pipeline.get_vector_store()
+        self.turn_index = self.data_pipeline.get_turn_index()
         
         # Initialize retrieval pipeline
         self.retrieval_pipeline = RetrievalPipeline(
             vector_store=self.vector_store,
             embedding_model=embedding_model,
             reranker_model=reranker_model,
-            use_reranking=True
+            use_reranking=True,
+            turn_index=self.turn_index,
+            retrieval_mode=retrieval_mode,
+            fine_window_size=self.data_pipeline.span_window_size,
+            fine_stride=self.data_pipeline.span_stride
         )
         
         # Initialize causal analyzer
-        self.causal_analyzer = CausalAnalyzer()
+        self.causal_analyzer = CausalAnalyzer(turn_index=self.turn_index)
         
         # Initialize explanation generator
         self.explanation_generator = ExplanationGenerator(
@@ -62,7 +80,7 @@ class System:
         )
         
         # Initialize context manager
-        self.context_manager = ContextManager()
+        self.context_manager = ContextManager(**(context_manager_options or {}))
         
         # Initialize follow-up processor
         self.followup_processor = FollowUpProcessor(
@@ -106,6 +124,76 @@ class System:
         )
 
 
+def _get_vector_index_options() -> Dict[str, Any]:
+    """Read FAISS index and sharding settings from the environment"""
+    options = {}
+    
+    if os.getenv("FAISS_INDEX_TYPE"):
+        options['index_type'] = os.getenv("FAISS_INDEX_TYPE")
+    if os.getenv("FAISS_NPROBE"):
+        options['nprobe'] = int(os.getenv("FAISS_NPROBE"))
+    if os.getenv("FAISS_EF_SEARCH"):
+        options['ef_search'] = int(os.getenv("FAISS_EF_SEARCH"))
+    if os.getenv("VECTOR_SHARDING"):
+        options['sharding'] = os.getenv("VECTOR_SHARDING")
+    if os.getenv("VECTOR_NUM_SHARDS"):
+        options['num_shards'] = int(os.getenv("VECTOR_NUM_SHARDS"))
+    if os.getenv("VECTOR_MAX_ACTIVE_SHARDS"):
+        options['max_active_shards'] = int(os.getenv("VECTOR_MAX_ACTIVE_SHARDS"))
+    
+    return options
+
+
+def _get_span_options() -> Dict[str, Any]:
+    """Read span windowing settings from the environment"""
+    options = {}
+    
+    if os.getenv("SPAN_WINDOW_SIZE"):
+        options['span_window_size'] = int(os.getenv("SPAN_WINDOW_SIZE"))
+    if os.getenv("SPAN_STRIDE"):
+        options['span_stride'] = int(os.getenv("SPAN_STRIDE"))
+    if os.getenv("SPAN_GRANULARITY"):
+        options['span_granularity'] = os.getenv("SPAN_GRANULARITY")
+    if os.getenv("COARSE_SPAN_WINDOW_SIZE"):
+        options['coarse_window_size'] = int(os.getenv("COARSE_SPAN_WINDOW_SIZE"))
+    
+    return options
+
+
+def _get_context_manager_options() -> Dict[str, Any]:
+    """Read conversation retention limits from the environment"""
+    options = {}
+    
+    if os.getenv("MAX_CONTEXT_LENGTH"):
+        options['max_context_length'] = int(os.getenv("MAX_CONTEXT_LENGTH"))
+    if os.getenv("MAX_CONVERSATIONS"):
+        options['max_conversations'] = int(os.getenv("MAX_CONVERSATIONS"))
+    if os.getenv("MAX_TURNS_PER_CONVERSATION"):
+        options['max_turns_per_conversation'] = int(os.getenv("MAX_TURNS_PER_CONVERSATION"))
+    if os.getenv("CONVERSATION_MEMORY_BYTES"):
+        options['max_total_bytes'] = int(os.getenv("CONVERSATION_MEMORY_BYTES"))
+    if os.getenv("CONVERSATION_TTL_SECONDS"):
+        options['ttl_seconds'] = float(os.getenv("CONVERSATION_TTL_SECONDS"))
+    
+    # Out-of-process stores share conversations between API workers
+    backend = os.getenv("CONVERSATION_STORE", "memory")
+    if backend != "memory":
+        store_options = {
+            key: options[key]
+            for key in ('max_turns_per_conversation', 'ttl_seconds')
+            if key in options
+        }
+        if backend == "sqlite":
+            store_options['db_path'] = os.getenv(
+                "CONVERSATION_DB_PATH", "./data/processed/conversations.sqlite"
+            )
+        elif backend == "redis":
+            store_options['url'] = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        options['store'] = create_conversation_store(backend, **store_options)
+    
+    return options
+
+
 # Global system instance
 _system_instance: Optional[System] = None
 
@@ -130,7 +218,12 @@ def get_system() -> System:
             embedding_model=os.getenv("DEFAULT_EMBEDDING_MODEL", "all-MiniLM-L6-v2"),
             reranker_model="cross-encoder/ms-marco-MiniLM-L-6-v2",
             llm_provider=default_provider,
-            llm_model=default_model
+            llm_model=default_model,
+            vector_db_type=os.getenv("VECTOR_DB_TYPE", "chromadb"),
+            vector_index_options=_get_vector_index_options(),
+            retrieval_mode=os.getenv("RETRIEVAL_MODE", "dense"),
+            context_manager_options=_get_context_manager_options(),
+            span_options=_get_span_options()
         )
     return _system_instance
 